@@ -1,27 +1,198 @@
-from groq import Groq
-from config import GROQ_API_KEY
+from config import (AI_BATCH_MAX_DOCS, AI_BATCH_TOKEN_BUDGET, DISTILL_ENABLED,
+                    LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+from content_distiller import distill, estimate_tokens
+from contact_extractor import normalize_email, normalize_phone, normalize_social
+from disk_cache import DiskCache, cache_key
 from models import Lead, SearchQuery
-import json
+import asyncio
 import re
-import time
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional, Tuple
 from logger_util import log_event
+from llm_telemetry import get_llm_ledger, OUTCOME_HEDGE_LOST, OUTCOME_CANCELLED
+from llm_providers import LLMRouter, LLMProvider, build_providers, is_rate_limited
+
+# Bump when a prompt template changes so cached responses to the old wording aren't reused
+LEAD_PROMPT_VERSION = 2  # analyze_lead and the batch prompt share the lead schema
+BRAINSTORM_PROMPT_VERSION = 1
+
+RESPONSE_TOKENS_PER_DOC = 300  # Expected completion size, reserved against the tokens-per-minute budget
+
+# Per-document content cap (Llama 3.1 8B has a large context, but the TPM budget is what binds)
+MAX_CONTENT_CHARS = 25000
+
+# Only what needs judgment; contact details come from content_facts
+LEAD_JSON_FIELDS = """
+            "company_name": "Official Brand/Company Name",
+            "industry": "Primary Industry (e.g. SaaS, Fintech, etc.)",
+            "description": "Short description of what they do",
+            "qualification_score": 0.0,
+            "qualification_reasoning": "Detailed reason for the score",
+            "employee_count": "e.g. 50-100",
+            "funding_info": "e.g. Series A",
+            "industry_tags": ["tag1", "tag2"],
+            "sentiment_score": 0.8"""
+
+# Sections extract_page_content appends after the page text ("<Header> Found on Page:\n<values>")
+FACT_SECTION_RE = re.compile(
+    r"^(Contact Emails|Possible Emails|Contact Phones|Possible Phones|Social Profiles|Company Metadata) Found on Page:"
+    r"\n(.+?)(?=\n\n|\Z)",
+    re.M | re.S,
+)
+
+
+def content_facts(content: str) -> Dict:
+    """
+    Contact fields read exactly from the deterministic sections of page content
+    (mailto/tel links, social anchors, schema.org/OpenGraph), never from the LLM.
+    Email and phone come from the linked "Contact" sections when there are any;
+    text matches ("Possible") are only used if they pass strict validation.
+    """
+    facts = {"email": None, "phone": None, "linkedin_url": None, "twitter_url": None,
+             "social_media_links": {}, "company_name": None, "description": None, "website": None}
+    first_line = content.split("\n", 1)[0]
+    if first_line.startswith("URL: "):
+        facts["website"] = first_line[5:].strip()
+
+    contacts = {}
+    for header, body in FACT_SECTION_RE.findall(content):
+        values = [v.strip() for v in body.strip().split(", ") if v.strip()]
+        if header in ("Contact Emails", "Contact Phones", "Possible Emails", "Possible Phones"):
+            contacts.setdefault(header, values)
+        elif header == "Social Profiles":
+            for url in values:
+                found = normalize_social(url)
+                if found:
+                    facts["social_media_links"].setdefault(found[0], found[1])
+        elif header == "Company Metadata":
+            for line in body.splitlines():
+                if line.startswith("Name: "):
+                    facts["company_name"] = line[6:].strip() or None
+                elif line.startswith("Description: "):
+                    facts["description"] = line[13:].strip() or None
+    emails = contacts.get("Contact Emails", []) + [e for e in contacts.get("Possible Emails", [])
+                                                   if normalize_email(e, strict=True)]
+    facts["email"] = emails[0] if emails else None
+    phones = contacts.get("Contact Phones", []) + [p for p in contacts.get("Possible Phones", [])
+                                                   if normalize_phone(p, strict=True)]
+    facts["phone"] = phones[0] if phones else None
+    facts["linkedin_url"] = facts["social_media_links"].get("linkedin")
+    facts["twitter_url"] = facts["social_media_links"].get("twitter")
+    return facts
+
+
+def _lead_from_data(data: Dict, query: SearchQuery, content: str) -> Lead:
+    facts = content_facts(content)
+    company = data.get('company_name') or facts['company_name']
+    return Lead(
+        name=company or 'Unknown',
+        company=company,
+        website=facts['website'],
+        industry=data.get('industry') or query.industry,
+        email=facts['email'],
+        phone=facts['phone'],
+        linkedin_url=facts['linkedin_url'],
+        twitter_url=facts['twitter_url'],
+        description=data.get('description') or facts['description'],
+        qualification_score=float(data.get('qualification_score') or 0.0),
+        qualification_reasoning=data.get('qualification_reasoning'),
+        status="new",
+        source="AI Extraction",
+        employee_count=data.get('employee_count'),
+        funding_info=data.get('funding_info'),
+        industry_tags=data.get('industry_tags') or [],
+        sentiment_score=float(data.get('sentiment_score') or 0.0),
+        social_media_links=facts['social_media_links']
+    )
+
 
 class AIService:
-    def __init__(self):
-        if not GROQ_API_KEY:
-            raise ValueError("GROQ_API_KEY must be set in .env")
-        self.client = Groq(api_key=GROQ_API_KEY)
-        self.model = 'llama-3.1-8b-instant' # More efficient for high-volume extraction
+    def __init__(self, providers: Optional[List[LLMProvider]] = None):
+        # Groq llama-3.1-8b-instant first by default (efficient for high-volume extraction), Gemini as backup
+        self.router = LLMRouter(providers if providers is not None else build_providers())
+        self.model = self.router.cache_tag
+        self.response_cache = DiskCache("llm_responses", ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES)
+        self.ledger = get_llm_ledger()
+        self.run_id = None  # Set by the caller so the ledger can aggregate per run
+        self.run_stats = {"distilled": 0, "content_tokens": 0, "prompt_content_tokens": 0, "llm_cache_hits": 0,
+                          "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "llm_hedges_lost": 0}
+        self._stats_lock = threading.Lock()
+
+    def prepare_content(self, content: str, query: SearchQuery) -> str:
+        """
+        Distills page content down to the parts worth sending (see content_distiller)
+        and caps its length. Logs what each lead's prompt saved.
+        """
+        if DISTILL_ENABLED:
+            result = distill(content, keywords=[query.industry, query.location or "", *query.keywords])
+            if result.tokens_after < result.tokens_before:
+                url = next((line[5:] for line in content.splitlines() if line.startswith("URL: ")), "page")
+                log_event(f"   ✂️ Distilled {url}: {result.tokens_before} → {result.tokens_after} tokens "
+                          f"(-{result.saved_ratio:.0%})")
+            self._bump(distilled=1, content_tokens=result.tokens_before, prompt_content_tokens=result.tokens_after)
+            content = result.text
+        return content[:MAX_CONTENT_CHARS]
+
+    def _bump(self, **counts: int):
+        with self._stats_lock:
+            for name, n in counts.items():
+                self.run_stats[name] += n
+
+    def _lead_key(self, safe_content: str, query: SearchQuery) -> str:
+        return cache_key("lead", LEAD_PROMPT_VERSION, self.model, safe_content,
+                         query.industry, query.location, query.keywords)
+
+    def _cached_lead(self, safe_content: str, query: SearchQuery) -> Optional[Lead]:
+        data = self.response_cache.get(self._lead_key(safe_content, query))
+        if data is None:
+            return None
+        self._bump(llm_cache_hits=1)
+        return _lead_from_data(data, query, safe_content)
 
     def analyze_lead(self, content: str, query: SearchQuery) -> Lead:
         """
-        Analyzes page content using Groq (Llama 3) to extract lead info.
+        Analyzes page content with the routed LLM providers to extract lead info.
+        Identical content under the same query is answered from the response cache.
         """
-        # Truncate content slightly to fit context if needed, though Llama 3 is generous (8192)
-        safe_content = content[:25000]
+        safe_content = self.prepare_content(content, query)
+        return self._cached_lead(safe_content, query) or self._analyze_prepared(safe_content, query)
 
-        prompt = f"""
+    def _store_lead(self, data: Dict, safe_content: str, query: SearchQuery) -> Lead:
+        lead = _lead_from_data(data, query, safe_content)
+        self.response_cache.set(self._lead_key(safe_content, query), data)
+        return lead
+
+    def _create(self, prompt: str, operation: str, attempt: int = 0, documents: int = 1,
+                response_tokens: Optional[int] = None) -> Dict:
+        """
+        One JSON-mode completion, parsed, from whichever provider the router
+        picks (hedged / failed over as needed). Every request, failed or not,
+        is written to the LLM ledger.
+        """
+        tokens = estimate_tokens(prompt) + (response_tokens or RESPONSE_TOKENS_PER_DOC * documents)
+        return self.router.complete(prompt, tokens, observer=self._observer(operation, attempt, documents)).data
+
+    async def _create_async(self, prompt: str, operation: str, attempt: int = 0, documents: int = 1,
+                            response_tokens: Optional[int] = None) -> Dict:
+        tokens = estimate_tokens(prompt) + (response_tokens or RESPONSE_TOKENS_PER_DOC * documents)
+        completion = await self.router.complete_async(prompt, tokens, observer=self._observer(operation, attempt, documents))
+        return completion.data
+
+    def _observer(self, operation: str, attempt: int, documents: int):
+        def record(provider: LLMProvider, latency: float, outcome: str,
+                   prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+            self._bump(llm_calls=1, prompt_tokens=prompt_tokens or 0, completion_tokens=completion_tokens or 0,
+                       llm_hedges_lost=int(outcome in (OUTCOME_HEDGE_LOST, OUTCOME_CANCELLED)))
+            try:
+                self.ledger.record(operation, provider.model, latency, outcome, prompt_tokens=prompt_tokens,
+                                   completion_tokens=completion_tokens, documents=documents, attempt=attempt,
+                                   run_id=self.run_id)
+            except Exception as e:
+                log_event(f"⚠️ Could not write LLM ledger entry: {e}", "WARNING")
+        return record
+
+    def _lead_prompt(self, safe_content: str, query: SearchQuery) -> str:
+        return f"""
         You are an expert Lead Generation Analyst. Analyze the text below and extract structured data.
         
         SEARCH CONTEXT:
@@ -30,91 +201,220 @@ class AIService:
         - Keywords: {', '.join(query.keywords)}
 
         TASK:
-        Extract company info, contact details, funding, size, sentiment, and score the lead (0-10).
+        Extract company info, funding, size, sentiment, and score the lead (0-10).
+        Contact details are extracted separately; do not return them.
         
         SCORING:
         +3 Exact match, +2 Keywords present, +2 Contact info found, +1 Location match.
 
         RETURN JSON ONLY:
-        {{
-            "company_name": "Official Brand/Company Name",
-            "industry": "Primary Industry (e.g. SaaS, Fintech, etc.)",
-            "website": "URL",
-            "email": "email or null",
-            "phone": "phone or null",
-            "linkedin_url": "url or null",
-            "twitter_url": "url or null",
-            "description": "Short description of what they do",
-            "qualification_score": 0.0,
-            "qualification_reasoning": "Detailed reason for the score",
-            "employee_count": "e.g. 50-100",
-            "funding_info": "e.g. Series A",
-            "industry_tags": ["tag1", "tag2"],
-            "sentiment_score": 0.8,
-            "social_media_links": {{}}
+        {{{LEAD_JSON_FIELDS}
         }}
 
         CONTENT:
         {safe_content}
         """
-        
+
+    def _analyze_prepared(self, safe_content: str, query: SearchQuery) -> Lead:
+        prompt = self._lead_prompt(safe_content, query)
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                chat_completion = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt,
-                        }
-                    ],
-                    model=self.model,
-                    response_format={"type": "json_object"}, # Groq supports JSON mode!
-                )
-                
-                response_text = chat_completion.choices[0].message.content
-                data = json.loads(response_text)
-                
-                return Lead(
-                    name=data.get('company_name') or 'Unknown',
-                    company=data.get('company_name'),
-                    website=data.get('website'),
-                    industry=data.get('industry') or query.industry,
-                    email=data.get('email'),
-                    phone=data.get('phone'),
-                    linkedin_url=data.get('linkedin_url'),
-                    twitter_url=data.get('twitter_url'),
-                    description=data.get('description'),
-                    qualification_score=float(data.get('qualification_score') or 0.0),
-                    qualification_reasoning=data.get('qualification_reasoning'),
-                    status="new",
-                    source="AI Extraction",
-                    employee_count=data.get('employee_count'),
-                    funding_info=data.get('funding_info'),
-                    industry_tags=data.get('industry_tags') or [],
-                    sentiment_score=float(data.get('sentiment_score') or 0.0),
-                    social_media_links=data.get('social_media_links') or {}
-                )
+                data = self._create(prompt, "analyze", attempt)
+                return self._store_lead(data, safe_content, query)
 
             except Exception as e:
-                # Rate limit handling (Groq uses 429 too)
-                if "429" in str(e):
+                # Rate limit handling: the provider's limiter already holds every caller back for Retry-After
+                if is_rate_limited(e):
                     if attempt < max_retries - 1:
-                        sleep_time = (attempt + 1) * 5 # Groq recovers faster usually
-                        log_event(f"⚠️ Groq Rate Limit. Sleeping {sleep_time}s...", "WARNING")
-                        time.sleep(sleep_time)
+                        log_event("⚠️ LLM Rate Limit. Retrying once the providers allow...", "WARNING")
                         continue
-                log_event(f"Error analyzing lead (Groq): {e}", "ERROR")
+                log_event(f"Error analyzing lead (LLM): {e}", "ERROR")
                 if attempt == max_retries - 1:
                      return None # Return None instead of dummy Lead
 
         return None
 
+    def analyze_leads_batch(self, contents: List[str], query: SearchQuery,
+                            token_budget: int = AI_BATCH_TOKEN_BUDGET,
+                            max_docs: int = AI_BATCH_MAX_DOCS) -> List[Optional[Lead]]:
+        """
+        Analyzes several pages with as few LLM requests as possible. Documents are
+        distilled, looked up in the response cache, and the rest packed into
+        requests of up to `max_docs` within `token_budget` (estimated), sharing
+        one copy of the instructions and schema. Returns one Lead (or None) per
+        input, in order. Documents the batch answer misses or garbles are
+        retried one at a time.
+        """
+        contents, results, packs = self._plan_batch(contents, query, token_budget, max_docs)
+        for pack in packs:
+            answered = self._analyze_pack({f"doc-{i}": contents[i] for i in pack}, query) if len(pack) > 1 else {}
+            for i in pack:
+                lead = answered.get(f"doc-{i}")
+                if lead is None:
+                    if len(pack) > 1:
+                        log_event(f"   Batch answer missing doc-{i}, analyzing it on its own", "WARNING")
+                    lead = self._analyze_prepared(contents[i], query)
+                results[i] = lead
+        return results
+
+    async def analyze_leads_batch_async(self, contents: List[str], query: SearchQuery,
+                                        token_budget: int = AI_BATCH_TOKEN_BUDGET,
+                                        max_docs: int = AI_BATCH_MAX_DOCS) -> List[Optional[Lead]]:
+        """
+        analyze_leads_batch with async requests: every pack (and every per-document
+        retry) is in flight at once, as far as the adaptive limiter allows.
+        """
+        contents, results, packs = await asyncio.to_thread(self._plan_batch, contents, query, token_budget, max_docs)
+
+        async def run_pack(pack: List[int]):
+            if len(pack) > 1:
+                answered = await self._analyze_pack_async({f"doc-{i}": contents[i] for i in pack}, query)
+                for i in pack:
+                    results[i] = answered.get(f"doc-{i}")
+            missing = [i for i in pack if results[i] is None]
+            if len(pack) > 1 and missing:
+                log_event(f"   Batch answer missing {len(missing)} doc(s), analyzing them on their own", "WARNING")
+            leads = await asyncio.gather(*(self._analyze_prepared_async(contents[i], query) for i in missing))
+            for i, lead in zip(missing, leads):
+                results[i] = lead
+
+        await asyncio.gather(*(run_pack(pack) for pack in packs))
+        return results
+
+    def _plan_batch(self, contents: List[str], query: SearchQuery, token_budget: int,
+                    max_docs: int) -> Tuple[List[str], List[Optional[Lead]], List[List[int]]]:
+        """(prepared contents, cached leads or None, packs of indexes still to analyze)"""
+        contents = [self.prepare_content(content, query) for content in contents]
+        results: List[Optional[Lead]] = [self._cached_lead(content, query) for content in contents]
+        overhead = estimate_tokens(self._batch_prompt({}, query))
+
+        pack, pack_tokens = [], overhead
+        packs = []
+        for i, content in enumerate(contents):
+            if results[i] is not None:
+                continue
+            tokens = estimate_tokens(content) + 20  # + document tags
+            if pack and (len(pack) >= max_docs or pack_tokens + tokens > token_budget):
+                packs.append(pack)
+                pack, pack_tokens = [], overhead
+            pack.append(i)
+            pack_tokens += tokens
+        if pack:
+            packs.append(pack)
+        return contents, results, packs
+
+    def _batch_prompt(self, documents: Dict[str, str], query: SearchQuery) -> str:
+        docs = "\n".join(
+            f'<document id="{doc_id}">\n{content[:MAX_CONTENT_CHARS]}\n</document>'
+            for doc_id, content in documents.items()
+        )
+        return f"""
+        You are an expert Lead Generation Analyst. Below are {len(documents)} documents, each the text of
+        one company website, wrapped in <document id="..."> tags. Analyze EACH document independently
+        and extract structured data.
+        
+        SEARCH CONTEXT:
+        - Industry: {query.industry}
+        - Location: {query.location}
+        - Keywords: {', '.join(query.keywords)}
+
+        TASK:
+        Extract company info, funding, size, sentiment, and score the lead (0-10).
+        Contact details are extracted separately; do not return them.
+        
+        SCORING:
+        +3 Exact match, +2 Keywords present, +2 Contact info found, +1 Location match.
+
+        RETURN JSON ONLY, with exactly one entry per document, "id" copied from its tag:
+        {{
+            "leads": [
+                {{
+            "id": "document id",{LEAD_JSON_FIELDS}
+                }}
+            ]
+        }}
+
+        DOCUMENTS:
+        {docs}
+        """
+
+    def _analyze_pack(self, documents: Dict[str, str], query: SearchQuery) -> Dict[str, Lead]:
+        """One request for several documents; returns the leads it could parse, by document id."""
+        prompt = self._batch_prompt(documents, query)
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                data = self._create(prompt, "batch", attempt, documents=len(documents))
+                break
+            except Exception as e:
+                if is_rate_limited(e) and attempt < max_retries - 1:
+                    log_event("⚠️ LLM Rate Limit. Retrying once the providers allow...", "WARNING")
+                    continue
+                # Anything else (bad JSON, oversized request): let the caller go per document
+                log_event(f"Error analyzing batch of {len(documents)} (LLM): {e}", "ERROR")
+                return {}
+        else:
+            return {}
+        return self._parse_pack(data, documents, query)
+
+    async def _analyze_pack_async(self, documents: Dict[str, str], query: SearchQuery) -> Dict[str, Lead]:
+        prompt = self._batch_prompt(documents, query)
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                data = await self._create_async(prompt, "batch", attempt, documents=len(documents))
+                return self._parse_pack(data, documents, query)
+            except Exception as e:
+                if is_rate_limited(e) and attempt < max_retries - 1:
+                    # The limiter already holds every caller back for Retry-After
+                    log_event(f"⚠️ LLM Rate Limit on batch of {len(documents)}, retrying...", "WARNING")
+                    continue
+                log_event(f"Error analyzing batch of {len(documents)} (LLM): {e}", "ERROR")
+                return {}
+        return {}
+
+    async def _analyze_prepared_async(self, safe_content: str, query: SearchQuery) -> Optional[Lead]:
+        prompt = self._lead_prompt(safe_content, query)
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                data = await self._create_async(prompt, "analyze", attempt)
+                return self._store_lead(data, safe_content, query)
+            except Exception as e:
+                if is_rate_limited(e) and attempt < max_retries - 1:
+                    log_event("⚠️ LLM Rate Limit, retrying once the limiter allows...", "WARNING")
+                    continue
+                log_event(f"Error analyzing lead (LLM): {e}", "ERROR")
+        return None
+
+    def _parse_pack(self, data, documents: Dict[str, str], query: SearchQuery) -> Dict[str, Lead]:
+        leads = {}
+        entries = data.get('leads') if isinstance(data, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            doc_id = entry.get('id') if isinstance(entry, dict) else None
+            if doc_id not in documents or doc_id in leads:
+                continue
+            try:
+                leads[doc_id] = _lead_from_data(entry, query, documents[doc_id])
+                cached = {k: v for k, v in entry.items() if k != 'id'}
+                self.response_cache.set(self._lead_key(documents[doc_id], query), cached)
+            except Exception as e:
+                log_event(f"   Could not parse batch entry {doc_id}: {e}", "WARNING")
+        return leads
+
     def brainstorm_leads(self, query: SearchQuery) -> List[Dict]:
         """
         Uses AI to brainstorm real companies that fit the search criteria
-        if the Google Search API is unavailable.
+        if the Google Search API is unavailable. Answers are cached per query.
         """
+        key = cache_key("brainstorm", BRAINSTORM_PROMPT_VERSION, self.model, query.industry, query.location,
+                        query.target_persona, query.keywords)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            self._bump(llm_cache_hits=1)
+            return cached
+
         prompt = f"""
         You are an expert Lead Generation Specialist. Brainstorm a list of 10 REAL companies that fit these criteria:
         
@@ -147,21 +447,16 @@ class AIService:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                chat_completion = self.client.chat.completions.create(
-                    messages=[{"role": "user", "content": prompt}],
-                    model=self.model,
-                    response_format={"type": "json_object"},
-                )
-                response_text = chat_completion.choices[0].message.content
-                data = json.loads(response_text)
-                return data.get('leads', [])
+                data = self._create(prompt, "brainstorm", attempt, response_tokens=1000)
+                leads = data.get('leads', [])
+                if leads:
+                    self.response_cache.set(key, leads)
+                return leads
             except Exception as e:
                 # Retry on rate limit (429) or JSON failure (400)
-                if "429" in str(e) or "400" in str(e):
+                if is_rate_limited(e) or "400" in str(e):
                     if attempt < max_retries - 1:
-                        sleep_time = (attempt + 1) * 2
                         log_event(f"⚠️ Brainstorming attempt {attempt+1} failed ({e}). Retrying...", "WARNING")
-                        time.sleep(sleep_time)
                         continue
                 log_event(f"Error brainstorming leads: {e}", "ERROR")
                 break
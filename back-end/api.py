@@ -21,8 +21,13 @@ from ai_service import AIService
 from search_service import SearchService
 from linkedin_service import LinkedInService
 from models import Lead, SearchQuery
-from main import LeadGenAgent
+from job_queue import JobQueue
+from disk_cache import cache_stats
+from llm_telemetry import get_llm_ledger
+from quota_manager import PRIORITY_LOW
 from logger_util import log_event
+from url_utils import domain_key
+from config import EMBEDDED_WORKERS
 
 app = FastAPI(title="Lead Generation API")
 
@@ -43,6 +48,14 @@ async def startup_event():
         print(f"Startup logging failed: {e}")
     
     log_event("--- API STARTUP ---")
+
+    # Run the worker pool as a child process of the API so it shares the job queue file
+    if EMBEDDED_WORKERS > 0:
+        import multiprocessing
+        import worker
+        proc = multiprocessing.Process(target=worker.main, args=(EMBEDDED_WORKERS,), daemon=True)
+        proc.start()
+        log_event(f"Embedded worker process started (pid {proc.pid})")
     
     print(f"Working Directory: {os.getcwd()}")
     print(f"PLAYWRIGHT_BROWSERS_PATH: {os.getenv('PLAYWRIGHT_BROWSERS_PATH')}")
@@ -105,6 +118,7 @@ async def get_log_content(filename: str):
         return {"content": f"Error reading log: {str(e)}"}
 
 db = DatabaseService()
+job_queue = JobQueue()
 search_service = SearchService()
 linkedin_service = LinkedInService()
 
@@ -203,7 +217,14 @@ def create_lead(lead: LeadCreate):
             status=lead.status
         )
         saved = db.save_lead(new_lead)
+        if not saved:
+            # save_lead ignores leads whose domain is already stored (and swallows DB errors)
+            if new_lead.domain_key and db.get_lead_by_website(new_lead.website):
+                raise HTTPException(status_code=409, detail=f"A lead for {new_lead.domain_key} already exists")
+            raise HTTPException(status_code=500, detail="Could not save lead")
         return {"message": "Lead created successfully", "lead": saved}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -218,6 +239,8 @@ def update_lead(lead_id: str, lead: LeadUpdate):
         
         # Update only provided fields
         update_data = {k: v for k, v in lead.dict().items() if v is not None}
+        if 'website' in update_data:
+            update_data['domain_key'] = domain_key(update_data['website'])
         
         if update_data:
             response = db.supabase.table("leads").update(update_data).eq("id", lead_id).execute()
@@ -231,15 +254,13 @@ def update_lead(lead_id: str, lead: LeadUpdate):
 def delete_lead(lead_id: str):
     """Delete a lead"""
     try:
-        response = db.supabase.table("leads").delete().eq("id", lead_id).execute()
+        db.supabase.table("leads").delete().eq("id", lead_id).execute()
         return {"message": "Lead deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-from fastapi import BackgroundTasks
-
 @app.post("/run-agent")
-async def run_agent(request: AgentRunRequest, background_tasks: BackgroundTasks):
+async def run_agent(request: AgentRunRequest):
     log_event(f"API received run-agent request: {request.industry}")
     try:
         query = SearchQuery(
@@ -249,14 +270,31 @@ async def run_agent(request: AgentRunRequest, background_tasks: BackgroundTasks)
             keywords=request.keywords
         )
         
-        agent = LeadGenAgent()
-        # Add to background tasks so API returns immediately
-        background_tasks.add_task(agent.run, query)
+        # Queue the run for the worker pool (worker.py) so it never blocks the API process
+        job_id = job_queue.enqueue("run_agent", query.dict())
         
-        return {"message": "Agent started in background! Check back in a few minutes for new leads.", "query": request.dict()}
+        return {
+            "message": "Agent queued! Check back in a few minutes for new leads.",
+            "job_id": job_id,
+            "query": request.dict()
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/jobs")
+def list_jobs(limit: int = 50):
+    """List recent agent jobs, newest first"""
+    jobs = job_queue.list_jobs(limit=limit)
+    return {"jobs": jobs, "count": len(jobs)}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Get status and progress counters of an agent job"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.post("/submit-2fa")
 async def submit_2fa(request: TwoFactorRequest):
     """Save the 2FA code provided by the user"""
@@ -318,6 +356,24 @@ def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/quota")
+def get_quota():
+    """Today's Google CSE budget: used, reserved and remaining queries"""
+    return search_service.quota.status()
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters of the local response caches"""
+    return {"caches": cache_stats()}
+
+@app.get("/llm/usage")
+def get_llm_usage(group_by: str = "day", limit: int = 30, run_id: Optional[str] = None):
+    """LLM calls, tokens, latency percentiles and cost per day, run, operation or model"""
+    try:
+        return {"group_by": group_by, "usage": get_llm_ledger().aggregate(group_by, limit=limit, run_id=run_id)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/leads/{lead_id}/enrich-managers")
 async def enrich_lead_managers(lead_id: str):
     """Fetch manager details from LinkedIn for a specific lead"""
@@ -382,7 +438,8 @@ async def enrich_lead_managers(lead_id: str):
             
             # Use Google to find real names and LinkedIn URLs
             google_query = f'site:linkedin.com/in "Manager" at "{company}"'
-            discovery_results = search_service.search_leads(google_query, is_people_search=True)
+            # Low priority: refused once the daily CSE budget runs low, keeping quota for agent runs
+            discovery_results = search_service.search_leads(google_query, is_people_search=True, priority=PRIORITY_LOW)
             
             if discovery_results:
                 potential_managers = []
@@ -0,0 +1,73 @@
+"""
+Microbenchmark for contact extraction.
+
+    python benchmark_contacts.py                  # synthetic pages
+    python benchmark_contacts.py pages/ --repeat 20
+
+Compares the old per-page email scan (uncompiled regex over raw HTML plus
+substring junk filters) with contact_extractor.extract_contacts over the
+text and links html_text has already produced. Parsing is done up front and
+not timed, since extract_page_content parses every page anyway.
+"""
+import argparse
+import random
+import re
+import time
+from benchmark_html_text import load_corpus
+from contact_extractor import extract_contacts
+from html_text import parse_html
+
+
+def synthetic_corpus(pages: int = 50):
+    rng = random.Random(7)
+    words = "lead generation software company services team about contact clients growth".split()
+    corpus = []
+    for i in range(pages):
+        body = " ".join(rng.choice(words) for _ in range(3000))
+        corpus.append((f"synthetic-{i}", (
+            "<html><head><script>var sentry='a@sentry.io';</script></head><body>"
+            f"<nav><a href='/contact'>Contact</a></nav><p>{body}</p>"
+            f"<p>Reach us at sales{i}@acme{i}.com or +1 (555) 010-{i:04d}. Founded 2019.</p>"
+            f"<img src='logo@2x.png'><footer><a href='mailto:info@acme{i}.com'>Mail</a>"
+            f"<a href='https://www.linkedin.com/company/acme{i}/'>LinkedIn</a></footer></body></html>"
+        )))
+    return corpus
+
+
+def old_scan(html: str):
+    emails = set(re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', html))
+    emails = [e for e in emails if not any(x in e.lower() for x in ['.png', '.jpg', '.jpeg', '.gif', 'sentry', 'example', 'domain'])]
+    phone = re.search(r'(\+?\d{1,3}[\s-]?)?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{4}', html)
+    return emails, phone
+
+
+def run(corpus, repeat):
+    parsed = [(html, parse_html(html)) for _, html in corpus]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        old = [old_scan(html) for html, _ in parsed]
+    old_elapsed = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        new = [extract_contacts(page.text, page.layout_text, links=page.links) for _, page in parsed]
+    new_elapsed = (time.perf_counter() - start) / repeat
+
+    old_emails = sum(len(emails) for emails, _ in old)
+    new_emails = sum(len(c.emails) for c in new)
+    print(f"\n📊 {len(corpus)} pages, {repeat} repeat(s)\n")
+    print(f"{'extractor':<22}{'pages/s':>10}{'emails':>8}{'phones':>8}{'social':>8}")
+    print(f"{'old (raw HTML regex)':<22}{len(corpus) / old_elapsed:>10.1f}{old_emails:>8}"
+          f"{sum(1 for _, p in old if p):>8}{'-':>8}")
+    print(f"{'extract_contacts':<22}{len(corpus) / new_elapsed:>10.1f}{new_emails:>8}"
+          f"{sum(len(c.phones) for c in new):>8}{sum(len(u) for c in new for u in c.social.values()):>8}")
+    print(f"\n⚡ Speedup: {old_elapsed / new_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="HTML files or directories of saved pages (default: synthetic)")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    run(load_corpus(args.paths) if args.paths else synthetic_corpus(), args.repeat)
@@ -0,0 +1,92 @@
+"""
+Benchmarks the html_text backends on a corpus of saved pages.
+
+    python benchmark_html_text.py pages/                 # every *.html under pages/
+    python benchmark_html_text.py a.html b.html --repeat 5
+    python benchmark_html_text.py pages/ --fetch https://example.com https://acme.io
+
+For each backend, reports throughput (pages/s, MB/s) and parity against the
+bs4 reference: exact text matches, mean token overlap and link/layout-text matches.
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+from html_text import parse_html, available_backends, PAGE_DROP_TAGS
+
+
+def load_corpus(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith((".html", ".htm")))
+        else:
+            files.append(path)
+    corpus = []
+    for f in files:
+        with open(f, "r", encoding="utf-8", errors="replace") as fh:
+            corpus.append((f, fh.read()))
+    return corpus
+
+
+def fetch_corpus(urls, out_dir):
+    from http_client import get_session, read_html, HTTP_TIMEOUT
+
+    os.makedirs(out_dir, exist_ok=True)
+    for url in urls:
+        try:
+            html = read_html(get_session().get(url, timeout=HTTP_TIMEOUT, stream=True))
+        except Exception as e:
+            print(f"❌ {url}: {e}")
+            continue
+        name = (urlsplit(url).netloc + urlsplit(url).path).strip("/").replace("/", "_") or "index"
+        with open(os.path.join(out_dir, f"{name}.html"), "w", encoding="utf-8") as fh:
+            fh.write(html)
+        print(f"💾 Saved {url}")
+
+
+def token_overlap(a: str, b: str) -> float:
+    ta, tb = set(a.split()), set(b.split())
+    if not ta and not tb:
+        return 1.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def run(corpus, repeat):
+    total_mb = sum(len(html.encode("utf-8")) for _, html in corpus) / 1e6
+    reference = {name: parse_html(html, PAGE_DROP_TAGS, backend="bs4") for name, html in corpus}
+
+    print(f"\n📊 {len(corpus)} pages, {total_mb:.2f} MB, {repeat} repeat(s)\n")
+    print(f"{'backend':<12}{'pages/s':>10}{'MB/s':>9}{'speedup':>9}{'exact':>9}{'overlap':>9}{'links':>9}")
+    baseline = None
+    for backend in ["bs4"] + [b for b in available_backends() if b != "bs4"]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results = {name: parse_html(html, PAGE_DROP_TAGS, backend=backend) for name, html in corpus}
+        elapsed = (time.perf_counter() - start) / repeat
+        baseline = baseline or elapsed
+
+        exact = sum(results[n].text == reference[n].text for n in results)
+        overlap = sum(token_overlap(results[n].text, reference[n].text) for n in results) / len(results)
+        links = sum(results[n].links == reference[n].links and results[n].layout_text == reference[n].layout_text
+                    for n in results)
+        print(f"{backend:<12}{len(corpus) / elapsed:>10.1f}{total_mb / elapsed:>9.2f}{baseline / elapsed:>8.1f}x"
+              f"{exact / len(corpus):>9.1%}{overlap:>9.1%}{links / len(corpus):>9.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="HTML files or directories of saved pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fetch", nargs="*", default=[], help="download these URLs into the first path first")
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_corpus(args.fetch, args.paths[0])
+    corpus = load_corpus(args.paths)
+    if not corpus:
+        print("❌ No pages found")
+        sys.exit(1)
+    run(corpus, args.repeat)
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import time
+import uuid
+from typing import Optional, List, Dict
+from models import SearchQuery, Lead
+from sqlite_store import SQLiteStore
+from config import CHECKPOINT_DB_PATH, CHECKPOINT_TTL_HOURS
+
+# Per-result steps, in the order a result moves through a run
+STAGE_EXTRACTED = "extracted"
+STAGE_ANALYZED = "analyzed"
+STAGE_SAVED = "saved"
+
+
+def run_key(query: SearchQuery) -> str:
+    """Stable key for a query, so a re-submitted identical run finds its checkpoint."""
+    data = {
+        "industry": (query.industry or "").strip().lower(),
+        "location": (query.location or "").strip().lower(),
+        "target_persona": (query.target_persona or "").strip().lower(),
+        "keywords": sorted(k.strip().lower() for k in query.keywords),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CheckpointStore(SQLiteStore):
+    """
+    Local record of how far each agent run got: CSE pages fetched, page
+    content extracted, leads analyzed and leads saved. Restarted or
+    re-submitted runs for the same query pick up from the last completed step.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            run_key TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'active',  -- active, complete
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_key_status ON runs(run_key, status);
+        CREATE TABLE IF NOT EXISTS search_pages (
+            run_id TEXT NOT NULL,
+            start_index INTEGER NOT NULL,
+            results TEXT NOT NULL,
+            PRIMARY KEY (run_id, start_index)
+        );
+        CREATE TABLE IF NOT EXISTS items (
+            run_id TEXT NOT NULL,
+            url TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            content TEXT,
+            lead TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (run_id, url)
+        );
+    """
+
+    def __init__(self, db_path: str = CHECKPOINT_DB_PATH, ttl_hours: float = CHECKPOINT_TTL_HOURS):
+        super().__init__(db_path)
+        self.ttl_seconds = ttl_hours * 3600
+
+    def open_run(self, query: SearchQuery) -> "RunCheckpoint":
+        """Resumes the unfinished run for this query if a fresh one exists, else starts a new one."""
+        key = run_key(query)
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT run_id FROM runs WHERE run_key = ? AND status = 'active' AND created_at > ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (key, now - self.ttl_seconds),
+        ).fetchone()
+        if row:
+            return RunCheckpoint(self, row["run_id"], resumed=True)
+
+        run_id = uuid.uuid4().hex
+        conn.execute(
+            "INSERT INTO runs (run_id, run_key, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (run_id, key, now, now),
+        )
+        self.prune()
+        return RunCheckpoint(self, run_id, resumed=False)
+
+    def prune(self):
+        """Drops checkpoints of runs that are finished or too old to resume."""
+        conn = self._conn()
+        cutoff = time.time() - self.ttl_seconds
+        dead = "SELECT run_id FROM runs WHERE status = 'complete' OR created_at < ?"
+        conn.execute(f"DELETE FROM search_pages WHERE run_id IN ({dead})", (cutoff,))
+        conn.execute(f"DELETE FROM items WHERE run_id IN ({dead})", (cutoff,))
+        conn.execute("DELETE FROM runs WHERE created_at < ?", (cutoff,))
+
+
+class RunCheckpoint:
+    """Checkpoint handle for a single run."""
+
+    def __init__(self, store: CheckpointStore, run_id: str, resumed: bool):
+        self.store = store
+        self.run_id = run_id
+        self.resumed = resumed
+
+    def _execute(self, sql: str, params: tuple):
+        conn = self.store._conn()
+        conn.execute(sql, params)
+        conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), self.run_id))
+
+    def search_page(self, start_index: int) -> Optional[List[Dict]]:
+        row = self.store._conn().execute(
+            "SELECT results FROM search_pages WHERE run_id = ? AND start_index = ?",
+            (self.run_id, start_index),
+        ).fetchone()
+        return json.loads(row["results"]) if row else None
+
+    def save_search_page(self, start_index: int, results: List[Dict]):
+        self._execute(
+            "INSERT OR REPLACE INTO search_pages (run_id, start_index, results) VALUES (?, ?, ?)",
+            (self.run_id, start_index, json.dumps(results)),
+        )
+
+    def item(self, url: str) -> Optional[Dict]:
+        """Returns {'stage', 'content', 'lead'} for a result already worked on in this run."""
+        row = self.store._conn().execute(
+            "SELECT stage, content, lead FROM items WHERE run_id = ? AND url = ?",
+            (self.run_id, url),
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "stage": row["stage"],
+            "content": row["content"],
+            "lead": Lead.parse_raw(row["lead"]) if row["lead"] else None,
+        }
+
+    def mark_extracted(self, url: str, content: str):
+        self._execute(
+            "INSERT OR REPLACE INTO items (run_id, url, stage, content, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (self.run_id, url, STAGE_EXTRACTED, content, time.time()),
+        )
+
+    def mark_analyzed(self, url: str, lead: Lead):
+        self._execute(
+            "UPDATE items SET stage = ?, lead = ?, updated_at = ? WHERE run_id = ? AND url = ?",
+            (STAGE_ANALYZED, lead.json(), time.time(), self.run_id, url),
+        )
+
+    def mark_saved(self, url: str):
+        self._execute(
+            "UPDATE items SET stage = ?, updated_at = ? WHERE run_id = ? AND url = ?",
+            (STAGE_SAVED, time.time(), self.run_id, url),
+        )
+
+    def complete(self):
+        self._execute("UPDATE runs SET status = 'complete' WHERE run_id = ?", (self.run_id,))
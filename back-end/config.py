@@ -21,3 +21,146 @@ BROWSER_HEADLESS = True
 
 # LinkedIn API
 LINKEDIN_ACCESS_TOKEN = os.getenv("LINKEDIN_ACCESS_TOKEN")
+
+# Agent Pipeline (concurrent fetch -> analyze -> persist stages)
+# Set AGENT_PIPELINE_MODE=serial to fall back to the original one-at-a-time loop.
+AGENT_PIPELINE_MODE = os.getenv("AGENT_PIPELINE_MODE", "concurrent")
+PIPELINE_FETCH_CONCURRENCY = int(os.getenv("PIPELINE_FETCH_CONCURRENCY", 32))
+PIPELINE_ANALYZE_CONCURRENCY = int(os.getenv("PIPELINE_ANALYZE_CONCURRENCY", 2))
+PIPELINE_PERSIST_CONCURRENCY = int(os.getenv("PIPELINE_PERSIST_CONCURRENCY", 2))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 16))
+
+# Local state (job queue, caches, ledgers). Keep on a persistent disk in production.
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+# Agent Job Queue / Worker Pool
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2.0))
+# A running job whose heartbeat is older than this is assumed dead and re-queued
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 300))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+# Worker threads the API runs in a child process. The queue is a SQLite file under DATA_DIR, so
+# workers must share the API's disk: set 0 only when `python worker.py` runs on the same machine/volume.
+EMBEDDED_WORKERS = int(os.getenv("EMBEDDED_WORKERS", WORKER_CONCURRENCY))
+
+# Agent Run Checkpoints (resume interrupted runs without re-spending CSE quota / Groq tokens)
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", os.path.join(DATA_DIR, "checkpoints.sqlite3"))
+# Unfinished runs older than this start over instead of resuming (search results go stale)
+CHECKPOINT_TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", 24))
+
+# Rate Limits (token buckets: sustained requests/second and burst size)
+RATE_LIMIT_GOOGLE_CSE_PER_SEC = float(os.getenv("RATE_LIMIT_GOOGLE_CSE_PER_SEC", 1.0))
+RATE_LIMIT_GOOGLE_CSE_BURST = int(os.getenv("RATE_LIMIT_GOOGLE_CSE_BURST", 3))
+RATE_LIMIT_GROQ_PER_SEC = float(os.getenv("RATE_LIMIT_GROQ_PER_SEC", 0.5))  # 30 requests/minute free tier
+RATE_LIMIT_GROQ_BURST = int(os.getenv("RATE_LIMIT_GROQ_BURST", 5))
+RATE_LIMIT_GEMINI_PER_SEC = float(os.getenv("RATE_LIMIT_GEMINI_PER_SEC", 0.25))  # 15 requests/minute free tier
+RATE_LIMIT_GEMINI_BURST = int(os.getenv("RATE_LIMIT_GEMINI_BURST", 3))
+RATE_LIMIT_LINKEDIN_PER_SEC = float(os.getenv("RATE_LIMIT_LINKEDIN_PER_SEC", 0.5))
+RATE_LIMIT_LINKEDIN_BURST = int(os.getenv("RATE_LIMIT_LINKEDIN_BURST", 1))
+# Applied separately to every website host we fetch from
+RATE_LIMIT_HTTP_PER_DOMAIN_PER_SEC = float(os.getenv("RATE_LIMIT_HTTP_PER_DOMAIN_PER_SEC", 1.0))
+RATE_LIMIT_HTTP_PER_DOMAIN_BURST = int(os.getenv("RATE_LIMIT_HTTP_PER_DOMAIN_BURST", 2))
+RATE_LIMIT_HTTP_MAX_HOSTS = int(os.getenv("RATE_LIMIT_HTTP_MAX_HOSTS", 4096))  # Least recently used host buckets are dropped
+
+# Crawl Scheduler (page extraction politeness)
+# Per-host pacing comes from RATE_LIMIT_HTTP_PER_DOMAIN_*; robots.txt Crawl-delay is honored on top.
+CRAWL_RESPECT_ROBOTS = os.getenv("CRAWL_RESPECT_ROBOTS", "true").lower() == "true"
+CRAWL_ROBOTS_TTL = int(os.getenv("CRAWL_ROBOTS_TTL", 86400))
+CRAWL_MAX_CRAWL_DELAY = float(os.getenv("CRAWL_MAX_CRAWL_DELAY", 10.0))  # Ignore absurd Crawl-delay values
+CRAWL_ROBOTS_CACHE_SIZE = int(os.getenv("CRAWL_ROBOTS_CACHE_SIZE", 2048))  # Hosts whose robots.txt / pacing are kept
+
+# Local Response Caches (one SQLite file, one namespace per cache)
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(DATA_DIR, "cache.sqlite3"))
+CSE_CACHE_TTL = int(os.getenv("CSE_CACHE_TTL", 86400))  # Seconds; results rarely change within a day
+CSE_CACHE_MAX_ENTRIES = int(os.getenv("CSE_CACHE_MAX_ENTRIES", 5000))
+
+# Google CSE Daily Quota Budget
+QUOTA_DB_PATH = os.getenv("QUOTA_DB_PATH", os.path.join(DATA_DIR, "quota.sqlite3"))
+CSE_DAILY_QUOTA = int(os.getenv("CSE_DAILY_QUOTA", 100))  # Free tier: 100 queries/day
+# Low-priority callers (e.g. manager discovery) are refused once remaining budget drops below this
+CSE_LOW_PRIORITY_RESERVE = int(os.getenv("CSE_LOW_PRIORITY_RESERVE", 20))
+
+# Shared HTTP Client (connection pooling / keep-alive)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 64))  # Distinct hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 16))  # Connections kept per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5.0))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 15.0))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", 0))  # Seconds; > 0 caches DNS for the whole process
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Streaming Page Fetch Limits
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", 1_000_000))  # Hard cap on HTML bytes read per page
+# Stop reading once the page holds this many times the text we keep (leaves room for nav/footer stripping)
+FETCH_TEXT_BUDGET_FACTOR = float(os.getenv("FETCH_TEXT_BUDGET_FACTOR", 3.0))
+
+# HTML Text Extraction
+# "auto" picks the fastest installed backend: selectolax > lxml > bs4 (reference)
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "auto")
+
+# Contact/Team/About Page Discovery
+DISCOVERY_TOP_K = int(os.getenv("DISCOVERY_TOP_K", 3))  # Subpages fetched per lead
+DISCOVERY_TIME_BUDGET = float(os.getenv("DISCOVERY_TIME_BUDGET", 8.0))  # Seconds per lead for sitemap + subpages
+DISCOVERY_PAGE_CHARS = int(os.getenv("DISCOVERY_PAGE_CHARS", 3000))  # Text kept per subpage
+DISCOVERY_USE_SITEMAP = os.getenv("DISCOVERY_USE_SITEMAP", "true").lower() == "true"
+DISCOVERY_SITEMAP_MAX_BYTES = int(os.getenv("DISCOVERY_SITEMAP_MAX_BYTES", 500_000))
+DISCOVERY_MAX_WORKERS = int(os.getenv("DISCOVERY_MAX_WORKERS", 32))  # Shared subpage fetch threads
+
+# Page Snapshots
+# "record": keep fetched pages; "replay": extract_page_content reads snapshots only (no network); "off"
+SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "off").lower()
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshots"))
+SNAPSHOT_DB_PATH = os.getenv("SNAPSHOT_DB_PATH", os.path.join(DATA_DIR, "snapshots.sqlite3"))
+SNAPSHOT_CODEC = os.getenv("SNAPSHOT_CODEC", "auto")  # "auto" (zstd if installed), "zstd" or "gzip"
+SNAPSHOT_MAX_AGE_DAYS = float(os.getenv("SNAPSHOT_MAX_AGE_DAYS", 30))  # Older snapshots are pruned; 0 keeps them
+SNAPSHOT_MAX_BYTES = int(os.getenv("SNAPSHOT_MAX_BYTES", 512 * 1024 * 1024))  # Compressed size cap; 0 disables
+SNAPSHOT_PRUNE_EVERY = int(os.getenv("SNAPSHOT_PRUNE_EVERY", 200))  # Recorded pages between prunes
+
+# Extracted Page Content Cache (per website URL, revalidated with ETag/Last-Modified once stale)
+EXTRACT_CACHE_TTL = int(os.getenv("EXTRACT_CACHE_TTL", 7 * 86400))  # 7 days
+EXTRACT_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACT_CACHE_MAX_ENTRIES", 5000))
+
+# Batched AI Analysis (several pages per LLM request)
+AI_BATCH_MAX_DOCS = int(os.getenv("AI_BATCH_MAX_DOCS", 4))
+AI_BATCH_TOKEN_BUDGET = int(os.getenv("AI_BATCH_TOKEN_BUDGET", 12000))  # Estimated prompt tokens per request
+AI_BATCH_LINGER = float(os.getenv("AI_BATCH_LINGER", 0.2))  # Seconds a batch waits for more pages to arrive
+
+# Async AI Analysis (async provider clients with a limiter driven by x-ratelimit-* headers)
+AI_ASYNC_ENABLED = os.getenv("AI_ASYNC_ENABLED", "true").lower() == "true"
+AI_MAX_IN_FLIGHT = int(os.getenv("AI_MAX_IN_FLIGHT", 16))  # Upper bound on concurrent requests per provider
+AI_INITIAL_IN_FLIGHT = int(os.getenv("AI_INITIAL_IN_FLIGHT", 4))  # Grows from here while headers show headroom
+
+# LLM Providers (routing by rolling latency / error rate, with hedged requests)
+# Comma-separated, in order of preference; providers without an API key are skipped. "mock" is local.
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", "groq,gemini")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+LLM_HEALTH_WINDOW = int(os.getenv("LLM_HEALTH_WINDOW", 50))  # Recent calls kept per provider
+LLM_MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", 0.5))  # Above this a provider is only a fallback
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_MIN_DEADLINE = float(os.getenv("LLM_HEDGE_MIN_DEADLINE", 1.0))  # Seconds; floor for the p95 deadline
+LLM_HEDGE_DEFAULT_DEADLINE = float(os.getenv("LLM_HEDGE_DEFAULT_DEADLINE", 10.0))  # Until a p95 is known
+MOCK_LLM_LATENCY = float(os.getenv("MOCK_LLM_LATENCY", 0.2))  # Median seconds per mock call
+MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", 0.0))
+
+# Lead Triage (local scoring that skips hopeless results before fetching / analysis)
+TRIAGE_ENABLED = os.getenv("TRIAGE_ENABLED", "true").lower() == "true"
+TRIAGE_RESULT_THRESHOLD = float(os.getenv("TRIAGE_RESULT_THRESHOLD", 0.0))  # On CSE title/snippet/URL
+TRIAGE_CONTENT_THRESHOLD = float(os.getenv("TRIAGE_CONTENT_THRESHOLD", 2.0))  # On extracted page text
+TRIAGE_EXTRA_BLOCKED_DOMAINS = os.getenv("TRIAGE_EXTRA_BLOCKED_DOMAINS", "")  # Comma-separated
+
+# LLM Telemetry (one ledger row per LLM request)
+LLM_LEDGER_DB_PATH = os.getenv("LLM_LEDGER_DB_PATH", os.path.join(DATA_DIR, "llm_ledger.sqlite3"))
+
+# LLM Response Cache (same prompt inputs -> cached LLM answer)
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 30 * 86400))  # 30 days
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 20000))
+
+# Content Distillation (shrinks page content before it's sent to the LLM)
+DISTILL_ENABLED = os.getenv("DISTILL_ENABLED", "true").lower() == "true"
+DISTILL_TOKEN_BUDGET = int(os.getenv("DISTILL_TOKEN_BUDGET", 1500))  # Estimated tokens of content per lead
+DISTILL_WINDOW = int(os.getenv("DISTILL_WINDOW", 1))  # Sentences kept on each side of a contact/keyword hit
+DISTILL_SHINGLE_WORDS = int(os.getenv("DISTILL_SHINGLE_WORDS", 8))  # Repeated runs this long are dropped
@@ -0,0 +1,180 @@
+"""
+Contact signals (emails, phones, social profiles) from text we have already
+parsed. One combined, precompiled pattern scans each text once; hrefs are
+classified by scheme/host without regex backtracking over the whole page.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+_EMAIL = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+_SOCIAL_HOSTS = r"(?:[\w-]+\.)?(?:linkedin\.com|twitter\.com|x\.com|facebook\.com|instagram\.com|youtube\.com|github\.com)"
+_SOCIAL_URL = rf"https?://{_SOCIAL_HOSTS}/[^\s\"'<>()]+"
+# +CC, optional (area), then up to 6 separated digit groups; or a national number: (area) or a
+# leading group, then separated groups ending in 3+ digits. Never starts inside a dotted/dashed number.
+_PHONE = (
+    r"(?<![\w+])(?<!\d[.-])"
+    r"(?:\+\d{1,3}(?:[\s.-]?\(\d{1,4}\))?[\s.-]?\d{1,14}(?:[\s.-]\d{1,8}){0,5}"
+    r"|(?:\(\d{1,5}\)[\s.-]?|\d{1,5}[\s.-])(?:\d{1,5}[\s.-]){0,3}\d{3,8})"
+    r"(?![\w@])"
+)
+
+# Order matters: emails and URLs win over the phone-looking digits inside them
+CONTACT_RE = re.compile(rf"(?P<email>{_EMAIL})|(?P<social>{_SOCIAL_URL})|(?P<phone>{_PHONE})")
+EMAIL_RE = re.compile(rf"^{_EMAIL}$")
+SOCIAL_HOST_RE = re.compile(rf"^{_SOCIAL_HOSTS}$", re.I)
+JUNK_EMAIL_RE = re.compile(
+    r"\.(?:png|jpe?g|gif|svg|webp)$|sentry|@(?:[\w-]+\.)*(?:example|domain|yourdomain)\.", re.I
+)
+SHARE_PATH_RE = re.compile(r"^/(?:sharer|share|intent|dialog|home|hashtag|search|watch)\b", re.I)
+YEAR_GROUPS_RE = re.compile(r"^(?:(?:19|20)\d\d[\s.-]*)+$")
+# Space-separated digits are only a phone number with a trunk prefix ("020 7946 0958")
+SPACED_NUMBERS_RE = re.compile(r"^[1-9][\d ]*$")
+DOTTED_THOUSANDS_RE = re.compile(r"^\d{1,3}(?:[.,]\d{3})+$")
+IPV4_RE = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}$")
+DATE_RE = re.compile(r"^(?:\d{1,2}[./-]\d{1,2}[./-](?:19|20)\d\d|(?:19|20)\d\d[./-]\d{1,2}[./-]\d{1,2})$")
+NOT_A_PHONE_RES = (YEAR_GROUPS_RE, SPACED_NUMBERS_RE, DOTTED_THOUSANDS_RE, IPV4_RE, DATE_RE)
+NON_DIGIT_RE = re.compile(r"\D")
+
+PLATFORMS = {
+    "linkedin.com": "linkedin",
+    "twitter.com": "twitter",
+    "x.com": "twitter",
+    "facebook.com": "facebook",
+    "instagram.com": "instagram",
+    "youtube.com": "youtube",
+    "github.com": "github",
+}
+
+
+@dataclass
+class ContactSignals:
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+    social: Dict[str, List[str]] = field(default_factory=dict)  # platform -> profile URLs
+    # The subset published as mailto:/tel: links or schema.org contact points, not just found in text
+    linked_emails: List[str] = field(default_factory=list)
+    linked_phones: List[str] = field(default_factory=list)
+
+    @property
+    def email(self) -> Optional[str]:
+        return (self.linked_emails or self.emails or [None])[0]
+
+    @property
+    def phone(self) -> Optional[str]:
+        return (self.linked_phones or self.phones or [None])[0]
+
+    def to_dict(self) -> Dict:
+        return {"emails": self.emails, "phones": self.phones, "social": self.social,
+                "linked_emails": self.linked_emails, "linked_phones": self.linked_phones}
+
+
+def normalize_email(raw: str, strict: bool = False) -> Optional[str]:
+    """`strict` also requires the whole value to be a well-formed address without empty dot labels."""
+    email = raw.strip().strip(".").lower()
+    if not email or JUNK_EMAIL_RE.search(email):
+        return None
+    if strict and (not EMAIL_RE.match(email) or ".." in email or ".@" in email or "@." in email):
+        return None
+    return email
+
+
+def normalize_phone(raw: str, strict: bool = True) -> Optional[Tuple[str, str]]:
+    """
+    Returns (dedupe key, display form) or None. `strict` (free-text matches)
+    also rejects runs of years, dates, dotted thousands, IPv4 addresses and
+    space-only digit groups without a 0 trunk prefix, which are nearly always
+    tables, counters or versions rather than phone numbers.
+    """
+    display = " ".join(raw.split())
+    digits = NON_DIGIT_RE.sub("", display)
+    if not 7 <= len(digits) <= 15:
+        return None
+    if strict and any(pattern.match(display) for pattern in NOT_A_PHONE_RES):
+        return None
+    return digits, display
+
+
+def normalize_social(url: str) -> Optional[Tuple[str, str]]:
+    """Returns (platform, canonical profile URL) or None for non-profile links."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if not SOCIAL_HOST_RE.match(host):
+        return None
+    base = next((d for d in PLATFORMS if host == d or host.endswith("." + d)), None)
+    path = parts.path.rstrip("/.,;:!")
+    if base is None or not path or SHARE_PATH_RE.match(path):
+        return None
+    return PLATFORMS[base], f"https://{base}{path}"
+
+
+class _Collector:
+    def __init__(self):
+        self.emails = {}
+        self.phones = {}
+        self.social = {}
+        self.linked_emails = set()
+        self.linked_phones = set()
+
+    def email(self, raw: str, linked: bool = False):
+        email = normalize_email(raw)
+        if email:
+            self.emails.setdefault(email, None)
+            if linked:
+                self.linked_emails.add(email)
+
+    def phone(self, raw: str, strict: bool = True, linked: bool = False):
+        phone = normalize_phone(raw, strict)
+        if phone:
+            self.phones.setdefault(phone[0], phone[1])
+            if linked:
+                self.linked_phones.add(phone[0])
+
+    def profile(self, url: str):
+        found = normalize_social(url)
+        if found:
+            self.social.setdefault(found[0], {}).setdefault(found[1], None)
+
+    def result(self) -> ContactSignals:
+        return ContactSignals(
+            emails=list(self.emails),
+            phones=list(self.phones.values()),
+            social={platform: list(urls) for platform, urls in self.social.items()},
+            linked_emails=[e for e in self.emails if e in self.linked_emails],
+            linked_phones=[display for key, display in self.phones.items() if key in self.linked_phones],
+        )
+
+
+def extract_contacts(*texts: str, links: Iterable[Tuple[str, str]] = ()) -> ContactSignals:
+    """
+    Emails, phones and social profile URLs from already-extracted `texts` and
+    (href, anchor text) `links`, normalized and deduped in first-seen order.
+    Addresses from mailto:/tel: links are also listed as linked_emails/phones.
+    """
+    found = _Collector()
+
+    for href, _ in links:
+        href = (href or "").strip()
+        scheme = href[:7].lower()
+        if scheme == "mailto:":
+            for address in unquote(href[7:].split("?", 1)[0]).split(","):
+                found.email(address, linked=True)
+        elif href[:4].lower() == "tel:":
+            found.phone(unquote(href[4:]), strict=False, linked=True)
+        elif scheme.startswith("http"):
+            found.profile(href)
+
+    for text in texts:
+        if not text:
+            continue
+        for match in CONTACT_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == "email":
+                found.email(match.group())
+            elif kind == "social":
+                found.profile(match.group())
+            else:
+                found.phone(match.group())
+
+    return found.result()
@@ -0,0 +1,200 @@
+"""
+Shrinks extract_page_content output before it reaches the LLM: drops
+repeated text (menus and footers repeated across subpages) and boilerplate,
+keeps the sentences around contact signals and query keywords, and trims the
+rest to a token budget. The deterministic sections (URL, emails, phones,
+social profiles) are always kept verbatim.
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Set, Tuple
+from contact_extractor import CONTACT_RE
+from config import DISTILL_TOKEN_BUDGET, DISTILL_WINDOW, DISTILL_SHINGLE_WORDS
+
+# Lines extract_page_content (or the pipeline's snippet fallback) starts sections with
+VERBATIM_LINE_RE = re.compile(r"^(?:URL|Title|Snippet): ")
+VERBATIM_HEADER_RE = re.compile(r"^\w[\w ]* Found on Page:$")
+TEXT_HEADER_RE = re.compile(r"^\w[\w ]* Page Content(?: \([^)]*\))?:$")
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+TOKEN_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]")
+BOILERPLATE_RE = re.compile(
+    r"cookie|all rights reserved|©|privacy policy|terms (?:of|and) (?:use|service)|subscribe|newsletter"
+    r"|sign (?:in|up)|log ?in\b|enable javascript|skip to (?:main )?content|accept all|back to top",
+    re.I,
+)
+SIGNAL_TERMS_RE = re.compile(
+    r"\b(?:contact|e-?mail|phone|call us|address|headquarter|office|ceo|cto|founder|co-founder|president"
+    r"|director|leadership|team|employees|staff|founded|funding|raised|series [a-e]|investors?|customers|clients)\b",
+    re.I,
+)
+MAX_SENTENCE_WORDS = 40  # Unpunctuated runs (menus, lists) are cut into chunks this long
+GAP = "…"  # Marks dropped sentences between kept ones
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local BPE-ish token estimate: ~6 letters per token for words, ~3 digits per
+    token for numbers, one per punctuation mark. Close enough for budgeting.
+    """
+    tokens = 0
+    for piece in TOKEN_PIECE_RE.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 6)
+        else:
+            tokens += 1
+    return tokens
+
+
+@dataclass
+class DistilledContent:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def saved_ratio(self) -> float:
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+
+def _sentences(text: str) -> List[str]:
+    out = []
+    for sentence in SENTENCE_SPLIT_RE.split(text):
+        words = sentence.split()
+        for i in range(0, len(words), MAX_SENTENCE_WORDS):
+            out.append(" ".join(words[i:i + MAX_SENTENCE_WORDS]))
+    return [s for s in out if s]
+
+
+def _strip_repeats(sentence: str, seen_shingles: Set[int], seen_short: Set[str]) -> str:
+    """Removes runs already seen earlier in the document (shingles of DISTILL_SHINGLE_WORDS words)."""
+    words = sentence.split()
+    k = DISTILL_SHINGLE_WORDS
+    if len(words) < k:
+        key = sentence.lower()
+        if key in seen_short:
+            return ""
+        seen_short.add(key)
+        return sentence
+
+    covered = [False] * len(words)
+    shingles = [hash(" ".join(words[i:i + k]).lower()) for i in range(len(words) - k + 1)]
+    for i, shingle in enumerate(shingles):
+        if shingle in seen_shingles:
+            for j in range(i, i + k):
+                covered[j] = True
+    seen_shingles.update(shingles)
+    kept = [w for w, c in zip(words, covered) if not c]
+    return " ".join(kept) if len(kept) >= 3 else ""
+
+
+def _looks_like_menu(sentence: str) -> bool:
+    """Unpunctuated runs of mostly Capitalized words: navigation, not prose."""
+    words = sentence.split()
+    if len(words) < 5 or sentence.rstrip()[-1:] in ".!?":
+        return False
+    return sum(w[:1].isupper() for w in words) >= 0.7 * len(words)
+
+
+def _keyword_re(keywords: Iterable[str]):
+    terms = sorted({k.strip().lower() for k in keywords if k and len(k.strip()) >= 3}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")", re.I)
+
+
+def _parse_sections(content: str) -> List[Tuple[str, str, bool]]:
+    """[(header, body, is_text)]: text sections get distilled, others are kept as they are."""
+    sections = []
+    header, body, is_text = None, [], False
+    for line in content.splitlines():
+        if VERBATIM_LINE_RE.match(line):
+            if header is not None or body:
+                sections.append((header, "\n".join(body), is_text))
+            sections.append((line, "", False))
+            header, body, is_text = None, [], False
+        elif VERBATIM_HEADER_RE.match(line) or TEXT_HEADER_RE.match(line):
+            if header is not None or body:
+                sections.append((header, "\n".join(body), is_text))
+            header, body, is_text = line, [], bool(TEXT_HEADER_RE.match(line))
+        elif line.strip():
+            body.append(line)
+    if header is not None or body:
+        sections.append((header, "\n".join(body), is_text))
+    return sections
+
+
+def distill(content: str, keywords: Iterable[str] = (), token_budget: int = DISTILL_TOKEN_BUDGET,
+            window: int = DISTILL_WINDOW) -> DistilledContent:
+    """
+    Distills one extract_page_content document. Sentences are ranked
+    (contact/keyword hits > their neighbors and section openings > the rest)
+    and kept in document order until the token budget is used up.
+    """
+    tokens_before = estimate_tokens(content)
+    sections = _parse_sections(content)
+    if not any(is_text for _, _, is_text in sections):
+        return DistilledContent(text=content, tokens_before=tokens_before, tokens_after=tokens_before)
+    keyword_re = _keyword_re(keywords)
+    seen_shingles, seen_short = set(), set()
+
+    # (section index, sentence index, priority, sentence, tokens)
+    candidates = []
+    fixed_tokens = 0
+    for si, (header, body, is_text) in enumerate(sections):
+        fixed_tokens += estimate_tokens(header or "")
+        if not is_text:
+            fixed_tokens += estimate_tokens(body)
+            continue
+        sentences = []
+        for sentence in _sentences(body):
+            if CONTACT_RE.search(sentence):
+                hit = True  # An actual email/phone/profile: always worth keeping
+            elif _looks_like_menu(sentence):
+                continue
+            else:
+                hit = bool(SIGNAL_TERMS_RE.search(sentence) or (keyword_re and keyword_re.search(sentence)))
+                if not hit and BOILERPLATE_RE.search(sentence):
+                    continue
+            sentence = _strip_repeats(sentence, seen_shingles, seen_short)
+            if sentence:
+                sentences.append((sentence, hit))
+
+        hits = {i for i, (_, hit) in enumerate(sentences) if hit}
+        near = {j for i in hits for j in range(i - window, i + window + 1)}
+        for i, (sentence, hit) in enumerate(sentences):
+            priority = 3 if hit else 2 if (i in near or i < 2) else 1
+            candidates.append((si, i, priority, sentence, estimate_tokens(sentence)))
+
+    budget = token_budget - fixed_tokens
+    chosen = set()
+    for si, i, _, _, tokens in sorted(candidates, key=lambda c: (-c[2], c[0], c[1])):
+        if tokens <= budget:
+            chosen.add((si, i))
+            budget -= tokens
+
+    parts = []
+    for si, (header, body, is_text) in enumerate(sections):
+        if header and not is_text:
+            parts.append(f"{header}\n{body}" if body else header)
+            continue
+        if not is_text:
+            parts.append(body)
+            continue
+        kept, last = [], -1
+        for csi, i, _, sentence, _ in candidates:
+            if csi != si or (si, i) not in chosen:
+                continue
+            if kept and i != last + 1:
+                kept.append(GAP)
+            kept.append(sentence)
+            last = i
+        text = " ".join(kept)
+        if text:
+            parts.append(f"{header}\n{text}" if header else text)
+
+    distilled = "\n\n".join(parts)
+    return DistilledContent(text=distilled, tokens_before=tokens_before, tokens_after=estimate_tokens(distilled))
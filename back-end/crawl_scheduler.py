@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from typing import List, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+import requests
+from rate_limiter import acquire, domain_bucket_name
+from http_client import get_session
+from config import (
+    CRAWL_RESPECT_ROBOTS,
+    CRAWL_ROBOTS_TTL,
+    CRAWL_MAX_CRAWL_DELAY,
+    CRAWL_ROBOTS_CACHE_SIZE,
+)
+
+
+class DisallowedByRobots(Exception):
+    pass
+
+
+class _HostState:
+    """Per-host serialization lock, time of the last request and number of callers holding it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last = 0.0
+        self.users = 0
+
+
+class CrawlScheduler:
+    """
+    Politeness layer for website fetches. Any number of hosts can be crawled
+    concurrently, but requests to the same host are serialized and paced by
+    the host's rate-limit bucket plus its robots.txt Crawl-delay. robots.txt
+    is fetched once per host and cached for CRAWL_ROBOTS_TTL seconds. Both the
+    robots cache and the per-host state keep at most `cache_size` hosts.
+    """
+
+    def __init__(self, respect_robots: bool = CRAWL_RESPECT_ROBOTS,
+                 robots_ttl: int = CRAWL_ROBOTS_TTL,
+                 cache_size: int = CRAWL_ROBOTS_CACHE_SIZE):
+        self.respect_robots = respect_robots
+        self.robots_ttl = robots_ttl
+        self.cache_size = cache_size
+        self._robots = OrderedDict()  # "scheme://host" -> (RobotFileParser or None, fetched_at)
+        self._robots_lock = threading.Lock()
+        self._hosts = OrderedDict()  # host -> _HostState, least recently used first
+        self._hosts_lock = threading.Lock()
+
+    def _robots_for(self, url: str, user_agent: str) -> Optional[RobotFileParser]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+
+        with self._robots_lock:
+            cached = self._robots.get(origin)
+            if cached and time.time() - cached[1] < self.robots_ttl:
+                self._robots.move_to_end(origin)
+                return cached[0]
+
+        parser = None
+        try:
+            resp = get_session().get(f"{origin}/robots.txt", timeout=5, headers={"User-Agent": user_agent})
+            # Like Google: only a readable robots.txt restricts us; 4xx/5xx means allow all
+            if resp.status_code == 200:
+                parser = RobotFileParser()
+                parser.parse(resp.text.splitlines())
+        except Exception:
+            parser = None
+
+        with self._robots_lock:
+            self._robots[origin] = (parser, time.time())
+            while len(self._robots) > self.cache_size:
+                self._robots.popitem(last=False)
+        return parser
+
+    def allowed(self, url: str, user_agent: str) -> bool:
+        if not self.respect_robots:
+            return True
+        parser = self._robots_for(url, user_agent)
+        return parser is None or parser.can_fetch(user_agent, url)
+
+    def crawl_delay(self, url: str, user_agent: str) -> float:
+        if not self.respect_robots:
+            return 0.0
+        parser = self._robots_for(url, user_agent)
+        delay = parser.crawl_delay(user_agent) if parser else None
+        return min(float(delay or 0.0), CRAWL_MAX_CRAWL_DELAY)
+
+    def sitemaps(self, url: str, user_agent: str) -> List[str]:
+        """Sitemap URLs for `url`'s site: those declared in robots.txt, else /sitemap.xml."""
+        parts = urlsplit(url)
+        parser = self._robots_for(url, user_agent) if self.respect_robots else None
+        declared = (parser.site_maps() if parser else None) or []
+        return declared or [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+
+    def _claim_host(self, host: str) -> "_HostState":
+        with self._hosts_lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState()
+            self._hosts.move_to_end(host)
+            state.users += 1
+            # Forget the least recently used hosts nobody is waiting on (their pacing has long expired)
+            excess = len(self._hosts) - self.cache_size
+            if excess > 0:
+                for idle in list(islice((h for h, st in self._hosts.items() if not st.users), excess)):
+                    del self._hosts[idle]
+            return state
+
+    def _release_host(self, state: "_HostState"):
+        with self._hosts_lock:
+            state.users -= 1
+
+    @contextmanager
+    def slot(self, url: str, user_agent: str):
+        """Holds the host's slot for one request, waiting for its turn and pacing."""
+        host = (urlsplit(url).hostname or "").lower()
+        delay = self.crawl_delay(url, user_agent)
+        state = self._claim_host(host)
+        try:
+            with state.lock:
+                wait = state.last + delay - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                acquire(domain_bucket_name(url))
+                try:
+                    yield
+                finally:
+                    state.last = time.monotonic()
+        finally:
+            self._release_host(state)
+
+    def get(self, url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+        """GET through `session` (the shared pooled session by default), honoring robots.txt and per-host politeness."""
+        session = session or get_session()
+        user_agent = (kwargs.get("headers") or {}).get("User-Agent") or session.headers.get("User-Agent", "*")
+        if not self.allowed(url, user_agent):
+            raise DisallowedByRobots(f"robots.txt disallows {url}")
+        with self.slot(url, user_agent):
+            return session.get(url, **kwargs)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_crawl_scheduler() -> CrawlScheduler:
+    """Process-wide scheduler, so per-host state is shared by every SearchService."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CrawlScheduler()
+        return _scheduler
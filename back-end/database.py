@@ -1,8 +1,12 @@
 from supabase import create_client, Client
 from config import SUPABASE_URL, SUPABASE_SERVICE_KEY
 from models import Lead
-from typing import List, Optional
+from typing import List, Optional, Iterable, Set
 from logger_util import log_event
+from url_utils import domain_key
+
+# Max values per `in_` filter so the PostgREST query string stays a sane length
+IN_FILTER_CHUNK_SIZE = 100
 
 class DatabaseService:
     def __init__(self):
@@ -22,7 +26,12 @@ class DatabaseService:
             self.supabase = None
 
     def save_lead(self, lead: Lead) -> dict:
-        """Saves a lead to the 'leads' table in Supabase."""
+        """
+        Saves a lead to the 'leads' table in Supabase.
+        Upserts on the unique `domain_key`, so a lead for an already stored
+        domain is ignored and an empty dict is returned.
+        """
+        lead.domain_key = lead.domain_key or domain_key(lead.website)
         data = lead.dict()
         # Convert datetime to string for JSON serialization if necessary
         data['created_at'] = data['created_at'].isoformat()
@@ -31,18 +40,26 @@ class DatabaseService:
             if not self.supabase:
                 log_event("Cannot save lead: Supabase not initialized", "ERROR")
                 return {}
-            response = self.supabase.table("leads").insert(data).execute()
+            if data['domain_key']:
+                response = self.supabase.table("leads") \
+                    .upsert(data, on_conflict="domain_key", ignore_duplicates=True).execute()
+            else:
+                response = self.supabase.table("leads").insert(data).execute()
+            if not response.data:
+                log_event(f"Duplicate lead ignored: {data['domain_key']}")
+                return {}
             return response.data[0]
         except Exception as e:
             log_event(f"❌ Error saving lead to Database: {e}", "ERROR")
             return {}
 
     def get_lead_by_website(self, website: str) -> Optional[dict]:
-        """Checks if a lead with the same website already exists."""
+        """Checks if a lead with the same domain as `website` already exists."""
         try:
-            if not self.supabase:
+            key = domain_key(website)
+            if not self.supabase or not key:
                 return None
-            response = self.supabase.table("leads").select("*").eq("website", website).execute()
+            response = self.supabase.table("leads").select("*").eq("domain_key", key).execute()
             if response.data:
                 return response.data[0]
             return None
@@ -50,6 +67,27 @@ class DatabaseService:
             print(f"Error checking lead: {e}")
             return None
 
+    def find_existing_websites(self, websites: Iterable[str]) -> Set[str]:
+        """
+        Returns the subset of `websites` whose domain already exists as a lead,
+        resolved with one batched `in_` lookup instead of a round trip per URL.
+        Always asks the database, so leads deleted from any process are seen.
+        """
+        keys = {w: domain_key(w) for w in websites if w}
+        unknown = list({k for k in keys.values() if k})
+        known = set()
+
+        if unknown and self.supabase:
+            try:
+                for i in range(0, len(unknown), IN_FILTER_CHUNK_SIZE):
+                    chunk = unknown[i:i + IN_FILTER_CHUNK_SIZE]
+                    response = self.supabase.table("leads").select("domain_key").in_("domain_key", chunk).execute()
+                    known |= {r["domain_key"] for r in (response.data or []) if r.get("domain_key")}
+            except Exception as e:
+                print(f"Error checking leads in bulk: {e}")
+
+        return {w for w, k in keys.items() if k in known}
+
     def list_leads(self, limit: int = 200) -> List[dict]:
         """Lists latest leads from Supabase."""
         try:
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional
+from sqlite_store import SQLiteStore
+from config import CACHE_DB_PATH
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts, for use as a cache key."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCache(SQLiteStore):
+    """
+    Persistent key/value cache with a TTL and LRU eviction once it holds more
+    than `max_entries`. Several caches share one SQLite file, each under its
+    own namespace. Hit/miss counters are persisted so every process (API,
+    workers) contributes to the same numbers.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries(namespace, last_access);
+        CREATE TABLE IF NOT EXISTS cache_stats (
+            namespace TEXT PRIMARY KEY,
+            hits INTEGER NOT NULL DEFAULT 0,
+            misses INTEGER NOT NULL DEFAULT 0,
+            evictions INTEGER NOT NULL DEFAULT 0
+        );
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_entries: int, db_path: str = CACHE_DB_PATH):
+        super().__init__(db_path)
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn().execute(
+            "INSERT OR IGNORE INTO cache_stats (namespace) VALUES (?)", (namespace,)
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry["value"]
+
+    def get_entry(self, key: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Returns {'value', 'created_at', 'expires_at', 'stale'} or None on a miss.
+        With allow_stale, expired entries are returned (marked stale) for revalidation.
+        """
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, created_at, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+
+        stale = row is not None and row["expires_at"] <= now
+        if row is None or (stale and not allow_stale):
+            self._count("misses")
+            return None
+
+        conn.execute(
+            "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key),
+        )
+        if not stale:
+            self._count("hits")
+        return {
+            "value": json.loads(row["value"]),
+            "created_at": row["created_at"],
+            "expires_at": row["expires_at"],
+            "stale": stale,
+        }
+
+    def contains(self, key: str) -> bool:
+        """True if a fresh entry exists. Does not count as a lookup."""
+        row = self._conn().execute(
+            "SELECT 1 FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.namespace, key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value), now, now + (ttl or self.ttl), now),
+        )
+        self._evict()
+
+    def touch(self, key: str, ttl: Optional[int] = None):
+        """Extends an entry's lifetime without rewriting it (e.g. after a 304 Not Modified)."""
+        now = time.time()
+        self._conn().execute(
+            "UPDATE cache_entries SET expires_at = ?, last_access = ? WHERE namespace = ? AND key = ?",
+            (now + (ttl or self.ttl), now, self.namespace, key),
+        )
+        self._count("hits")
+
+    def delete(self, key: str):
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def _evict(self):
+        conn = self._conn()
+        count = conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY last_access LIMIT ?)",
+            (self.namespace, self.namespace, excess),
+        )
+        self._count("evictions", excess)
+
+    def _count(self, counter: str, n: int = 1):
+        self._conn().execute(
+            f"UPDATE cache_stats SET {counter} = {counter} + ? WHERE namespace = ?",
+            (n, self.namespace),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return _namespace_stats(self._conn(), self.namespace)
+
+
+def _namespace_stats(conn, namespace: str) -> Dict[str, Any]:
+    row = conn.execute("SELECT * FROM cache_stats WHERE namespace = ?", (namespace,)).fetchone()
+    entries = conn.execute(
+        "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (namespace,)
+    ).fetchone()[0]
+    hits, misses = (row["hits"], row["misses"]) if row else (0, 0)
+    lookups = hits + misses
+    return {
+        "namespace": namespace,
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "evictions": row["evictions"] if row else 0,
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+    }
+
+
+class _CacheFile(SQLiteStore):
+    SCHEMA = DiskCache.SCHEMA
+
+
+def cache_stats(db_path: str = CACHE_DB_PATH) -> List[Dict[str, Any]]:
+    """Hit/miss counters for every cache namespace in the shared cache file."""
+    conn = _CacheFile(db_path)._conn()
+    names = [r["namespace"] for r in conn.execute("SELECT namespace FROM cache_stats ORDER BY namespace")]
+    return [_namespace_stats(conn, name) for name in names]
@@ -0,0 +1,156 @@
+"""
+HTML -> visible text, with interchangeable parser backends.
+
+All backends produce the same output as the original BeautifulSoup path:
+drop the `drop` elements, then join every stripped, non-empty text node with
+a single space (comments excluded). Links and the text of dropped layout
+elements (nav/header/footer) are collected before those are removed, since
+that is where contact details usually live.
+
+- "selectolax": lexbor-based, fastest (optional `selectolax` package)
+- "lxml": libxml2-based (optional `lxml` package)
+- "bs4": BeautifulSoup + html.parser, the reference implementation
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config import HTML_PARSER_BACKEND
+
+# <template> content is inert (never rendered); parsers disagree on whether it is text, so drop it
+PAGE_DROP_TAGS = ("script", "style", "template", "nav", "footer", "header")
+SUBPAGE_DROP_TAGS = ("script", "style", "template")
+INVISIBLE_TAGS = ("script", "style", "template")
+
+# Preferred order when HTML_PARSER_BACKEND is "auto"
+AUTO_ORDER = ("selectolax", "lxml", "bs4")
+
+
+@dataclass
+class ParsedPage:
+    text: str
+    links: List[Tuple[str, str]] = field(default_factory=list)  # (href, whitespace-collapsed anchor text)
+    layout_text: str = ""  # Text of dropped nav/header/footer elements
+
+
+def _split_drop(drop: Sequence[str]) -> Tuple[List[str], List[str]]:
+    invisible = [t for t in drop if t in INVISIBLE_TAGS]
+    return invisible, [t for t in drop if t not in INVISIBLE_TAGS]
+
+
+def _join(parts) -> str:
+    return " ".join(p for p in (s.strip() for s in parts) if p)
+
+
+def _squash(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _parse_bs4(html: str, drop: Sequence[str]) -> ParsedPage:
+    from bs4 import BeautifulSoup
+
+    invisible, layout = _split_drop(drop)
+    soup = BeautifulSoup(html, "html.parser")
+    for el in soup(invisible):
+        el.decompose()
+    links = [(a["href"], _squash(a.get_text())) for a in soup.find_all("a", href=True)]
+    layout_parts = []
+    for el in soup(layout) if layout else []:
+        if el.find_parent(layout) is None:  # Outermost only, nested text is already in
+            layout_parts.append(el.get_text(separator=" ", strip=True))
+    for el in soup(layout) if layout else []:
+        el.decompose()
+    return ParsedPage(text=soup.get_text(separator=" ", strip=True), links=links, layout_text=_join(layout_parts))
+
+
+def _parse_lxml(html: str, drop: Sequence[str]) -> ParsedPage:
+    import lxml.html
+
+    if not html.strip():
+        return ParsedPage(text="")
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration: hand lxml bytes instead
+        doc = lxml.html.document_fromstring(
+            html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8")
+        )
+    invisible, layout = _split_drop(drop)
+    for el in list(doc.iter(*invisible)) if invisible else []:
+        el.drop_tree()  # Keeps the element's tail text, like decompose()
+    links = [(a.get("href"), _squash(a.text_content())) for a in doc.iter("a") if a.get("href") is not None]
+    layout_parts = []
+    for el in list(doc.iter(*layout)) if layout else []:
+        if next(el.iterancestors(*layout), None) is None:  # Outermost only, nested text is already in
+            layout_parts.append(_join(el.itertext()))
+            el.drop_tree()
+    return ParsedPage(text=_join(doc.itertext()), links=links, layout_text=_join(layout_parts))
+
+
+def _parse_selectolax(html: str, drop: Sequence[str]) -> ParsedPage:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    if tree.root is None:
+        return ParsedPage(text="")
+    invisible, layout = _split_drop(drop)
+    if invisible:
+        tree.strip_tags(invisible)
+    links = [(a.attributes["href"] or "", _squash(a.text(deep=True))) for a in tree.css("a[href]")]
+    layout_parts = [_node_text(el) for el in tree.css(",".join(layout)) if not _has_ancestor(el, layout)] if layout else []
+    if layout:
+        tree.strip_tags(layout)
+    return ParsedPage(text=_node_text(tree.root), links=links, layout_text=_join(layout_parts))
+
+
+def _has_ancestor(node, tags: Sequence[str]) -> bool:
+    parent = node.parent
+    while parent is not None:
+        if parent.tag in tags:
+            return True
+        parent = parent.parent
+    return False
+
+
+def _node_text(node) -> str:
+    # text(strip=True) keeps empty nodes as doubled separators, so split and re-join
+    return _join(node.text(separator="\x00", strip=False).split("\x00"))
+
+
+BACKENDS: Dict[str, Callable[[str, Sequence[str]], ParsedPage]] = {
+    "selectolax": _parse_selectolax,
+    "lxml": _parse_lxml,
+    "bs4": _parse_bs4,
+}
+
+
+def available_backends() -> List[str]:
+    names = []
+    for name, module in (("selectolax", "selectolax.lexbor"), ("lxml", "lxml.html"), ("bs4", "bs4")):
+        try:
+            __import__(module)
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+_default_backend = None
+
+
+def default_backend() -> str:
+    global _default_backend
+    if _default_backend is None:
+        available = available_backends()
+        if HTML_PARSER_BACKEND != "auto" and HTML_PARSER_BACKEND in available:
+            _default_backend = HTML_PARSER_BACKEND
+        else:
+            _default_backend = next(name for name in AUTO_ORDER if name in available)
+    return _default_backend
+
+
+def parse_html(html: str, drop: Sequence[str] = PAGE_DROP_TAGS, backend: Optional[str] = None) -> ParsedPage:
+    """Visible text and links of `html` after removing the `drop` elements."""
+    return BACKENDS[backend or default_backend()](html, drop)
+
+
+def html_to_text(html: str, drop: Sequence[str] = PAGE_DROP_TAGS, backend: Optional[str] = None) -> str:
+    return parse_html(html, drop, backend).text
@@ -0,0 +1,163 @@
+"""
+Shared outbound HTTP layer.
+
+- One pooled keep-alive `requests.Session` per process.
+- Capped, streamed reads of HTML bodies.
+- Opt-in (HTTP_DNS_CACHE_TTL > 0) in-process DNS cache in front of
+  `socket.getaddrinfo`, so repeat hosts skip the resolver entirely. It
+  replaces the resolver for the whole process (Supabase, LLM and Google
+  clients included), which is why it is off by default.
+"""
+import re
+import socket
+import threading
+import time
+from typing import Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_USER_AGENT,
+    FETCH_MAX_BYTES,
+    FETCH_TEXT_BUDGET_FACTOR,
+)
+
+# (connect, read) timeout tuple for requests calls
+HTTP_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session. requests.Session is safe for concurrent GETs."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"User-Agent": HTTP_USER_AGENT})
+            _session = session
+        return _session
+
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+_CHUNK_SIZE = 16 * 1024
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+_BLOCK_OPEN_RE = re.compile(rb"<(script|style)\b", re.I)
+_BLOCK_CLOSE_RES = {tag: re.compile(rb"</" + tag + rb"\s*>", re.I) for tag in (b"script", b"style")}
+_TAG_RE = re.compile(r"<[^>]*>")
+_WS_RE = re.compile(r"\s+")
+
+
+class NotHTMLContent(Exception):
+    pass
+
+
+def _estimate_text_chars(html: str) -> int:
+    """Rough visible-text length of an HTML fragment (no parse, just tag stripping)."""
+    text = _TAG_RE.sub(" ", _SCRIPT_STYLE_RE.sub(" ", html))
+    return len(_WS_RE.sub(" ", text).strip())
+
+
+def _countable_end(body: bytearray, start: int) -> int:
+    """
+    End of the part of body[start:] whose text can be estimated now: up to the
+    last complete tag, but before any script/style block still waiting for its
+    end tag (its code would otherwise be counted as visible text).
+    """
+    end = body.rfind(b">", start) + 1
+    pos = start
+    while pos < end:
+        block = _BLOCK_OPEN_RE.search(body, pos, end)
+        if not block:
+            break
+        close = _BLOCK_CLOSE_RES[block.group(1).lower()].search(body, block.end())
+        if not close:
+            return block.start()
+        pos = close.end()
+    return max(end, start)
+
+
+def read_html(response: requests.Response, max_bytes: int = FETCH_MAX_BYTES,
+              text_budget: int = None, content_types: Tuple[str, ...] = HTML_CONTENT_TYPES) -> str:
+    """
+    Reads the HTML body of a `stream=True` response, keeping memory bounded.
+    - Raises NotHTMLContent without reading the body if Content-Type isn't one
+      of `content_types` (HTML by default; pass e.g. ("xml",) for sitemaps).
+    - Stops after `max_bytes`.
+    - Stops early once the page already holds about FETCH_TEXT_BUDGET_FACTOR x
+      `text_budget` characters of visible text.
+    The connection is always released back to the pool.
+    """
+    try:
+        content_type = response.headers.get("Content-Type", "text/html").lower()
+        if not any(t in content_type for t in content_types):
+            raise NotHTMLContent(f"Skipping non-HTML content ({content_type.split(';')[0]})")
+
+        target_chars = text_budget * FETCH_TEXT_BUDGET_FACTOR if text_budget else None
+        body = bytearray()
+        text_chars = 0
+        scanned = 0  # Bytes already counted towards text_chars
+        for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+            body += chunk[:max_bytes - len(body)]
+            if len(body) >= max_bytes:
+                break
+            if target_chars:
+                # Count text in complete tags and script/style blocks only, so nothing is counted twice
+                cut = _countable_end(body, scanned)
+                if cut > scanned:
+                    text_chars += _estimate_text_chars(body[scanned:cut].decode("utf-8", errors="ignore"))
+                    scanned = cut
+                    if text_chars >= target_chars:
+                        break
+
+        encoding = response.encoding if "charset" in content_type else None
+        return body.decode(encoding or "utf-8", errors="replace")
+    finally:
+        response.close()
+
+
+class _DNSCache:
+    """TTL cache wrapped around socket.getaddrinfo."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._resolve = socket.getaddrinfo
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[1] > now:
+                return cached[0]
+        result = self._resolve(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (result, now + self.ttl)
+            if len(self._entries) > 4096:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+        return result
+
+
+_dns_cache = None
+
+
+def install_dns_cache(ttl: int = HTTP_DNS_CACHE_TTL):
+    """Routes every getaddrinfo call in the process through the cache; a no-op when ttl <= 0."""
+    global _dns_cache
+    if ttl <= 0 or _dns_cache is not None:
+        return
+    _dns_cache = _DNSCache(ttl)
+    socket.getaddrinfo = _dns_cache.getaddrinfo
+
+
+install_dns_cache()
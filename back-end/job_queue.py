@@ -0,0 +1,125 @@
+import json
+import sqlite3
+import time
+import uuid
+from typing import Optional, Dict, Any
+from sqlite_store import SQLiteStore
+from config import JOB_DB_PATH, JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS
+
+
+class JobQueue(SQLiteStore):
+    """
+    Persistent SQLite-backed job queue shared by the API (producer) and the
+    worker pool (consumers). Survives restarts: jobs left 'running' by a dead
+    worker are re-queued once their heartbeat goes stale. Producers and
+    consumers must share the file, i.e. run on the same disk (see worker.py).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',  -- queued, running, done, failed
+            progress TEXT NOT NULL DEFAULT '{}',
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker_id TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            heartbeat_at REAL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at);
+    """
+
+    def __init__(self, db_path: str = JOB_DB_PATH):
+        super().__init__(db_path)
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload), time.time()),
+        )
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically takes the oldest queued job, or returns None if there is none."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, attempts = attempts + 1, "
+                "started_at = ?, heartbeat_at = ? WHERE id = ?",
+                (worker_id, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def heartbeat(self, job_id: str):
+        self._conn().execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]):
+        """Stores progress counters; also counts as a heartbeat."""
+        self._conn().execute(
+            "UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ?",
+            (json.dumps(progress), time.time(), job_id),
+        )
+
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]] = None):
+        self._conn().execute(
+            "UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+            (json.dumps(result or {}), time.time(), job_id),
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._conn().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def requeue_stale(self, stale_seconds: int = JOB_STALE_SECONDS,
+                      max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        """Re-queues running jobs whose worker stopped heartbeating (e.g. a dyno restart)."""
+        cutoff = time.time() - stale_seconds
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Worker lost too many times', finished_at = ? "
+            "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+            (time.time(), cutoff, max_attempts),
+        )
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker_id = NULL "
+            "WHERE status = 'running' AND heartbeat_at < ?",
+            (cutoff,),
+        )
+        return cur.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, limit: int = 50):
+        rows = self._conn().execute(
+            "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["progress"] = json.loads(job["progress"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
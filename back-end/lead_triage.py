@@ -0,0 +1,133 @@
+"""
+Cheap local triage before we pay for a lead: once on the CSE title/snippet/URL
+(before fetching the page) and once on the extracted text (before the LLM
+call). Scoring follows the analyze_lead rubric: +3 industry match,
++2 keywords (by fraction matched), +2 contact info, +1 location. Directories,
+job boards, news sites and listicles are blocked or penalized.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from contact_extractor import CONTACT_RE
+from models import SearchQuery
+from url_utils import domain_key
+from config import TRIAGE_EXTRA_BLOCKED_DOMAINS
+
+# Sites that list, review or write about companies rather than being one
+BLOCKED_DOMAINS = {
+    # Directories, review and data sites
+    "crunchbase.com", "zoominfo.com", "owler.com", "tracxn.com", "dnb.com", "apollo.io", "rocketreach.co",
+    "clutch.co", "g2.com", "capterra.com", "getapp.com", "softwareadvice.com", "trustpilot.com",
+    "goodfirms.co", "designrush.com", "builtin.com", "f6s.com", "yelp.com", "yellowpages.com", "bbb.org",
+    "manta.com", "angel.co", "wellfound.com", "producthunt.com", "similarweb.com",
+    # Job boards
+    "indeed.com", "glassdoor.com", "ziprecruiter.com", "monster.com", "simplyhired.com", "naukri.com",
+    "stepstone.de", "totaljobs.com", "dice.com",
+    # Social, Q&A and publishing platforms
+    "linkedin.com", "facebook.com", "twitter.com", "x.com", "instagram.com", "youtube.com", "tiktok.com",
+    "reddit.com", "quora.com", "medium.com", "substack.com", "wikipedia.org", "github.com",
+    # News
+    "forbes.com", "techcrunch.com", "bloomberg.com", "reuters.com", "businessinsider.com", "cnbc.com",
+    "nytimes.com", "wsj.com", "theverge.com", "venturebeat.com", "inc.com", "entrepreneur.com",
+    # Marketplaces
+    "amazon.com", "ebay.com", "alibaba.com",
+} | {d.strip().lower() for d in TRIAGE_EXTRA_BLOCKED_DOMAINS.split(",") if d.strip()}
+
+NOT_A_COMPANY_PATH_RE = re.compile(
+    r"/(?:jobs?|careers?|news|blog|articles?|press|wiki|forum|threads?|questions?|reviews?|directory|lists?)(?:/|$)"
+    r"|/(?:top|best)-\d*|\d+-(?:best|top)-",
+    re.I,
+)
+NOT_A_COMPANY_TITLE_RE = re.compile(
+    r"\b(?:top|best)\s+\d+\b|\b\d+\s+(?:best|top|leading|largest)\b|\blist of\b|\bjobs?\b|\bhiring\b|\bvacanc"
+    r"|\bsalar(?:y|ies)\b|\breviews?\b|\bvs\.?\s|\bnews\b",
+    re.I,
+)
+LISTICLE_PENALTY = 5.0
+MIN_TERM_CHARS = 2
+
+
+@dataclass
+class TriageResult:
+    score: float
+    reasons: List[str] = field(default_factory=list)
+    blocked: bool = False
+
+    def passes(self, threshold: float) -> bool:
+        return not self.blocked and self.score >= threshold
+
+    def explain(self) -> str:
+        return f"{self.score:.1f} ({', '.join(self.reasons) or 'no signals'})"
+
+
+def _term_re(term: str) -> Optional[re.Pattern]:
+    term = " ".join(term.split())
+    if len(term) < MIN_TERM_CHARS:
+        return None
+    return re.compile(r"\b" + re.escape(term).replace(r"\ ", r"[\s_-]+") + r"\b", re.I)
+
+
+def _fraction_matched(terms: List[str], text: str) -> float:
+    patterns = [p for p in (_term_re(t) for t in terms) if p]
+    if not patterns:
+        return 0.0
+    return sum(1 for p in patterns if p.search(text)) / len(patterns)
+
+
+def is_blocked_domain(url: str) -> bool:
+    key = domain_key(url) or ""
+    return key in BLOCKED_DOMAINS
+
+
+def _score(text: str, query: SearchQuery, with_contacts: bool) -> TriageResult:
+    result = TriageResult(score=0.0)
+
+    industry = _term_re(query.industry or "")
+    if industry and industry.search(text):
+        result.score += 3
+        result.reasons.append("industry")
+    else:
+        # Partial credit for multi-word industries ("commercial real estate")
+        words = [w for w in (query.industry or "").split() if len(w) > 3]
+        partial = _fraction_matched(words, text) if len(words) > 1 else 0.0
+        if partial:
+            result.score += 2 * partial
+            result.reasons.append(f"industry {partial:.0%}")
+
+    keywords = _fraction_matched(list(query.keywords), text)
+    if keywords:
+        result.score += 2 * keywords
+        result.reasons.append(f"keywords {keywords:.0%}")
+
+    if with_contacts and CONTACT_RE.search(text):
+        result.score += 2
+        result.reasons.append("contact info")
+
+    # "Austin, TX" matches on "Austin" alone
+    locations = [part for part in (query.location or "").split(",") if part.strip()]
+    if locations and _fraction_matched(locations[:1], text):
+        result.score += 1
+        result.reasons.append("location")
+    return result
+
+
+def triage_result(result: Dict, query: SearchQuery) -> TriageResult:
+    """Scores a CSE result from its URL, title and snippet alone."""
+    url = result.get("link") or ""
+    if is_blocked_domain(url):
+        return TriageResult(score=0.0, reasons=[f"blocked domain {domain_key(url)}"], blocked=True)
+
+    title = result.get("title") or ""
+    path = urlsplit(url).path
+    text = f"{title}\n{result.get('snippet') or ''}\n{domain_key(url) or ''} {path.replace('-', ' ').replace('/', ' ')}"
+    triage = _score(text, query, with_contacts=False)
+    if NOT_A_COMPANY_PATH_RE.search(path) or NOT_A_COMPANY_TITLE_RE.search(title):
+        triage.score -= LISTICLE_PENALTY
+        triage.reasons.append("listicle/job/news page")
+    return triage
+
+
+def triage_content(content: str, query: SearchQuery) -> TriageResult:
+    """Scores extracted page content (extract_page_content output) before analysis."""
+    return _score(content, query, with_contacts=True)
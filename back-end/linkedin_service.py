@@ -1,6 +1,5 @@
 import os
 import asyncio
-import re
 import time
 from playwright.async_api import async_playwright
 from dotenv import load_dotenv
@@ -8,6 +7,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import LINKEDIN_ACCESS_TOKEN, BROWSER_HEADLESS
+from rate_limiter import acquire_async
+from contact_extractor import extract_contacts
 # New credentials
 LINKEDIN_EMAIL = os.getenv("LINKEDIN_EMAIL")
 LINKEDIN_PASSWORD = os.getenv("LINKEDIN_PASSWORD")
@@ -74,7 +75,6 @@ class LinkedInService:
                         contact_details = await self.safe_extract_contact(contact_page, mgr["profile_url"])
                         mgr.update(contact_details)
                         await contact_page.close()
-                        await asyncio.sleep(2)
                     
                     enriched_managers.append(mgr)
                 
@@ -100,6 +100,8 @@ class LinkedInService:
             contact_url = profile_url.rstrip('/') + "/overlay/contact-info/"
             print(f"      Checking contact info: {contact_url}")
             
+            # Shared LinkedIn budget paces profile visits instead of fixed sleeps between them
+            await acquire_async("linkedin")
             await page.goto(contact_url, timeout=30000)
             await asyncio.sleep(2) # Let it load
             
@@ -117,16 +119,12 @@ class LinkedInService:
             # Strategy 2: Regex fallback if selectors fail but text is there
             if not contact_data["email"] or not contact_data["phone"]:
                 body_text = await page.inner_text("body")
-                if not contact_data["email"]:
-                    email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', body_text)
-                    if email_match:
-                        contact_data["email"] = email_match.group(0)
-                
-                if not contact_data["phone"]:
-                    # Simple phone regex for common formats
-                    phone_match = re.search(r'(\+?\d{1,3}[\s-]?)?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{4}', body_text)
-                    if phone_match:
-                        contact_data["phone"] = phone_match.group(0)
+                links = await page.eval_on_selector_all(
+                    "a[href^='mailto:'], a[href^='tel:']", "els => els.map(a => [a.getAttribute('href'), ''])"
+                )
+                found = extract_contacts(body_text, links=links)
+                contact_data["email"] = contact_data["email"] or found.email
+                contact_data["phone"] = contact_data["phone"] or found.phone
 
             if contact_data["email"]: print(f"      Found Email: {contact_data['email']}")
             if contact_data["phone"]: print(f"      Found Phone: {contact_data['phone']}")
@@ -409,8 +407,6 @@ class LinkedInService:
                             contact_details = await self.safe_extract_contact(contact_page, manager_info["profile_url"])
                             manager_info.update(contact_details)
                             await contact_page.close()
-                            # Extra sleep to be more human-like
-                            await asyncio.sleep(1.5)
 
                         managers.append(manager_info)
                     except Exception as e:
@@ -0,0 +1,503 @@
+"""
+LLM backends behind one interface (Groq, Gemini and a local mock), and a
+router that sends each request to the fastest healthy provider by rolling
+latency and error rate. A request still unanswered at its provider's p95 is
+hedged: the next provider gets the same prompt and the first good answer wins.
+Failed requests fail over to the next provider.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from groq import Groq, AsyncGroq, RateLimitError
+from content_distiller import estimate_tokens
+from logger_util import log_event
+from llm_telemetry import (OUTCOME_OK, OUTCOME_BAD_JSON, OUTCOME_ERROR, OUTCOME_RATE_LIMITED,
+                           OUTCOME_HEDGE_LOST, OUTCOME_CANCELLED)
+from rate_limiter import acquire, acquire_async, get_adaptive_limiter, parse_duration
+from config import (
+    GROQ_API_KEY, GEMINI_API_KEY, LLM_PROVIDERS, GROQ_MODEL, GEMINI_MODEL,
+    LLM_HEALTH_WINDOW, LLM_MAX_ERROR_RATE, LLM_HEDGE_ENABLED, LLM_HEDGE_MIN_DEADLINE,
+    LLM_HEDGE_DEFAULT_DEADLINE, MOCK_LLM_LATENCY, MOCK_LLM_ERROR_RATE,
+)
+
+MIN_SAMPLES = 5  # Calls before a provider's latency/error numbers are trusted
+HEDGE_POOL_WORKERS = 32  # Sync callers run through this pool so a slow request can be hedged
+HEDGE_POLL_INTERVAL = 0.05  # How often the router checks whether a queued request has been sent yet
+
+# observer(provider, latency seconds, outcome, prompt tokens, completion tokens), once per request
+Observer = Callable[["LLMProvider", float, str, Optional[int], Optional[int]], None]
+# on_start(provider) -> False to give the slot back instead of sending (e.g. a hedge that already lost)
+OnStart = Callable[["LLMProvider"], bool]
+
+
+class InvalidResponse(Exception):
+    pass
+
+
+class NoProviderAvailable(Exception):
+    pass
+
+
+class RequestAbandoned(Exception):
+    """on_start declined to send the request once it had a slot."""
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return (isinstance(error, RateLimitError) or getattr(error, "status_code", None) == 429
+            or getattr(error, "code", None) == 429)
+
+
+def _error_headers(error: Exception):
+    return getattr(getattr(error, "response", None), "headers", None)
+
+
+def retry_after(error: Exception, default: float) -> float:
+    """Seconds to back off after a 429, from the Retry-After header when the provider sends one."""
+    headers = _error_headers(error)
+    seconds = parse_duration(headers.get("retry-after")) if headers is not None else None
+    return default if seconds is None else seconds
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+@dataclass
+class Completion:
+    data: Any
+    provider: str
+    model: str
+    latency: float
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class ProviderHealth:
+    """Latency and success of a provider's last `window` calls."""
+
+    def __init__(self, window: int = LLM_HEALTH_WINDOW):
+        self._samples = deque(maxlen=max(1, window))  # (latency, ok)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float, ok: bool):
+        with self._lock:
+            self._samples.append((latency, ok))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        latencies = [latency for latency, ok in samples if ok]
+        return {
+            "samples": len(samples),
+            "error_rate": round(sum(1 for _, ok in samples if not ok) / len(samples), 3) if samples else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+        }
+
+
+class LLMProvider:
+    """
+    One backend. Subclasses implement _call/_call_async returning
+    (text, prompt tokens, completion tokens, rate-limit headers or None).
+    Requests are paced by the provider's token bucket and AdaptiveLimiter.
+    """
+
+    name = ""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.health = ProviderHealth()
+        self.limiter = get_adaptive_limiter(self.name)
+
+    def _call(self, prompt: str) -> Tuple[str, Optional[int], Optional[int], Optional[Dict]]:
+        raise NotImplementedError
+
+    async def _call_async(self, prompt: str) -> Tuple[str, Optional[int], Optional[int], Optional[Dict]]:
+        return await asyncio.to_thread(self._call, prompt)
+
+    def healthy(self) -> bool:
+        if self.limiter.paused_until > time.monotonic():
+            return False  # Told to back off (429)
+        stats = self.health.snapshot()
+        return stats["samples"] < MIN_SAMPLES or stats["error_rate"] <= LLM_MAX_ERROR_RATE
+
+    def complete(self, prompt: str, tokens: int, observer: Optional[Observer] = None,
+                 on_start: Optional[OnStart] = None) -> Completion:
+        acquire(self.name)
+        self.limiter.acquire(tokens)
+        self._start(tokens, on_start)
+        started = time.perf_counter()
+        try:
+            text, prompt_tokens, completion_tokens, headers = self._call(prompt)
+        except Exception as e:
+            self._failed(tokens, e, started, observer)
+            raise
+        self.limiter.release(tokens, headers)
+        return self._finish(text, prompt_tokens, completion_tokens, started, observer)
+
+    async def complete_async(self, prompt: str, tokens: int, observer: Optional[Observer] = None,
+                             on_start: Optional[OnStart] = None) -> Completion:
+        await acquire_async(self.name)
+        await self.limiter.acquire_async(tokens)
+        self._start(tokens, on_start)
+        started = time.perf_counter()
+        try:
+            text, prompt_tokens, completion_tokens, headers = await self._call_async(prompt)
+        except asyncio.CancelledError:
+            # Lost a hedge race: free the slot, but it says nothing about the provider's health
+            self.limiter.release(tokens)
+            if observer:
+                observer(self, time.perf_counter() - started, OUTCOME_CANCELLED, None, None)
+            raise
+        except Exception as e:
+            self._failed(tokens, e, started, observer)
+            raise
+        self.limiter.release(tokens, headers)
+        return self._finish(text, prompt_tokens, completion_tokens, started, observer)
+
+    def _start(self, tokens: int, on_start: Optional[OnStart]):
+        if on_start is not None and not on_start(self):
+            self.limiter.release(tokens)
+            raise RequestAbandoned(f"{self.name} request no longer needed")
+
+    def _failed(self, tokens: int, error: Exception, started: float, observer: Optional[Observer]):
+        latency = time.perf_counter() - started
+        limited = is_rate_limited(error)
+        self.limiter.release(tokens, _error_headers(error), rate_limited=limited,
+                             retry_after=retry_after(error, default=5.0) if limited else None)
+        self.health.add(latency, False)
+        if observer:
+            observer(self, latency, OUTCOME_RATE_LIMITED if limited else OUTCOME_ERROR, None, None)
+
+    def _finish(self, text: str, prompt_tokens: Optional[int], completion_tokens: Optional[int],
+                started: float, observer: Optional[Observer]) -> Completion:
+        latency = time.perf_counter() - started
+        try:
+            data = json.loads(text)
+        except (TypeError, ValueError) as e:
+            self.health.add(latency, False)
+            if observer:
+                observer(self, latency, OUTCOME_BAD_JSON, prompt_tokens, completion_tokens)
+            raise InvalidResponse(f"{self.name} returned invalid JSON: {e}") from e
+        self.health.add(latency, True)
+        if observer:
+            observer(self, latency, OUTCOME_OK, prompt_tokens, completion_tokens)
+        return Completion(data, self.name, self.model, latency, prompt_tokens, completion_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.name, "model": self.model, "healthy": self.healthy(),
+                **self.health.snapshot(), "limiter": self.limiter.stats()}
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, api_key: str = GROQ_API_KEY, model: str = GROQ_MODEL):
+        super().__init__(model)
+        self.api_key = api_key
+        self.client = Groq(api_key=api_key)
+        self._async_clients = {}  # event loop -> AsyncGroq; its connection pool can't outlive the loop
+
+    def _async_client(self) -> AsyncGroq:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            for old in [l for l in self._async_clients if l.is_closed()]:
+                del self._async_clients[old]
+            client = self._async_clients[loop] = AsyncGroq(api_key=self.api_key)
+        return client
+
+    @staticmethod
+    def _unpack(completion, headers):
+        usage = getattr(completion, "usage", None)
+        return (completion.choices[0].message.content, getattr(usage, "prompt_tokens", None),
+                getattr(usage, "completion_tokens", None), headers)
+
+    def _call(self, prompt: str):
+        # with_raw_response exposes the x-ratelimit-* headers the limiter learns from
+        raw = self.client.chat.completions.with_raw_response.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+            response_format={"type": "json_object"},  # Groq supports JSON mode!
+        )
+        return self._unpack(raw.parse(), raw.headers)
+
+    async def _call_async(self, prompt: str):
+        raw = await self._async_client().chat.completions.with_raw_response.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+            response_format={"type": "json_object"},
+        )
+        # AsyncAPIResponse.parse() is a coroutine
+        return self._unpack(await raw.parse(), raw.headers)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: str = GEMINI_API_KEY, model: str = GEMINI_MODEL):
+        from google import genai  # Optional dependency (google-genai)
+        super().__init__(model)
+        self.client = genai.Client(api_key=api_key)
+        self._config = {"response_mime_type": "application/json"}
+
+    @staticmethod
+    def _unpack(response):
+        usage = getattr(response, "usage_metadata", None)
+        return (response.text, getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None), None)
+
+    def _call(self, prompt: str):
+        return self._unpack(self.client.models.generate_content(
+            model=self.model, contents=prompt, config=self._config))
+
+    async def _call_async(self, prompt: str):
+        return self._unpack(await self.client.aio.models.generate_content(
+            model=self.model, contents=prompt, config=self._config))
+
+
+class MockProviderError(Exception):
+    pass
+
+
+class MockProvider(LLMProvider):
+    """
+    Local stand-in for tests and offline runs: answers every prompt shape
+    AIService sends with placeholder JSON after a log-normal delay around
+    `latency` (so it has a tail worth hedging), failing `error_rate` of calls.
+    """
+
+    name = "mock"
+    DOC_ID_RE = re.compile(r'<document id="([^"]+)">')
+
+    def __init__(self, model: str = "mock-lead-analyst", latency: float = MOCK_LLM_LATENCY,
+                 error_rate: float = MOCK_LLM_ERROR_RATE, seed: Optional[int] = None):
+        super().__init__(model)
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+
+    def _answer(self, prompt: str) -> str:
+        lead = {"company_name": "Mock Company", "industry": "Mock", "description": "Placeholder lead from the mock provider",
+                "qualification_score": 5.0, "qualification_reasoning": "Mock answer", "industry_tags": [],
+                "sentiment_score": 0.5}
+        ids = self.DOC_ID_RE.findall(prompt)
+        if ids:
+            return json.dumps({"leads": [{"id": doc_id, **lead} for doc_id in ids]})
+        if "Brainstorm" in prompt:
+            return json.dumps({"leads": [{"title": "Mock Company", "link": "https://example.com",
+                                          "snippet": "Placeholder company from the mock provider"}]})
+        return json.dumps(lead)
+
+    def _delay(self) -> Tuple[float, bool]:
+        return self.latency * self._rng.lognormvariate(0, 0.5), self._rng.random() < self.error_rate
+
+    def _result(self, prompt: str, fail: bool):
+        if fail:
+            raise MockProviderError("mock provider failure")
+        answer = self._answer(prompt)
+        return answer, estimate_tokens(prompt), estimate_tokens(answer), None
+
+    def _call(self, prompt: str):
+        delay, fail = self._delay()
+        time.sleep(delay)
+        return self._result(prompt, fail)
+
+    async def _call_async(self, prompt: str):
+        delay, fail = self._delay()
+        await asyncio.sleep(delay)
+        return self._result(prompt, fail)
+
+
+PROVIDER_CLASSES = {"groq": GroqProvider, "gemini": GeminiProvider, "mock": MockProvider}
+PROVIDER_KEYS = {"groq": GROQ_API_KEY, "gemini": GEMINI_API_KEY, "mock": "local"}
+
+
+def build_providers(names: str = LLM_PROVIDERS) -> List[LLMProvider]:
+    """Providers from a comma-separated list, skipping those without a key or client library."""
+    providers = []
+    for name in (n.strip().lower() for n in names.split(",")):
+        if not name:
+            continue
+        if name not in PROVIDER_CLASSES:
+            log_event(f"⚠️ Unknown LLM provider '{name}', skipping", "WARNING")
+        elif not PROVIDER_KEYS[name]:
+            log_event(f"   LLM provider '{name}' has no API key, skipping")
+        else:
+            try:
+                providers.append(PROVIDER_CLASSES[name]())
+            except ImportError as e:
+                log_event(f"⚠️ LLM provider '{name}' unavailable: {e}", "WARNING")
+    return providers
+
+
+class _Race:
+    """
+    One routed request: when each provider's attempt actually went out, and
+    whether one has already answered. Late finishers are told they lost;
+    attempts still waiting for a slot when it's over are never sent.
+    """
+
+    def __init__(self, observer: Optional[Observer]):
+        self.observer = observer
+        self.won = False
+        self.sent_at: Dict[int, float] = {}  # id(provider) -> time.monotonic() when it got a slot
+
+    def start(self, provider: "LLMProvider") -> bool:
+        if self.won:
+            return False
+        self.sent_at[id(provider)] = time.monotonic()
+        return True
+
+    def hedge_timeout(self, provider: "LLMProvider") -> float:
+        """Seconds until `provider`'s attempt is past its hedge deadline; time queued locally doesn't count."""
+        sent_at = self.sent_at.get(id(provider))
+        if sent_at is None:
+            return HEDGE_POLL_INTERVAL  # Still waiting for a local slot: queued, not slow
+        return sent_at + LLMRouter.hedge_deadline(provider) - time.monotonic()
+
+    def observe(self, provider, latency, outcome, prompt_tokens, completion_tokens):
+        if self.observer:
+            if outcome == OUTCOME_OK and self.won:
+                outcome = OUTCOME_HEDGE_LOST
+            self.observer(provider, latency, outcome, prompt_tokens, completion_tokens)
+
+
+class LLMRouter:
+    """
+    Orders providers by health, then by rolling median latency (providers
+    with too few samples go first, so every backend gets measured), and
+    sends each request down that order: hedging to the next provider once
+    the current one has been sending for its p95 (time spent waiting for a
+    local rate-limit slot doesn't count), failing over to it on errors.
+    """
+
+    def __init__(self, providers: List[LLMProvider], hedge: bool = LLM_HEDGE_ENABLED):
+        if not providers:
+            raise ValueError("No LLM provider configured: set GROQ_API_KEY or GEMINI_API_KEY in .env "
+                             "(or LLM_PROVIDERS=mock)")
+        self.providers = providers
+        self.hedge = hedge and len(providers) > 1
+        self.hedges = 0
+        self._pool = ThreadPoolExecutor(max_workers=HEDGE_POOL_WORKERS, thread_name_prefix="llm-hedge") if self.hedge else None
+
+    @property
+    def cache_tag(self) -> str:
+        """Identifies the configured models, for cache keys."""
+        return "+".join(p.model for p in self.providers)
+
+    def ranked(self) -> List[LLMProvider]:
+        def key(indexed):
+            index, provider = indexed
+            stats = provider.health.snapshot()
+            measured = stats["samples"] >= MIN_SAMPLES and stats["p50"] is not None
+            return (not provider.healthy(), stats["p50"] if measured else 0.0, index)
+        return [p for _, p in sorted(enumerate(self.providers), key=key)]
+
+    @staticmethod
+    def hedge_deadline(provider: LLMProvider) -> float:
+        stats = provider.health.snapshot()
+        if stats["samples"] < MIN_SAMPLES or stats["p95"] is None:
+            return LLM_HEDGE_DEFAULT_DEADLINE
+        return max(LLM_HEDGE_MIN_DEADLINE, stats["p95"])
+
+    def complete(self, prompt: str, tokens: int, observer: Optional[Observer] = None) -> Completion:
+        queue = self.ranked()
+        race = _Race(observer)
+        if not self.hedge:
+            return self._failover(queue, lambda p: p.complete(prompt, tokens, race.observe))
+
+        pending, errors, hedged = {}, [], False
+
+        def launch():
+            provider = queue.pop(0)
+            pending[self._pool.submit(provider.complete, prompt, tokens, race.observe, race.start)] = provider
+
+        launch()
+        while pending:
+            primary = next(iter(pending.values()))
+            timeout = race.hedge_timeout(primary) if not hedged and queue and len(pending) == 1 else None
+            done, _ = wait(pending, timeout=max(0.0, timeout) if timeout is not None else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                if race.hedge_timeout(primary) <= 0:
+                    hedged = True
+                    self._log_hedge(primary, queue[0])
+                    launch()
+                continue
+            for future in done:
+                pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    if queue and not pending:
+                        launch()  # Fail over
+                    continue
+                # A hedge already sent keeps running (recorded as lost); one still queued is never sent
+                race.won = True
+                return result
+        raise errors[-1]
+
+    async def complete_async(self, prompt: str, tokens: int, observer: Optional[Observer] = None) -> Completion:
+        queue = self.ranked()
+        race = _Race(observer)
+        pending, errors, hedged = {}, [], False
+
+        def launch():
+            provider = queue.pop(0)
+            pending[asyncio.ensure_future(provider.complete_async(prompt, tokens, race.observe, race.start))] = provider
+
+        launch()
+        try:
+            while pending:
+                primary = next(iter(pending.values()))
+                timeout = None
+                if self.hedge and not hedged and queue and len(pending) == 1:
+                    timeout = max(0.0, race.hedge_timeout(primary))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if race.hedge_timeout(primary) <= 0:
+                        hedged = True
+                        self._log_hedge(primary, queue[0])
+                        launch()
+                    continue
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        if queue and not pending:
+                            launch()  # Fail over
+                        continue
+                    race.won = True
+                    return task.result()
+            raise errors[-1]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _failover(self, queue: List[LLMProvider], call: Callable[[LLMProvider], Completion]) -> Completion:
+        error = None
+        for provider in queue:
+            try:
+                return call(provider)
+            except Exception as e:
+                error = e
+        raise error or NoProviderAvailable("No LLM provider available")
+
+    def _log_hedge(self, slow: LLMProvider, backup: LLMProvider):
+        self.hedges += 1
+        log_event(f"   ⏱️ {slow.name} past its {self.hedge_deadline(slow):.1f}s p95, hedging with {backup.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hedging": self.hedge, "hedges": self.hedges, "providers": [p.stats() for p in self.ranked()]}
@@ -0,0 +1,127 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlite_store import SQLiteStore
+from config import LLM_LEDGER_DB_PATH
+
+OUTCOME_OK = "ok"
+OUTCOME_RATE_LIMITED = "rate_limited"
+OUTCOME_BAD_JSON = "bad_json"
+OUTCOME_ERROR = "error"
+OUTCOME_HEDGE_LOST = "hedge_lost"  # Answered, but the other hedged request answered first
+OUTCOME_CANCELLED = "cancelled"  # Hedged request abandoned once the other one answered
+
+# USD per million (prompt, completion) tokens; models not listed are counted at 0
+MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+
+GROUP_COLUMNS = {"day": "day", "run": "run_id", "operation": "operation", "model": "model"}
+
+
+def _utc_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+
+
+def call_cost(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return ((prompt_tokens or 0) * prompt_price + (completion_tokens or 0) * completion_price) / 1_000_000
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class LLMLedger(SQLiteStore):
+    """
+    One row per LLM request (hedges included): model, operation (analyze / batch / brainstorm),
+    token usage as reported by the provider, latency, which retry it was and
+    how it ended. Aggregated per run, per UTC day, per operation or per model.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            day TEXT NOT NULL,
+            run_id TEXT,
+            operation TEXT NOT NULL,
+            model TEXT NOT NULL,
+            documents INTEGER NOT NULL DEFAULT 1,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            latency_ms REAL NOT NULL,
+            attempt INTEGER NOT NULL DEFAULT 0,
+            outcome TEXT NOT NULL,
+            cost_usd REAL NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_llm_calls_day ON llm_calls(day);
+        CREATE INDEX IF NOT EXISTS idx_llm_calls_run ON llm_calls(run_id);
+    """
+
+    def __init__(self, db_path: str = LLM_LEDGER_DB_PATH):
+        super().__init__(db_path)
+
+    def record(self, operation: str, model: str, latency: float, outcome: str,
+               prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+               documents: int = 1, attempt: int = 0, run_id: Optional[str] = None):
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO llm_calls (ts, day, run_id, operation, model, documents, prompt_tokens, "
+            "completion_tokens, latency_ms, attempt, outcome, cost_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (now, _utc_day(now), run_id, operation, model, documents, prompt_tokens, completion_tokens,
+             round(latency * 1000, 1), attempt, outcome, call_cost(model, prompt_tokens, completion_tokens)),
+        )
+
+    def aggregate(self, group_by: str = "day", limit: int = 30, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Totals and latency percentiles for the `limit` most recent groups (day, run, operation or model)."""
+        column = GROUP_COLUMNS.get(group_by)
+        if column is None:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_COLUMNS)}")
+        where, params = ("WHERE run_id = ?", [run_id]) if run_id else ("", [])
+        conn = self._conn()
+        rows = conn.execute(
+            f"SELECT {column} AS grp, COUNT(*) AS calls, SUM(documents) AS documents, "
+            "COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens, "
+            "COALESCE(SUM(completion_tokens), 0) AS completion_tokens, "
+            "SUM(outcome = 'ok') AS ok, SUM(outcome = 'rate_limited') AS rate_limited, "
+            "SUM(outcome IN ('bad_json', 'error')) AS errors, SUM(outcome IN ('hedge_lost', 'cancelled')) AS hedges_lost, "
+            "SUM(attempt > 0) AS retries, "
+            "AVG(latency_ms) AS avg_latency_ms, SUM(cost_usd) AS cost_usd, "
+            "MIN(ts) AS first_call, MAX(ts) AS last_call "
+            f"FROM llm_calls {where} GROUP BY {column} ORDER BY MAX(ts) DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+
+        out = []
+        for row in rows:
+            latencies = [r[0] for r in conn.execute(
+                f"SELECT latency_ms FROM llm_calls WHERE {column} IS ? {'AND run_id = ?' if run_id else ''}",
+                [row["grp"]] + params,
+            )]
+            entry = {group_by: row["grp"], **{k: row[k] for k in row.keys() if k != "grp"}}
+            entry["avg_latency_ms"] = round(entry["avg_latency_ms"] or 0, 1)
+            entry["p50_latency_ms"] = _percentile(latencies, 50)
+            entry["p95_latency_ms"] = _percentile(latencies, 95)
+            entry["cost_usd"] = round(entry["cost_usd"] or 0, 6)
+            out.append(entry)
+        return out
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_llm_ledger() -> LLMLedger:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = LLMLedger()
+        return _ledger
@@ -2,72 +2,165 @@ from models import SearchQuery, Lead
 from database import DatabaseService
 from ai_service import AIService
 from search_service import SearchService
+from pipeline import LeadPipeline
+from checkpoint_store import CheckpointStore, RunCheckpoint, STAGE_ANALYZED, STAGE_SAVED
 from logger_util import log_event
-import time
+from url_utils import domain_key
+from lead_triage import triage_result, triage_content
+from config import AGENT_PIPELINE_MODE, TRIAGE_ENABLED, TRIAGE_RESULT_THRESHOLD, TRIAGE_CONTENT_THRESHOLD
+from typing import Optional, Callable
+import asyncio
 
 class LeadGenAgent:
     def __init__(self):
         self.db = DatabaseService()
         self.ai = AIService()
         self.search = SearchService()
+        self.checkpoints = CheckpointStore()
 
-    def run(self, query: SearchQuery):
+    def run(self, query: SearchQuery, progress: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Runs one lead generation pass and returns its counters.
+        `progress`, if given, is called with the counters whenever they change.
+        """
         log_event(f"Starting lead generation for: {query.industry} in {query.location}")
-        
+        summary = {"found": 0, "new": 0}
+        report = progress or (lambda counters: None)
+
+        # Pick up an interrupted run of the same query instead of paying for it twice
+        checkpoint = self.checkpoints.open_run(query)
+        self.ai.run_id = checkpoint.run_id
+        if checkpoint.resumed:
+            log_event(f"♻️ Resuming interrupted run {checkpoint.run_id}")
+
         # 1. Search for leads (3 pages = 30 results max)
-        all_results = []
-        base_search_term = f"{query.industry} companies in {query.location} {','.join(query.keywords)}"
-        
-        for page in range(3):
-            start_index = (page * 10) + 1
-            log_event(f"📄 Fetching page {page + 1}...")
-            page_results = self.search.search_leads(
-                base_search_term, 
-                start_index=start_index, 
-                ai_service=self.ai,
-                original_query=query
-            )
-            if not page_results:
-                break
-            all_results.extend(page_results)
-            time.sleep(1) # Polite delay betwen pages
-            
+        all_results = self._search_all(query, checkpoint)
         log_event(f"Found {len(all_results)} total raw results. Processing...")
-        
+        summary["found"] = len(all_results)
+
+        # Drop leads we already have with one bulk lookup instead of one per result
+        all_results = self._dedup_results(all_results)
+        summary["new"] = len(all_results)
+        if TRIAGE_ENABLED:
+            all_results = self._triage_results(all_results, query)
+            summary["triaged_out"] = summary["new"] - len(all_results)
+        report(dict(summary))
+
+        if AGENT_PIPELINE_MODE == "serial":
+            summary.update(self._process_serial(all_results, query, checkpoint))
+            report(dict(summary))
+        else:
+            # 2-4. Extract, analyze and save concurrently in bounded stages
+            pipeline = LeadPipeline(self.db, self.ai, self.search, checkpoint=checkpoint,
+                                    on_progress=lambda stats: report({**summary, **stats}))
+            stats = asyncio.run(pipeline.run(all_results, query))
+            log_event(f"🏁 Pipeline finished: {stats}")
+            summary.update(stats)
+
+        summary.update({name: n for name, n in self.ai.run_stats.items() if n})
+        checkpoint.complete()
+        return summary
+
+    def _search_all(self, query: SearchQuery, checkpoint: RunCheckpoint) -> list:
+        base_search_term = f"{query.industry} companies in {query.location} {','.join(query.keywords)}"
+        start_indexes = [(page * 10) + 1 for page in range(3)]
+
+        known_pages = {}
+        for start_index in start_indexes:
+            page_results = checkpoint.search_page(start_index)
+            if page_results is not None:
+                log_event(f"📄 Page starting at {start_index} restored from checkpoint")
+                known_pages[start_index] = page_results
+
+        # All pages are requested at once; results are merged and deduped by domain
+        log_event(f"📄 Fetching {len(start_indexes) - len(known_pages)} search page(s)...")
+        return self.search.search_leads_many(
+            base_search_term,
+            start_indexes=start_indexes,
+            ai_service=self.ai,
+            original_query=query,
+            known_pages=known_pages,
+            on_page=checkpoint.save_search_page
+        )
+
+    def _dedup_results(self, results: list) -> list:
+        existing = self.db.find_existing_websites(r.get('link') for r in results)
+        seen = set()
+        fresh = []
+        for result in results:
+            url = result.get('link')
+            key = domain_key(url)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            if url in existing:
+                log_event(f"Lead already exists: {url}")
+                continue
+            fresh.append(result)
+
+        log_event(f"{len(fresh)} new results after dedup ({len(results) - len(fresh)} skipped)")
+        return fresh
+
+    def _triage_results(self, results: list, query: SearchQuery) -> list:
+        """Drops results whose URL/title/snippet already show they aren't a company worth fetching."""
+        kept = []
+        for result in results:
+            triage = triage_result(result, query)
+            if triage.passes(TRIAGE_RESULT_THRESHOLD):
+                kept.append(result)
+            else:
+                log_event(f"   Triage skipped {result.get('link')}: {triage.explain()}")
+        log_event(f"🔎 {len(kept)} of {len(results)} results passed triage")
+        return kept
+
+    def _process_serial(self, all_results: list, query: SearchQuery, checkpoint: RunCheckpoint) -> dict:
+        saved = 0
         for result in all_results:
             url = result['link']
             log_event(f"Processing: {url}")
-            
-            # Check if already in DB
-            existing = self.db.get_lead_by_website(url)
-            if existing:
-                log_event(f"Lead already exists: {url}")
-                continue
-            
-            # 2. Extract content
-            content = self.search.extract_page_content(url)
-            
-            # 3. Analyze and Qualify (Use result snippet as fallback content if extraction fails)
-            if not content:
-                log_event(f"   Using search snippet for {url} (Extraction failed)")
-                content = f"Title: {result.get('title')}\nSnippet: {result.get('snippet')}"
-                
-            lead = self.ai.analyze_lead(content, query)
-            if not lead:
-                log_event(f"   Skipping {url} (AI analysis failed or rate limited)")
+            done = checkpoint.item(url)
+
+            if done and done["stage"] == STAGE_SAVED:
+                log_event(f"   Already saved earlier in this run: {url}")
                 continue
+            if done and done["stage"] == STAGE_ANALYZED:
+                log_event(f"   Restored analysis for {url} from checkpoint")
+                lead = done["lead"]
+            else:
+                # 2. Extract content
+                content = done["content"] if done else self.search.extract_page_content(url)
+                if content and not done and TRIAGE_ENABLED:
+                    triage = triage_content(content, query)
+                    if not triage.passes(TRIAGE_CONTENT_THRESHOLD):
+                        log_event(f"   Skipping {url} (triage score {triage.explain()})")
+                        continue
+
+                # 3. Analyze and Qualify (Use result snippet as fallback content if extraction fails)
+                if not content:
+                    log_event(f"   Using search snippet for {url} (Extraction failed)")
+                    content = f"Title: {result.get('title')}\nSnippet: {result.get('snippet')}"
+                if not done:
+                    checkpoint.mark_extracted(url, content)
+
+                lead = self.ai.analyze_lead(content, query)
+                if not lead:
+                    log_event(f"   Skipping {url} (AI analysis failed or rate limited)")
+                    continue
+
+                lead.website = url  # Ensure website is set
+                checkpoint.mark_analyzed(url, lead)
 
-            lead.website = url  # Ensure website is set
-            
             # 4. Save to DB
             if lead.qualification_score >= 0.0:  # Save EVERYTHING for testing
                 saved_lead = self.db.save_lead(lead)
+                if saved_lead:
+                    saved += 1
+                checkpoint.mark_saved(url)
                 log_event(f"✅ Saved lead: {lead.name} (Score: {lead.qualification_score})")
             else:
                 log_event(f"⏭️  Lead skipped (Low score: {lead.qualification_score})")
-            
-            # Rate limiting / Sleep to avoid blocking
-            time.sleep(2)
+
+        return {"saved": saved}
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,47 @@
+from database import DatabaseService
+from url_utils import domain_key
+
+def migrate_domain_key(page_size: int = 1000):
+    db = DatabaseService()
+
+    print("🚀 Backfilling domain_key for existing leads...")
+    # Oldest first, so the original lead keeps the key when a domain is duplicated.
+    # Paged: PostgREST caps a single response at its max-rows setting.
+    leads = []
+    offset = 0
+    while True:
+        response = db.supabase.table("leads").select("id, website, domain_key, created_at") \
+            .order("created_at").order("id").range(offset, offset + page_size - 1).execute()
+        rows = response.data or []
+        leads.extend(rows)
+        if len(rows) < page_size:
+            break
+        offset += page_size
+    print(f"Found {len(leads)} leads to check.")
+
+    claimed = {l['domain_key'] for l in leads if l.get('domain_key')}
+    updated_count = 0
+    duplicate_count = 0
+    for lead_data in leads:
+        if lead_data.get('domain_key'):
+            continue
+
+        key = domain_key(lead_data.get('website'))
+        if not key:
+            continue
+        if key in claimed:
+            print(f"⏭️ Duplicate domain {key} for lead {lead_data['id']} (left without key)")
+            duplicate_count += 1
+            continue
+
+        try:
+            db.supabase.table("leads").update({"domain_key": key}).eq("id", lead_data['id']).execute()
+            claimed.add(key)
+            updated_count += 1
+        except Exception as e:
+            print(f"❌ Error updating {lead_data['id']}: {e}")
+
+    print(f"🎉 Backfill complete! Updated {updated_count} leads, {duplicate_count} duplicates found.")
+
+if __name__ == "__main__":
+    migrate_domain_key()
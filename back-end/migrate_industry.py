@@ -1,11 +1,12 @@
+from datetime import datetime, timezone
 from database import DatabaseService
 from ai_service import AIService
 from models import SearchQuery
-import time
 
 def migrate_industry():
     db = DatabaseService()
     ai = AIService()
+    ai.run_id = f"migrate_industry-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}"
     
     print("🚀 Starting industry migration for existing leads...")
     leads = db.list_leads(limit=1000)
@@ -41,10 +42,10 @@ def migrate_industry():
             except Exception as e:
                 print(f"❌ Error enriching {lead_id}: {e}")
             
-            # Rate limiting / Sleep
-            time.sleep(1)
-            
     print(f"🎉 Migration complete! Updated {updated_count} leads.")
+    stats = ai.run_stats
+    print(f"🧮 LLM usage ({ai.run_id}): {stats['llm_calls']} calls, {stats['prompt_tokens']} prompt + "
+          f"{stats['completion_tokens']} completion tokens, {stats['llm_cache_hits']} cache hits")
 
 if __name__ == "__main__":
     migrate_industry()
@@ -0,0 +1,15 @@
+-- Migration: Canonical domain key for lead dedup
+-- `https://acme.com/`, `http://www.acme.com/about` and `acme.com?utm=x` all share domain_key 'acme.com'.
+
+ALTER TABLE public.leads 
+ADD COLUMN IF NOT EXISTS domain_key TEXT;
+
+-- UNIQUE allows multiple NULLs, so legacy rows can be backfilled afterwards
+-- with `python migrate_domain_key.py` (duplicates beyond the oldest keep NULL).
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'leads_domain_key_key') THEN
+        ALTER TABLE public.leads
+        ADD CONSTRAINT leads_domain_key_key UNIQUE (domain_key);
+    END IF;
+END $$;
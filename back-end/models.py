@@ -6,6 +6,7 @@ class Lead(BaseModel):
     name: str
     company: Optional[str] = None
     website: Optional[str] = None
+    domain_key: Optional[str] = None  # Registrable domain of website, unique per lead
     email: Optional[str] = None
     phone: Optional[str] = None
     linkedin_url: Optional[str] = None
@@ -0,0 +1,123 @@
+"""
+Ranks a site's internal links (and sitemap entries) to find the pages most
+likely to hold contact details or decision-makers: contact, team/leadership
+and about pages.
+"""
+import html
+import re
+from typing import Iterable, List, NamedTuple, Tuple
+from urllib.parse import urljoin, urlsplit
+from url_utils import domain_key
+
+# kind -> (phrases, weight). Phrases match anchor text; their slug form matches URL paths.
+PAGE_KINDS = {
+    "contact": (("contact", "get in touch", "reach us", "kontakt", "contacto"), 10.0),
+    "team": (("team", "leadership", "management", "our people", "founders", "executives", "board", "staff"), 9.0),
+    "about": (("about", "who we are", "company", "our story", "impressum", "imprint"), 7.0),
+}
+PATH_WEIGHT = 0.8  # URL path evidence counts a bit less than anchor text
+SITEMAP_BONUS = 0.5
+SKIP_PATH_RE = re.compile(
+    r"/(?:blog|news|press|careers?|jobs|privacy|terms|legal|cookies?|login|signin|signup|register|cart|checkout|tag|category)(?:/|$)"
+    r"|\.(?:pdf|jpe?g|png|gif|svg|webp|zip|docx?|xlsx?|pptx?|mp4|mp3)$",
+    re.I,
+)
+SITEMAP_LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.I)
+
+# Precompiled per kind: phrases at a word start in anchor text, or at a segment start in the path
+_KIND_PATTERNS = {
+    kind: (
+        re.compile(r"\b(?:" + "|".join(re.escape(p) for p in phrases) + ")", re.I),
+        re.compile(r"(?:^|[/_.-])(?:" + "|".join(re.escape(p.replace(" ", "-")) for p in phrases) + ")", re.I),
+        weight,
+    )
+    for kind, (phrases, weight) in PAGE_KINDS.items()
+}
+
+
+def _page_key(url: str) -> str:
+    """Identity of a page regardless of scheme, www. prefix, fragment or trailing slash."""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    host = host[4:] if host.startswith("www.") else host
+    return f"{host}{parts.path.rstrip('/')}?{parts.query}"
+
+
+class Candidate(NamedTuple):
+    score: float
+    url: str
+    kind: str
+
+
+def score_link(url: str, anchor_text: str = "") -> Tuple[float, str]:
+    """(score, kind) for one URL; score 0 means not interesting."""
+    parts = urlsplit(url)
+    path = parts.path.lower()
+    if SKIP_PATH_RE.search(path):
+        return 0.0, ""
+
+    best, best_kind = 0.0, ""
+    for kind, (anchor_re, path_re, weight) in _KIND_PATTERNS.items():
+        score = 0.0
+        if anchor_text and anchor_re.search(anchor_text):
+            score += weight
+        if path_re.search(path):
+            score += weight * PATH_WEIGHT
+        if score > best:
+            best, best_kind = score, kind
+    if best:
+        depth = len([seg for seg in path.split("/") if seg])
+        best -= max(0, depth - 2) * 0.5  # Deep pages are rarely the canonical contact/team page
+    return max(best, 0.0), best_kind
+
+
+def parse_sitemap(xml: str) -> List[str]:
+    """Page URLs listed in a sitemap (nested sitemap-index entries are skipped)."""
+    urls = (html.unescape(loc) for loc in SITEMAP_LOC_RE.findall(xml))
+    return [u for u in urls if not u.lower().split("?", 1)[0].endswith((".xml", ".xml.gz"))]
+
+
+def rank_links(base_url: str, links: Iterable[Tuple[str, str]], sitemap_urls: Iterable[str] = (),
+               top_k: int = 3, min_score: float = 4.0) -> List[Candidate]:
+    """
+    Top `top_k` internal pages worth fetching, best of each kind first (so a
+    strong contact link doesn't crowd out the team page), then by score.
+    """
+    site = domain_key(base_url)
+    base = _page_key(base_url)
+    scored = {}
+
+    def consider(url: str, anchor: str):
+        url = url.split("#", 1)[0]
+        key = _page_key(url)
+        if not url.startswith(("http://", "https://")) or key == base:
+            return
+        if domain_key(url) != site:
+            return
+        score, kind = score_link(url, anchor)
+        if score <= 0:
+            return
+        if key not in scored or score > scored[key].score:
+            scored[key] = Candidate(score, url, kind)
+
+    for href, anchor in links:
+        href = (href or "").strip()
+        if href and not href.lower().startswith(("mailto:", "tel:", "javascript:", "#")):
+            consider(urljoin(base_url, href), anchor)
+    linked = set(scored)
+    for url in sitemap_urls:
+        key = _page_key(url)
+        if key in linked:  # Linked and listed in the sitemap: a real, maintained page
+            linked.discard(key)
+            scored[key] = scored[key]._replace(score=scored[key].score + SITEMAP_BONUS)
+        else:
+            consider(url, "")
+
+    ranked = sorted((c for c in scored.values() if c.score >= min_score), key=lambda c: -c.score)
+    picked, kinds = [], set()
+    for c in ranked:
+        if c.kind not in kinds:
+            picked.append(c)
+            kinds.add(c.kind)
+    picked += [c for c in ranked if c not in picked]
+    return sorted(picked[:top_k], key=lambda c: -c.score)
@@ -0,0 +1,114 @@
+"""
+Company facts a site publishes about itself in machine-readable form:
+schema.org JSON-LD (Organization and its subtypes) and OpenGraph / meta tags.
+Read straight from the raw HTML, since html_text drops <script> and <head>.
+"""
+import html
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+JSON_LD_RE = re.compile(
+    r"<script[^>]+type\s*=\s*[\"']application/ld\+json[\"'][^>]*>(.*?)</script>", re.I | re.S
+)
+META_TAG_RE = re.compile(r"<meta\s[^>]*>", re.I)
+META_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+ORGANIZATION_TYPES = {
+    "organization", "corporation", "localbusiness", "professionalservice", "onlinebusiness",
+    "ngo", "educationalorganization", "medicalorganization", "store", "softwarecompany",
+}
+MAX_DESCRIPTION_CHARS = 300
+
+
+@dataclass
+class PageMetadata:
+    name: Optional[str] = None
+    description: Optional[str] = None
+    url: Optional[str] = None
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+    same_as: List[str] = field(default_factory=list)  # Profile URLs the site links as "the same entity"
+
+    def links(self) -> List[tuple]:
+        """As (href, anchor) links, so extract_contacts can normalize them with everything else."""
+        return ([(f"mailto:{e}", "") for e in self.emails] + [(f"tel:{p}", "") for p in self.phones]
+                + [(u, "") for u in self.same_as])
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _text(value) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("@value")
+    if not isinstance(value, str):
+        return None
+    value = " ".join(html.unescape(value).split())
+    return value or None
+
+
+def _types(node: Dict) -> List[str]:
+    return [str(t).lower().rsplit("/", 1)[-1] for t in _as_list(node.get("@type"))]
+
+
+def _json_ld_nodes(raw_html: str) -> Iterable[Dict]:
+    for block in JSON_LD_RE.findall(raw_html):
+        try:
+            data = json.loads(block.strip())
+        except ValueError:
+            continue
+        stack = _as_list(data)
+        while stack:
+            node = stack.pop(0)
+            if not isinstance(node, dict):
+                continue
+            yield node
+            stack.extend(_as_list(node.get("@graph")))
+            for key in ("publisher", "provider", "author", "brand", "parentOrganization"):
+                stack.extend(n for n in _as_list(node.get(key)) if isinstance(n, dict))
+
+
+def _meta_tags(raw_html: str) -> Dict[str, str]:
+    tags = {}
+    for tag in META_TAG_RE.findall(raw_html):
+        attrs = {k.lower(): a if a else b for k, a, b in META_ATTR_RE.findall(tag)}
+        name = (attrs.get("property") or attrs.get("name") or "").lower()
+        if name and attrs.get("content") and name not in tags:
+            tags[name] = _text(attrs["content"])
+    return tags
+
+
+def extract_metadata(raw_html: str) -> PageMetadata:
+    """Organization facts from JSON-LD, falling back to OpenGraph / meta tags for name and description."""
+    meta = PageMetadata()
+    if not raw_html:
+        return meta
+
+    for node in _json_ld_nodes(raw_html):
+        if not ORGANIZATION_TYPES.intersection(_types(node)):
+            continue
+        meta.name = meta.name or _text(node.get("legalName")) or _text(node.get("name"))
+        meta.description = meta.description or _text(node.get("description"))
+        meta.url = meta.url or _text(node.get("url"))
+        points = [node] + [p for p in _as_list(node.get("contactPoint")) if isinstance(p, dict)]
+        for point in points:
+            meta.emails += [e for e in (_text(v) for v in _as_list(point.get("email"))) if e]
+            meta.phones += [p for p in (_text(v) for v in _as_list(point.get("telephone"))) if p]
+        meta.same_as += [u for u in (_text(v) for v in _as_list(node.get("sameAs"))) if u]
+
+    tags = _meta_tags(raw_html)
+    meta.name = meta.name or tags.get("og:site_name") or tags.get("application-name")
+    meta.description = meta.description or tags.get("og:description") or tags.get("description")
+    meta.url = meta.url or tags.get("og:url")
+    handle = tags.get("twitter:site") or ""
+    if handle.startswith("@") and len(handle) > 1:
+        meta.same_as.append(f"https://twitter.com/{handle[1:]}")
+
+    meta.emails = [e[7:] if e.lower().startswith("mailto:") else e for e in meta.emails]
+    if meta.description:
+        meta.description = meta.description[:MAX_DESCRIPTION_CHARS]
+    return meta
@@ -0,0 +1,261 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Callable
+from models import SearchQuery
+from logger_util import log_event
+from checkpoint_store import RunCheckpoint, STAGE_ANALYZED, STAGE_SAVED
+from config import (
+    PIPELINE_FETCH_CONCURRENCY,
+    PIPELINE_ANALYZE_CONCURRENCY,
+    PIPELINE_PERSIST_CONCURRENCY,
+    PIPELINE_QUEUE_SIZE,
+    AI_BATCH_MAX_DOCS,
+    AI_BATCH_LINGER,
+    AI_ASYNC_ENABLED,
+    AI_MAX_IN_FLIGHT,
+    TRIAGE_ENABLED,
+    TRIAGE_CONTENT_THRESHOLD,
+)
+from lead_triage import triage_content
+
+# Sentinel pushed once per worker to tell it the stage is drained
+_STOP = object()
+
+
+class LeadPipeline:
+    """
+    Staged asyncio pipeline for processing search results:
+
+        fetch (extract_page_content + triage) -> analyze (AI) -> persist (DB)
+
+    Each stage has its own pool of workers connected by bounded queues, so the
+    concurrency limit of every upstream (websites, LLM providers, Supabase) is enforced
+    per stage instead of by sleeping between leads. The services are blocking,
+    so stage work runs on a thread pool sized to the sum of the stage limits
+    (asyncio's default executor is capped at a handful of threads on small dynos).
+
+    One batcher feeds the analyze stage: it collects up to AI_BATCH_MAX_DOCS
+    documents (whatever is queued, plus anything arriving within
+    AI_BATCH_LINGER seconds) and hands each batch to
+    AIService.analyze_leads_batch as its own task, with at most
+    `analyze_concurrency` batches in flight. Fetched pages thus turn into
+    fewer, larger LLM requests. With AI_ASYNC_ENABLED the batches await the
+    provider clients directly, AI_MAX_IN_FLIGHT of them by default, and each
+    provider's rate-limit headers decide how many requests are actually sent.
+
+    Results are expected to be deduplicated against the DB beforehand. With a
+    checkpoint, work finished by an interrupted attempt is reused, not repeated.
+    """
+
+    def __init__(self, db, ai, search,
+                 fetch_concurrency: int = PIPELINE_FETCH_CONCURRENCY,
+                 analyze_concurrency: Optional[int] = None,
+                 persist_concurrency: int = PIPELINE_PERSIST_CONCURRENCY,
+                 queue_size: int = PIPELINE_QUEUE_SIZE,
+                 checkpoint: Optional[RunCheckpoint] = None,
+                 on_progress: Optional[Callable[[Dict[str, int]], None]] = None):
+        self.db = db
+        self.ai = ai
+        self.search = search
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.async_ai = AI_ASYNC_ENABLED and hasattr(ai, "analyze_leads_batch_async")
+        if analyze_concurrency is None:
+            analyze_concurrency = AI_MAX_IN_FLIGHT if self.async_ai else PIPELINE_ANALYZE_CONCURRENCY
+        self.analyze_concurrency = max(1, analyze_concurrency)
+        self.persist_concurrency = max(1, persist_concurrency)
+        self.queue_size = max(1, queue_size)
+        self.checkpoint = checkpoint
+        self.on_progress = on_progress
+        self.stats = {}
+
+    async def run(self, results: List[Dict], query: SearchQuery) -> Dict[str, int]:
+        """Runs all results through the pipeline and returns per-stage counters."""
+        self.stats = {"total": len(results), "fetched": 0, "skipped": 0,
+                      "analyzed": 0, "failed": 0, "saved": 0}
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.fetch_concurrency + (0 if self.async_ai else self.analyze_concurrency)
+            + self.persist_concurrency,
+            thread_name_prefix="lead-pipeline",
+        )
+        fetch_q = asyncio.Queue(maxsize=self.queue_size)
+        analyze_q = asyncio.Queue(maxsize=self.queue_size)
+        persist_q = asyncio.Queue(maxsize=self.queue_size)
+
+        fetchers = [asyncio.create_task(self._fetch_worker(fetch_q, analyze_q, query))
+                    for _ in range(self.fetch_concurrency)]
+        analyzers = [asyncio.create_task(self._analyze_stage(analyze_q, persist_q, query))]
+        persisters = [asyncio.create_task(self._persist_worker(persist_q))
+                      for _ in range(self.persist_concurrency)]
+
+        try:
+            for result in results:
+                await fetch_q.put(result)
+
+            # Drain stages in order so downstream workers only stop once upstream is done
+            await self._close_stage(fetch_q, fetchers)
+            await self._close_stage(analyze_q, analyzers)
+            await self._close_stage(persist_q, persisters)
+        finally:
+            for task in fetchers + analyzers + persisters:
+                if not task.done():
+                    task.cancel()
+            self._executor.shutdown(wait=False)
+
+        return self.stats
+
+    async def _in_thread(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _bump(self, counter: str):
+        self.stats[counter] += 1
+        if self.on_progress:
+            try:
+                self.on_progress(dict(self.stats))
+            except Exception as e:
+                log_event(f"⚠️ Progress callback failed: {e}", "WARNING")
+
+    async def _close_stage(self, queue: asyncio.Queue, workers: List[asyncio.Task]):
+        for _ in workers:
+            await queue.put(_STOP)
+        await asyncio.gather(*workers)
+
+    async def _fetch_worker(self, inbox: asyncio.Queue, outbox: asyncio.Queue, query: SearchQuery):
+        while True:
+            result = await inbox.get()
+            if result is _STOP:
+                return
+            try:
+                url = result['link']
+                log_event(f"Processing: {url}")
+
+                done = self.checkpoint.item(url) if self.checkpoint else None
+                if done and done["stage"] == STAGE_SAVED:
+                    log_event(f"   Already saved earlier in this run: {url}")
+                    continue
+                if done:
+                    lead = done["lead"] if done["stage"] == STAGE_ANALYZED else None
+                    self._bump("fetched")
+                    await outbox.put((url, done["content"], lead))
+                    continue
+
+                content = await self._in_thread(self.search.extract_page_content, url)
+                if content and TRIAGE_ENABLED:
+                    triage = triage_content(content, query)
+                    if not triage.passes(TRIAGE_CONTENT_THRESHOLD):
+                        log_event(f"   Skipping {url} (triage score {triage.explain()})")
+                        self._bump("skipped")
+                        continue
+                if not content:
+                    log_event(f"   Using search snippet for {url} (Extraction failed)")
+                    content = f"Title: {result.get('title')}\nSnippet: {result.get('snippet')}"
+
+                if self.checkpoint:
+                    self.checkpoint.mark_extracted(url, content)
+                self._bump("fetched")
+                await outbox.put((url, content, None))
+            except Exception as e:
+                log_event(f"❌ Fetch stage error for {result.get('link')}: {e}", "ERROR")
+                self._bump("failed")
+
+    async def _next_batch(self, inbox: asyncio.Queue):
+        """Returns (batch, stopping): one item, then whatever queues up within AI_BATCH_LINGER."""
+        item = await inbox.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        linger_until = loop.time() + AI_BATCH_LINGER
+        while len(batch) < AI_BATCH_MAX_DOCS:
+            if inbox.empty():
+                remaining = linger_until - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(inbox.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = inbox.get_nowait()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _analyze_stage(self, inbox: asyncio.Queue, outbox: asyncio.Queue, query: SearchQuery):
+        slots = asyncio.Semaphore(self.analyze_concurrency)
+        running = set()
+
+        def finished(task: asyncio.Task):
+            running.discard(task)
+            slots.release()
+
+        stopping = False
+        while not stopping:
+            # Only collect the next batch once it can be sent, so a backlog makes it bigger
+            await slots.acquire()
+            batch, stopping = await self._next_batch(inbox)
+            if not batch:
+                slots.release()
+                continue
+            task = asyncio.create_task(self._analyze_batch(batch, outbox, query))
+            running.add(task)
+            task.add_done_callback(finished)
+        await asyncio.gather(*running)
+
+    async def _analyze_batch(self, batch: List, outbox: asyncio.Queue, query: SearchQuery):
+        pending = []
+        for url, content, lead in batch:
+            if lead is not None:
+                log_event(f"   Restored analysis for {url} from checkpoint")
+                self._bump("analyzed")
+                await outbox.put(lead)
+            else:
+                pending.append((url, content))
+        if not pending:
+            return
+
+        try:
+            contents = [c for _, c in pending]
+            if self.async_ai:
+                leads = await self.ai.analyze_leads_batch_async(contents, query)
+            else:
+                leads = await self._in_thread(self.ai.analyze_leads_batch, contents, query)
+        except Exception as e:
+            log_event(f"❌ Analyze stage error for {len(pending)} lead(s): {e}", "ERROR")
+            leads = [None] * len(pending)
+
+        for (url, _), lead in zip(pending, leads):
+            try:
+                if not lead:
+                    log_event(f"   Skipping {url} (AI analysis failed or rate limited)")
+                    self._bump("failed")
+                    continue
+
+                lead.website = url  # Ensure website is set
+                if self.checkpoint:
+                    self.checkpoint.mark_analyzed(url, lead)
+                self._bump("analyzed")
+                await outbox.put(lead)
+            except Exception as e:
+                log_event(f"❌ Analyze stage error for {url}: {e}", "ERROR")
+                self._bump("failed")
+
+    async def _persist_worker(self, inbox: asyncio.Queue):
+        while True:
+            lead = await inbox.get()
+            if lead is _STOP:
+                return
+            try:
+                if lead.qualification_score >= 0.0:  # Save EVERYTHING for testing
+                    saved = await self._in_thread(self.db.save_lead, lead)
+                    if saved:
+                        self._bump("saved")
+                        log_event(f"✅ Saved lead: {lead.name} (Score: {lead.qualification_score})")
+                    if self.checkpoint:
+                        self.checkpoint.mark_saved(lead.website)
+                else:
+                    log_event(f"⏭️  Lead skipped (Low score: {lead.qualification_score})")
+            except Exception as e:
+                log_event(f"❌ Persist stage error for {lead.website}: {e}", "ERROR")
+                self._bump("failed")
@@ -0,0 +1,137 @@
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any
+from sqlite_store import SQLiteStore
+from config import QUOTA_DB_PATH, CSE_DAILY_QUOTA, CSE_LOW_PRIORITY_RESERVE
+
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+def _utc_day() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class QuotaLedger(SQLiteStore):
+    """
+    Persisted per-UTC-day ledger of calls against a metered API. Callers
+    reserve units before spending them, so concurrent runs (API and workers)
+    can plan against the same budget. Low-priority reservations are refused
+    once the remaining budget drops below `low_priority_reserve`.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS quota_usage (
+            day TEXT NOT NULL,
+            api TEXT NOT NULL,
+            used INTEGER NOT NULL DEFAULT 0,
+            reserved INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, api)
+        );
+    """
+
+    def __init__(self, api: str = "google_cse", daily_limit: int = CSE_DAILY_QUOTA,
+                 low_priority_reserve: int = CSE_LOW_PRIORITY_RESERVE, db_path: str = QUOTA_DB_PATH):
+        super().__init__(db_path)
+        self.api = api
+        self.daily_limit = daily_limit
+        self.low_priority_reserve = low_priority_reserve
+
+    def _row(self, conn, day: str):
+        conn.execute("INSERT OR IGNORE INTO quota_usage (day, api) VALUES (?, ?)", (day, self.api))
+        return conn.execute(
+            "SELECT used, reserved FROM quota_usage WHERE day = ? AND api = ?", (day, self.api)
+        ).fetchone()
+
+    def status(self) -> Dict[str, Any]:
+        day = _utc_day()
+        row = self._row(self._conn(), day)
+        return {
+            "api": self.api,
+            "day": day,
+            "daily_limit": self.daily_limit,
+            "used": row["used"],
+            "reserved": row["reserved"],
+            "remaining": max(0, self.daily_limit - row["used"] - row["reserved"]),
+            "low_priority_reserve": self.low_priority_reserve,
+        }
+
+    def reserve(self, units: int, priority: str = PRIORITY_NORMAL) -> "Reservation":
+        """Reserves up to `units` for today; the returned Reservation may hold fewer (or none)."""
+        day = _utc_day()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._row(conn, day)
+            available = self.daily_limit - row["used"] - row["reserved"]
+            if priority == PRIORITY_LOW:
+                available -= self.low_priority_reserve
+            granted = max(0, min(units, available))
+            if granted:
+                conn.execute(
+                    "UPDATE quota_usage SET reserved = reserved + ? WHERE day = ? AND api = ?",
+                    (granted, day, self.api),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return Reservation(self, day, granted, priority)
+
+    def _settle(self, day: str, spent: int, released: int):
+        self._conn().execute(
+            "UPDATE quota_usage SET used = used + ?, reserved = MAX(0, reserved - ? - ?) WHERE day = ? AND api = ?",
+            (spent, spent, released, day, self.api),
+        )
+
+    def mark_exhausted(self):
+        """Upstream says the quota is gone (HTTP 429): stop everyone spending for the rest of the day."""
+        day = _utc_day()
+        conn = self._conn()
+        self._row(conn, day)
+        # The whole limit counts as used, so units released by open reservations don't free budget again
+        conn.execute(
+            "UPDATE quota_usage SET used = MAX(used, ?) WHERE day = ? AND api = ?",
+            (self.daily_limit, day, self.api),
+        )
+
+
+class Reservation:
+    """
+    Units reserved from a QuotaLedger. Call spend() right before each billable
+    request; unspent units go back to the budget when the reservation closes.
+    """
+
+    def __init__(self, ledger: QuotaLedger, day: str, granted: int, priority: str):
+        self.ledger = ledger
+        self.day = day
+        self.granted = granted
+        self.priority = priority
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def spend(self):
+        with self._lock:
+            if self.spent >= self.granted:
+                raise QuotaExhausted(
+                    f"{self.ledger.api} daily budget exhausted for {self.priority}-priority calls"
+                )
+            self.spent += 1
+        self.ledger._settle(self.day, 1, 0)
+
+    def close(self):
+        with self._lock:
+            unspent = self.granted - self.spent
+            self.granted = self.spent
+        if unspent:
+            self.ledger._settle(self.day, 0, unspent)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
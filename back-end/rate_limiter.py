@@ -0,0 +1,248 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+from config import (
+    RATE_LIMIT_GOOGLE_CSE_PER_SEC, RATE_LIMIT_GOOGLE_CSE_BURST,
+    RATE_LIMIT_GROQ_PER_SEC, RATE_LIMIT_GROQ_BURST,
+    RATE_LIMIT_GEMINI_PER_SEC, RATE_LIMIT_GEMINI_BURST,
+    RATE_LIMIT_LINKEDIN_PER_SEC, RATE_LIMIT_LINKEDIN_BURST,
+    RATE_LIMIT_HTTP_PER_DOMAIN_PER_SEC, RATE_LIMIT_HTTP_PER_DOMAIN_BURST, RATE_LIMIT_HTTP_MAX_HOSTS,
+    AI_MAX_IN_FLIGHT, AI_INITIAL_IN_FLIGHT,
+)
+
+# Named budgets: (tokens refilled per second, bucket capacity)
+BUCKET_LIMITS: Dict[str, Tuple[float, int]] = {
+    "google_cse": (RATE_LIMIT_GOOGLE_CSE_PER_SEC, RATE_LIMIT_GOOGLE_CSE_BURST),
+    "groq": (RATE_LIMIT_GROQ_PER_SEC, RATE_LIMIT_GROQ_BURST),
+    "gemini": (RATE_LIMIT_GEMINI_PER_SEC, RATE_LIMIT_GEMINI_BURST),
+    "mock": (1000.0, 1000),
+    "linkedin": (RATE_LIMIT_LINKEDIN_PER_SEC, RATE_LIMIT_LINKEDIN_BURST),
+}
+HTTP_DOMAIN_LIMIT = (RATE_LIMIT_HTTP_PER_DOMAIN_PER_SEC, RATE_LIMIT_HTTP_PER_DOMAIN_BURST)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve tokens up front and then wait
+    out any deficit, so concurrent callers queue fairly without polling and
+    only pay a delay once the budget is actually exhausted.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Takes `tokens` (possibly going into debt) and returns how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, tokens: float = 1):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1):
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Blocks the bucket for `seconds`, e.g. when upstream answers 429 with Retry-After."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_host_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()  # Least recently used first
+_registry_lock = threading.Lock()
+
+
+def get_bucket(name: str) -> TokenBucket:
+    """Returns the process-wide bucket for `name`, creating it from BUCKET_LIMITS on first use."""
+    if name not in BUCKET_LIMITS:
+        return _host_bucket(name)
+    bucket = _buckets.get(name)
+    if bucket is None:
+        with _registry_lock:
+            bucket = _buckets.get(name)
+            if bucket is None:
+                rate, capacity = BUCKET_LIMITS[name]
+                bucket = _buckets[name] = TokenBucket(rate, capacity)
+    return bucket
+
+
+def _host_bucket(name: str) -> TokenBucket:
+    """Per-host bucket; only the RATE_LIMIT_HTTP_MAX_HOSTS most recently used hosts are kept."""
+    with _registry_lock:
+        bucket = _host_buckets.get(name)
+        if bucket is None:
+            bucket = _host_buckets[name] = TokenBucket(*HTTP_DOMAIN_LIMIT)
+            # A host idle long enough to be dropped has refilled, so a fresh bucket behaves the same
+            while len(_host_buckets) > RATE_LIMIT_HTTP_MAX_HOSTS:
+                _host_buckets.popitem(last=False)
+        else:
+            _host_buckets.move_to_end(name)
+        return bucket
+
+
+# "1m30.5s", "7.66s", "250ms", "2h" -> seconds
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from a rate-limit reset header (plain seconds or Go-style durations)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limiter for an API that reports its own budget in
+    `x-ratelimit-remaining-{requests,tokens}` / `x-ratelimit-reset-*` headers.
+
+    A request starts only if the last reported budget, minus what is already
+    in flight, still covers it; otherwise it waits for the reported reset.
+    The number of requests in flight grows by one per round of successful
+    responses (up to `max_in_flight`) and halves on a 429, whose `retry-after`
+    pauses every caller. Thread-safe, with sync and async acquire.
+    """
+
+    POLL_INTERVAL = 0.05  # How often a caller waiting for a free slot re-checks
+
+    def __init__(self, max_in_flight: int = AI_MAX_IN_FLIGHT, initial_in_flight: int = AI_INITIAL_IN_FLIGHT):
+        self.max_in_flight = max(1, max_in_flight)
+        self.limit = float(min(max(1, initial_in_flight), self.max_in_flight))
+        self.in_flight = 0
+        self.reserved_tokens = 0
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.paused_until = 0.0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    def _try_start(self, tokens: int) -> float:
+        """Claims a slot and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            if self.paused_until > now:
+                return self.paused_until - now
+            if self.remaining_requests is not None and now >= self.requests_reset_at:
+                self.remaining_requests = None  # Reported window is over; budget is refilled
+            if self.remaining_tokens is not None and now >= self.tokens_reset_at:
+                self.remaining_tokens = None
+
+            if self.in_flight >= int(self.limit):
+                return self.POLL_INTERVAL
+            if self.remaining_requests is not None and self.remaining_requests - self.in_flight < 1:
+                return self.requests_reset_at - now
+            if (self.remaining_tokens is not None and self.in_flight
+                    and self.remaining_tokens - self.reserved_tokens < tokens):
+                # Let one request through regardless, so an oversized one can't wait forever
+                return min(self.tokens_reset_at - now, self.POLL_INTERVAL * 20)
+            self.in_flight += 1
+            self.reserved_tokens += tokens
+            return 0.0
+
+    def acquire(self, tokens: int = 0):
+        while True:
+            wait = self._try_start(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0):
+        while True:
+            wait = self._try_start(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, tokens: int = 0, headers: Optional[Mapping[str, str]] = None,
+                rate_limited: bool = False, retry_after: Optional[float] = None):
+        """Ends a request started with acquire, learning from the response headers."""
+        with self._lock:
+            now = time.monotonic()
+            self.in_flight = max(0, self.in_flight - 1)
+            self.reserved_tokens = max(0, self.reserved_tokens - tokens)
+            if headers:
+                self._update(headers, now)
+            if rate_limited:
+                self.rate_limited += 1
+                self.limit = max(1.0, self.limit / 2)
+                wait = retry_after if retry_after is not None else parse_duration(
+                    (headers or {}).get("retry-after"))
+                self.paused_until = max(self.paused_until, now + (wait if wait is not None else 5.0))
+            elif headers:
+                self.limit = min(float(self.max_in_flight), self.limit + 1 / self.limit)
+
+    def _update(self, headers: Mapping[str, str], now: float):
+        for kind in ("requests", "tokens"):
+            try:
+                remaining = int(float(headers.get(f"x-ratelimit-remaining-{kind}")))
+            except (TypeError, ValueError):
+                continue
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            setattr(self, f"remaining_{kind}", remaining)
+            setattr(self, f"{kind}_reset_at", now + (reset if reset is not None else 60.0))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "remaining_requests": self.remaining_requests,
+                "remaining_tokens": self.remaining_tokens,
+                "rate_limited": self.rate_limited,
+            }
+
+
+_adaptive: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_adaptive_limiter(name: str) -> AdaptiveLimiter:
+    """Process-wide header-driven limiter for the upstream `name` (e.g. "groq")."""
+    with _registry_lock:
+        limiter = _adaptive.get(name)
+        if limiter is None:
+            limiter = _adaptive[name] = AdaptiveLimiter()
+        return limiter
+
+
+def domain_bucket_name(url: str) -> str:
+    """Bucket name for per-host politeness when fetching `url`."""
+    return f"http:{(urlsplit(url).hostname or '').lower()}"
+
+
+def acquire(name: str, tokens: float = 1):
+    get_bucket(name).acquire(tokens)
+
+
+async def acquire_async(name: str, tokens: float = 1):
+    await get_bucket(name).acquire_async(tokens)
@@ -1,12 +1,64 @@
 import requests
-from typing import List, Dict
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Callable, Sequence, Tuple
 from logger_util import log_event
-from config import DEFAULT_SEARCH_LIMIT, GOOGLE_API_KEY, GOOGLE_SEARCH_ENGINE_ID
+from url_utils import domain_key
+from rate_limiter import acquire
+from crawl_scheduler import get_crawl_scheduler
+from http_client import get_session, read_html, HTTP_TIMEOUT
+from html_text import parse_html, ParsedPage, SUBPAGE_DROP_TAGS
+from page_discovery import rank_links, parse_sitemap, Candidate
+from snapshot_store import get_snapshot_store, SnapshotMissing
+from contact_extractor import extract_contacts
+from page_metadata import extract_metadata
+from disk_cache import DiskCache, cache_key
+from quota_manager import QuotaLedger, QuotaExhausted, Reservation, PRIORITY_NORMAL
+from config import (
+    DEFAULT_SEARCH_LIMIT, GOOGLE_API_KEY, GOOGLE_SEARCH_ENGINE_ID,
+    CSE_CACHE_TTL, CSE_CACHE_MAX_ENTRIES, HTTP_USER_AGENT,
+    EXTRACT_CACHE_TTL, EXTRACT_CACHE_MAX_ENTRIES,
+    DISCOVERY_TOP_K, DISCOVERY_TIME_BUDGET, DISCOVERY_PAGE_CHARS, DISCOVERY_USE_SITEMAP,
+    DISCOVERY_SITEMAP_MAX_BYTES, DISCOVERY_MAX_WORKERS,
+)
+
+# Bump when extract_page_content's output format changes, so cached content is rebuilt
+EXTRACTION_VERSION = 4
+
+_discovery_pools = {}
+_discovery_pool_lock = threading.Lock()
+
+
+def _get_discovery_pool(kind: str = "read") -> ThreadPoolExecutor:
+    """
+    Shared threads for discovery, so concurrent leads don't each spin up a pool.
+    Subpage requests ("request") get their own pool, so a backlog of reads can't
+    hold up the requests that feed it.
+    """
+    with _discovery_pool_lock:
+        pool = _discovery_pools.get(kind)
+        if pool is None:
+            pool = _discovery_pools[kind] = ThreadPoolExecutor(
+                max_workers=DISCOVERY_MAX_WORKERS, thread_name_prefix=f"discovery-{kind}"
+            )
+        return pool
+
 
 class SearchService:
-    def __init__(self, api_key: str = None, search_engine_id: str = None):
+    def __init__(self, api_key: str = None, search_engine_id: str = None, http: requests.Session = None):
         self.api_key = api_key or GOOGLE_API_KEY
         self.search_engine_id = search_engine_id or GOOGLE_SEARCH_ENGINE_ID
+        # Pooled keep-alive session: repeat hosts skip DNS, TCP and TLS setup
+        self.http = http or get_session()
+        self.crawler = get_crawl_scheduler()
+        self.cse_cache = DiskCache("google_cse", ttl=CSE_CACHE_TTL, max_entries=CSE_CACHE_MAX_ENTRIES)
+        self.extract_cache = DiskCache("page_content", ttl=EXTRACT_CACHE_TTL, max_entries=EXTRACT_CACHE_MAX_ENTRIES)
+        self.quota = QuotaLedger("google_cse")
+        # Records fetched pages, or serves them back offline in SNAPSHOT_MODE=replay
+        self.snapshots = get_snapshot_store()
         
         if not self.api_key or not self.search_engine_id:
             print("⚠️  Warning: Google Custom Search API credentials not configured.")
@@ -15,60 +67,176 @@ class SearchService:
         else:
             self.use_placeholder = False
 
-    def search_leads(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, start_index: int = 1, ai_service=None, original_query=None, is_people_search: bool = False) -> List[Dict]:
+    def search_leads(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, start_index: int = 1, ai_service=None, original_query=None, is_people_search: bool = False, priority: str = PRIORITY_NORMAL) -> List[Dict]:
         log_event(f"Searching for: {query} (Page starting at {start_index})")
         
         if self.use_placeholder:
             return self._placeholder_search(ai_service, original_query, is_people_search)
         
         try:
-            # Google Custom Search API endpoint
-            url = "https://www.googleapis.com/customsearch/v1"
-            
-            results = []
-            num_results = min(limit, 10)
-            
-            params = {
-                'key': self.api_key,
-                'cx': self.search_engine_id,
-                'q': query,
-                'num': num_results,
-                'start': start_index
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'items' not in data:
-                print(f"⚠️  No search results found for: {query}")
-                return []
-            
-            for item in data['items']:
-                results.append({
-                    'title': item.get('title', 'No Title'),
-                    'link': item.get('link', ''),
-                    'snippet': item.get('snippet', '')
-                })
-            
+            with self.quota.reserve(1, priority) as reservation:
+                results = self._search_page(query, min(limit, 10), start_index, is_people_search, reservation)
             print(f"✅ Found {len(results)} results from Google Custom Search")
             return results
+        except Exception as e:
+            self._log_search_error(e)
+            log_event("   Falling back to Smart AI Brainstorming...")
+            return self._placeholder_search(ai_service, original_query, is_people_search)
+
+    def search_leads_many(self, query: str, start_indexes: Sequence[int] = (1, 11, 21), limit: int = DEFAULT_SEARCH_LIMIT,
+                          ai_service=None, original_query=None, is_people_search: bool = False,
+                          priority: str = PRIORITY_NORMAL,
+                          known_pages: Optional[Dict[int, List[Dict]]] = None,
+                          on_page: Optional[Callable[[int, List[Dict]], None]] = None) -> List[Dict]:
+        """
+        Fetches several CSE pages concurrently and returns their merged, deduplicated results.
+        Quota for all missing pages is reserved up front; when less is granted, only the
+        earliest uncached pages are fetched and the rest fail. Pages are merged in order and everything after the first empty
+        or failed page is dropped.
+        `known_pages` (start_index -> results) are used as-is instead of being fetched;
+        `on_page` is called for every page that was fetched.
+        """
+        known_pages = known_pages or {}
+        log_event(f"Searching for: {query} (Pages starting at {list(start_indexes)})")
+        
+        if self.use_placeholder and start_indexes[0] not in known_pages:
+            fallback = self._placeholder_search(ai_service, original_query, is_people_search)
+            if on_page:
+                on_page(start_indexes[0], fallback)
+            return fallback
+        
+        missing = [s for s in start_indexes if s not in known_pages]
+        num_results = min(limit, 10)
+        futures = {}
+        over_budget = set()
+        if missing and not self.use_placeholder:
+            billable = [s for s in missing if not self.cse_cache.contains(self._cse_cache_key(query, num_results, s))]
+            with self.quota.reserve(len(billable), priority) as reservation:
+                if reservation.granted < len(billable):
+                    log_event(f"⚠️ CSE budget granted {reservation.granted}/{len(billable)} page(s) ({priority} priority)", "WARNING")
+                    # Spend a partial grant on the earliest pages; later ones are dropped after the gap anyway
+                    over_budget = set(billable[reservation.granted:])
+                    missing = [s for s in missing if s not in over_budget]
+                with ThreadPoolExecutor(max_workers=max(1, len(missing))) as pool:
+                    futures = {s: pool.submit(self._search_page, query, num_results, s, is_people_search, reservation)
+                               for s in missing}
+        
+        pages = []
+        for position, start_index in enumerate(start_indexes):
+            if start_index in known_pages:
+                page = known_pages[start_index]
+            else:
+                try:
+                    if start_index in over_budget:
+                        raise QuotaExhausted(f"google_cse daily budget exhausted for {priority}-priority calls")
+                    page = futures[start_index].result() if start_index in futures else []
+                except Exception as e:
+                    self._log_search_error(e)
+                    if position > 0:
+                        break
+                    log_event("   Falling back to Smart AI Brainstorming...")
+                    page = self._placeholder_search(ai_service, original_query, is_people_search)
+                if on_page:
+                    on_page(start_index, page)
+            if not page:
+                break
+            pages.append(page)
+        
+        results = self._merge_pages(pages, is_people_search)
+        print(f"✅ Found {len(results)} results from {len(pages)} Google Custom Search page(s)")
+        return results
+
+    def _search_page(self, query: str, num_results: int, start_index: int, is_people_search: bool,
+                     reservation: Reservation) -> List[Dict]:
+        """
+        Fetches one CSE page through the response cache. Only a cache miss spends
+        a unit of `reservation`. Raises on API errors or when the budget is exhausted.
+        """
+        # Google Custom Search API endpoint
+        url = "https://www.googleapis.com/customsearch/v1"
+        
+        params = {
+            'key': self.api_key,
+            'cx': self.search_engine_id,
+            'q': query,
+            'num': num_results,
+            'start': start_index
+        }
+        
+        # Same normalized (query, page) within the TTL costs no quota and no network
+        key = self._cse_cache_key(query, num_results, start_index)
+        if self._replaying:
+            # Offline replay: any cached page will do, however old
+            entry = self.cse_cache.get_entry(key, allow_stale=True)
+            if entry is None:
+                raise SnapshotMissing(f"No cached CSE results for '{query}' (start {start_index}) to replay")
+            items = entry["value"]
+        else:
+            items = self.cse_cache.get(key)
+        if items is not None:
+            log_event(f"   CSE cache hit for: {query} (start {start_index})")
+        else:
+            reservation.spend()
+            acquire("google_cse")
+            response = self.http.get(url, params=params, timeout=HTTP_TIMEOUT)
+            if response.status_code == 429:
+                # Google says we're out; make sure nobody else spends today
+                self.quota.mark_exhausted()
+            response.raise_for_status()
             
-        except requests.exceptions.HTTPError as e:
+            data = response.json()
+            items = [
+                {'title': i.get('title'), 'link': i.get('link'), 'snippet': i.get('snippet')}
+                for i in data.get('items', [])
+            ]
+            self.cse_cache.set(key, items)
+        
+        if not items:
+            print(f"⚠️  No search results found for: {query} (start {start_index})")
+            return []
+        
+        return self._merge_pages([[
+            {
+                'title': item.get('title') or 'No Title',
+                'link': item.get('link') or '',
+                'snippet': item.get('snippet') or ''
+            }
+            for item in items
+        ]], is_people_search)
+
+    @staticmethod
+    def _merge_pages(pages: List[List[Dict]], is_people_search: bool) -> List[Dict]:
+        """Concatenates pages, keeping only the first hit per company domain (per profile link for people)."""
+        seen = set()
+        merged = []
+        for page in pages:
+            for item in page:
+                link = item.get('link') or ''
+                # Several hits on one company site are one lead, keep only the first
+                marker = link if is_people_search else domain_key(link)
+                if marker in seen:
+                    continue
+                seen.add(marker)
+                merged.append(item)
+        return merged
+
+    @staticmethod
+    def _log_search_error(e: Exception):
+        if isinstance(e, QuotaExhausted):
+            log_event(f"⛔ {e}", "WARNING")
+        elif isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
             if e.response.status_code == 429:
                 print("❌ Google API quota exceeded (100 searches/day limit)")
             elif e.response.status_code == 403:
                 print("❌ Google API error: 403 Forbidden. Check if Custom Search API is enabled and key is valid.")
             else:
                 log_event(f"❌ Google API error: {e}", "ERROR")
-            log_event("   Falling back to Smart AI Brainstorming...")
-            return self._placeholder_search(ai_service, original_query, is_people_search)
-            
-        except Exception as e:
+        else:
             log_event(f"❌ Error searching with Google API: {e}", "ERROR")
-            log_event("   Falling back to Smart AI Brainstorming...")
-            return self._placeholder_search(ai_service, original_query, is_people_search)
+
+    def _cse_cache_key(self, query: str, num_results: int, start_index: int) -> str:
+        normalized = re.sub(r'\s+', ' ', query).strip().lower()
+        return cache_key(self.search_engine_id, normalized, num_results, start_index)
 
     def _placeholder_search(self, ai_service=None, original_query=None, is_people_search: bool = False) -> List[Dict]:
         """Fallback leads - now uses AI to brainstorm if available"""
@@ -100,64 +268,224 @@ class SearchService:
         """
         Extracts clean text content from a URL.
         Now includes:
-        1. BeautifulSoup for cleaning HTML
-        2. searching for 'Contact' pages if main page is sparse
-        3. Email extraction via Regex
+        1. html_text (fastest available parser) for cleaning HTML
+        2. ranked contact/team/about pages (links + sitemap), fetched concurrently within a time budget
+        3. Contact signals (emails, phones, social profiles) from the parsed pages and the
+           site's schema.org / OpenGraph metadata, which also gives its name and description
+        In SNAPSHOT_MODE=replay every page comes from the snapshot store instead of the network.
+
+        Results are cached per URL. Once an entry goes stale, the main page is
+        revalidated with If-None-Match/If-Modified-Since and a 304 keeps the
+        cached content; if the site is unreachable, stale content is served.
         """
+        key = cache_key("page_content", EXTRACTION_VERSION, url)
+        cached = None if self._replaying else self.extract_cache.get_entry(key, allow_stale=True)
+        if cached and not cached["stale"]:
+            log_event(f"   Extraction cache hit for: {url}")
+            return cached["value"]["content"]
+
         try:
-            import re
-            from bs4 import BeautifulSoup
-            from urllib.parse import urljoin
-            
             headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                'User-Agent': HTTP_USER_AGENT
             }
             
-            response = requests.get(url, timeout=15, headers=headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            validators = {}
+            if self._replaying:
+                html = self._fetch_html(url, headers, required=True, text_budget=5000)
+            else:
+                response = self._request(url, {**headers, **self._conditional_headers(cached)}, required=True)
+                if response.status_code == 304:
+                    response.close()
+                    self.extract_cache.touch(key)
+                    log_event(f"   Not modified since last extraction: {url}")
+                    return cached["value"]["content"]
+                validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+                html = self._read(url, response, text_budget=5000)
             
-            # Remove script and style elements for cleaner text
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-                
-            text = soup.get_text(separator=' ', strip=True)
+            # Drops script/style/nav/footer/header for cleaner text
+            page = parse_html(html)
+            text = page.text
+            metadata = extract_metadata(html)
             
             # 1. basic extraction
             content = f"URL: {url}\n\nMain Page Content:\n{text[:5000]}\n"
             
-            # 2. Look for explicit contact links if we need more info
-            contact_link = None
-            for a in soup.find_all('a', href=True):
-                if 'contact' in a.text.lower() or 'about' in a.text.lower():
-                    contact_link = urljoin(url, a['href'])
-                    break
-            
-            # If found a contact page, fetch it too
-            if contact_link:
-                try:
-                    print(f"   Found contact page: {contact_link}")
-                    contact_resp = requests.get(contact_link, timeout=10, headers=headers)
-                    if contact_resp.status_code == 200:
-                        contact_soup = BeautifulSoup(contact_resp.text, 'html.parser')
-                        for s in contact_soup(["script", "style"]):
-                            s.decompose()
-                        contact_text = contact_soup.get_text(separator=' ', strip=True)
-                        content += f"\n\nContact Page Content:\n{contact_text[:3000]}"
-                except Exception as e:
-                    print(f"   Could not fetch contact page: {e}")
+            # 2. Best contact/team/about pages (links include nav/header/footer, where those usually are)
+            subpages = self._discover_subpages(url, page, headers)
+            for candidate, subpage in subpages:
+                content += f"\n\n{candidate.kind.title()} Page Content ({candidate.url}):\n{subpage.text[:DISCOVERY_PAGE_CHARS]}"
 
-            # 3. Regex extraction for Emails (add to content so AI sees it clearly)
-            emails = set(re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', response.text))
-            if emails:
-                 # Filter out common junk emails
-                valid_emails = [e for e in emails if not any(x in e.lower() for x in ['.png', '.jpg', '.jpeg', '.gif', 'sentry', 'example', 'domain'])]
-                if valid_emails:
-                    content += f"\n\nPossible Emails Found on Page:\n{', '.join(valid_emails[:5])}"
+            # 3. Contact signals from the already-parsed pages (add to content so AI sees them clearly)
+            texts, links = [page.text, page.layout_text], metadata.links() + page.links
+            for _, subpage in subpages:
+                texts.append(subpage.text)
+                links += subpage.links
+            # Linked (mailto:/tel:/schema.org) contacts are listed apart from text matches, which are less certain
+            contacts = extract_contacts(*texts, links=links)
+            text_emails = [e for e in contacts.emails if e not in contacts.linked_emails]
+            text_phones = [p for p in contacts.phones if p not in contacts.linked_phones]
+            if contacts.linked_emails:
+                content += f"\n\nContact Emails Found on Page:\n{', '.join(contacts.linked_emails[:5])}"
+            if text_emails:
+                content += f"\n\nPossible Emails Found on Page:\n{', '.join(text_emails[:5])}"
+            if contacts.linked_phones:
+                content += f"\n\nContact Phones Found on Page:\n{', '.join(contacts.linked_phones[:3])}"
+            if text_phones:
+                content += f"\n\nPossible Phones Found on Page:\n{', '.join(text_phones[:3])}"
+            if contacts.social:
+                profiles = [urls[0] for urls in contacts.social.values()]
+                content += f"\n\nSocial Profiles Found on Page:\n{', '.join(profiles)}"
+            if metadata.name or metadata.description:
+                content += "\n\nCompany Metadata Found on Page:"
+                content += f"\nName: {metadata.name}" if metadata.name else ""
+                content += f"\nDescription: {metadata.description}" if metadata.description else ""
 
+            if not self._replaying:
+                self.extract_cache.set(key, {'content': content, **validators})
             return content
 
         except Exception as e:
             print(f"Error extracting {url}: {e}")
+            if cached:
+                print(f"   Serving stale cached content for {url}")
+                return cached["value"]["content"]
             return ""
+
+    @staticmethod
+    def _conditional_headers(cached: Optional[Dict]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for revalidating a stale extraction cache entry."""
+        if not cached:
+            return {}
+        conditional = {}
+        if cached["value"].get("etag"):
+            conditional['If-None-Match'] = cached["value"]["etag"]
+        if cached["value"].get("last_modified"):
+            conditional['If-Modified-Since'] = cached["value"]["last_modified"]
+        return conditional
+
+    @property
+    def _replaying(self) -> bool:
+        return self.snapshots is not None and self.snapshots.replaying
+
+    def _request(self, url: str, headers: Dict, required: bool = False) -> Optional[requests.Response]:
+        """
+        Streamed GET through the crawler (robots.txt, per-host pacing). Returns None
+        on an error status, or raises it when `required`.
+        """
+        response = self.crawler.get(url, session=self.http, timeout=HTTP_TIMEOUT, headers=headers, stream=True)
+        if not response.ok:
+            response.close()
+            if required:
+                response.raise_for_status()
+            return None
+        return response
+
+    def _read(self, url: str, response: requests.Response, **read_kwargs) -> str:
+        """Reads a capped body (see read_html) and snapshots it when recording."""
+        html = read_html(response, **read_kwargs)
+        if self.snapshots is not None and self.snapshots.recording:
+            self.snapshots.put(url, html, response.headers.get('Content-Type', ''))
+        return html
+
+    def _fetch_html(self, url: str, headers: Dict, required: bool = False, **read_kwargs) -> Optional[str]:
+        if self._replaying:
+            html = self.snapshots.get(url)
+            if html is None and required:
+                raise SnapshotMissing(f"No snapshot of {url} to replay")
+            return html
+        response = self._request(url, headers, required)
+        return self._read(url, response, **read_kwargs) if response is not None else None
+
+    def _sitemap_urls(self, url: str, headers: Dict) -> List[str]:
+        if self._replaying:
+            origin = "{0.scheme}://{0.netloc}/".format(urlsplit(url))
+            sitemaps = [u for u in self.snapshots.urls_with_prefix(origin) if u.lower().endswith(".xml")]
+        else:
+            sitemaps = self.crawler.sitemaps(url, headers.get('User-Agent', '*'))
+        for sitemap in sitemaps[:2]:
+            try:
+                xml = self._fetch_html(sitemap, headers, max_bytes=DISCOVERY_SITEMAP_MAX_BYTES, content_types=("xml",))
+                if xml is not None:
+                    return parse_sitemap(xml)
+            except Exception:
+                continue
+        return []
+
+    def _discover_subpages(self, url: str, page: ParsedPage, headers: Dict) -> List[Tuple[Candidate, ParsedPage]]:
+        """
+        Fetches the top-ranked contact/team/about pages within the lead's
+        DISCOVERY_TIME_BUDGET. Every subpage request is its own task (the
+        crawler still serializes a host's requests), and each body is read
+        and parsed as soon as its response arrives. Nothing new is requested
+        or read once the deadline passes, and whatever misses it is dropped.
+        sitemap.xml is only consulted when the page's own links come up short.
+        """
+        deadline = time.monotonic() + DISCOVERY_TIME_BUDGET
+        pool = _get_discovery_pool()
+        request_pool = _get_discovery_pool("request")
+
+        candidates = rank_links(url, page.links, top_k=DISCOVERY_TOP_K)
+        if DISCOVERY_USE_SITEMAP and len(candidates) < DISCOVERY_TOP_K:
+            future = request_pool.submit(self._sitemap_urls, url, headers)
+            done, _ = wait([future], timeout=(deadline - time.monotonic()) / 2)
+            if done:
+                candidates = rank_links(url, page.links, future.result(), top_k=DISCOVERY_TOP_K)
+            else:
+                future.cancel()
+        if not candidates:
+            return []
+
+        def parse(html):
+            return parse_html(html, SUBPAGE_DROP_TAGS) if html is not None else None
+
+        def read(page_url, response):
+            if time.monotonic() >= deadline:
+                response.close()
+                return None
+            return parse(self._read(page_url, response, text_budget=DISCOVERY_PAGE_CHARS))
+
+        def fetch(c: Candidate):
+            """Issues one subpage request; returns the future of its parsed body, or None."""
+            if time.monotonic() >= deadline:
+                return None
+            if self._replaying:
+                return pool.submit(lambda u: parse(self.snapshots.get(u)), c.url)
+            try:
+                response = self._request(c.url, headers)
+            except Exception as e:
+                print(f"   Could not fetch {c.kind} page: {e}")
+                return None
+            if response is None:
+                return None
+            if time.monotonic() >= deadline:
+                response.close()
+                return None
+            return pool.submit(read, c.url, response)
+
+        for c in candidates:
+            print(f"   Found {c.kind} page: {c.url} (score {c.score:.1f})")
+        issuing = [(c, request_pool.submit(fetch, c)) for c in candidates]
+        issued, _ = wait([f for _, f in issuing], timeout=max(0.0, deadline - time.monotonic()))
+
+        pending = []  # (candidate, future of ParsedPage, or None if its request missed the deadline)
+        for candidate, request in issuing:
+            if request in issued:
+                if request.result() is not None:
+                    pending.append((candidate, request.result()))
+            else:
+                request.cancel()
+                pending.append((candidate, None))
+        done, _ = wait([f for _, f in pending if f is not None], timeout=max(0.0, deadline - time.monotonic()))
+
+        subpages = []
+        for candidate, future in pending:
+            if future is None or future not in done:
+                print(f"   Skipped {candidate.url}: over the {DISCOVERY_TIME_BUDGET:.0f}s discovery budget")
+            elif future.exception():
+                print(f"   Could not read {candidate.kind} page: {future.exception()}")
+            elif future.result() is not None:
+                subpages.append((candidate, future.result()))
+        return subpages
@@ -0,0 +1,228 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from sqlite_store import SQLiteStore
+from config import (
+    SNAPSHOT_MODE, SNAPSHOT_DIR, SNAPSHOT_DB_PATH, SNAPSHOT_CODEC,
+    SNAPSHOT_MAX_AGE_DAYS, SNAPSHOT_MAX_BYTES, SNAPSHOT_PRUNE_EVERY,
+)
+
+SNAPSHOT_OFF = "off"
+SNAPSHOT_RECORD = "record"
+SNAPSHOT_REPLAY = "replay"
+
+
+class SnapshotMissing(Exception):
+    pass
+
+
+def _zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+class SnapshotStore(SQLiteStore):
+    """
+    Content-addressed store of fetched pages. Bodies are compressed (zstd if
+    the optional `zstandard` package is installed, else gzip) into one file
+    per SHA-256 under `root`, so a page served at several URLs is stored once.
+    The SQLite index maps (url, fetched_at) to the content hash.
+
+    In "record" mode every fetch is stored; in "replay" mode
+    extract_page_content reads pages from here and never touches the network.
+    While recording, snapshots older than `max_age` seconds are pruned every
+    `prune_every` pages, then the least recently fetched blobs until the
+    compressed total fits in `max_bytes`.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snapshot_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            stored_size INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS snapshot_index (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            hash TEXT NOT NULL REFERENCES snapshot_blobs(hash),
+            content_type TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_snapshot_url ON snapshot_index(url, fetched_at);
+    """
+
+    def __init__(self, mode: str = SNAPSHOT_MODE, root: str = SNAPSHOT_DIR, db_path: str = SNAPSHOT_DB_PATH,
+                 codec: str = SNAPSHOT_CODEC, max_age: float = SNAPSHOT_MAX_AGE_DAYS * 86400,
+                 max_bytes: int = SNAPSHOT_MAX_BYTES, prune_every: int = SNAPSHOT_PRUNE_EVERY):
+        super().__init__(db_path)
+        self.mode = mode
+        self.root = root
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._puts = 0
+        zstd = _zstd() if codec in ("auto", "zstd") else None
+        self.codec = "zstd" if zstd else "gzip"
+        self._zstd = zstd
+        self._write_lock = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == SNAPSHOT_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == SNAPSHOT_REPLAY
+
+    def _blob_path(self, digest: str, codec: str) -> str:
+        ext = "zst" if codec == "zstd" else "gz"
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.{ext}")
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.codec == "zstd":
+            return self._zstd.ZstdCompressor(level=10).compress(raw)
+        return gzip.compress(raw, compresslevel=6)
+
+    def _decompress(self, data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            zstd = self._zstd or _zstd()
+            if zstd is None:
+                raise SnapshotMissing("Snapshot is zstd-compressed but `zstandard` is not installed")
+            return zstd.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def put(self, url: str, content: str, content_type: str = "text/html") -> str:
+        """Stores `content` fetched from `url` now and returns its content hash."""
+        raw = content.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        conn = self._conn()
+        now = time.time()
+
+        with self._write_lock:
+            known = conn.execute("SELECT 1 FROM snapshot_blobs WHERE hash = ?", (digest,)).fetchone()
+            if not known:
+                data = self._compress(raw)
+                path = self._blob_path(digest, self.codec)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)  # Readers never see a half-written blob
+                conn.execute(
+                    "INSERT OR IGNORE INTO snapshot_blobs (hash, codec, size, stored_size, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (digest, self.codec, len(raw), len(data), now),
+                )
+            # Under the lock, so prune() can't drop the blob between the check above and this row
+            conn.execute(
+                "INSERT INTO snapshot_index (url, fetched_at, hash, content_type) VALUES (?, ?, ?, ?)",
+                (url, now, digest, content_type),
+            )
+            self._puts += 1
+            due = self.prune_every > 0 and self._puts % self.prune_every == 0
+        if due:
+            self.prune()
+        return digest
+
+    def prune(self) -> int:
+        """Applies the age and size limits; returns the number of blobs deleted."""
+        conn = self._conn()
+        with self._write_lock:
+            if self.max_age > 0:
+                conn.execute("DELETE FROM snapshot_index WHERE fetched_at < ?", (time.time() - self.max_age,))
+            # Least recently fetched first; blobs no snapshot points at any more sort first
+            rows = conn.execute(
+                "SELECT b.hash, b.codec, b.stored_size, MAX(i.fetched_at) AS last_fetched "
+                "FROM snapshot_blobs b LEFT JOIN snapshot_index i ON i.hash = b.hash "
+                "GROUP BY b.hash ORDER BY last_fetched IS NOT NULL, last_fetched"
+            ).fetchall()
+            total = sum(r["stored_size"] for r in rows)
+            doomed = []
+            for row in rows:
+                if row["last_fetched"] is not None and (self.max_bytes <= 0 or total <= self.max_bytes):
+                    break
+                doomed.append(row)
+                total -= row["stored_size"]
+            for row in doomed:
+                conn.execute("DELETE FROM snapshot_index WHERE hash = ?", (row["hash"],))
+                conn.execute("DELETE FROM snapshot_blobs WHERE hash = ?", (row["hash"],))
+                try:
+                    os.remove(self._blob_path(row["hash"], row["codec"]))
+                except FileNotFoundError:
+                    pass
+        return len(doomed)
+
+    def get_blob(self, digest: str) -> Optional[str]:
+        row = self._conn().execute("SELECT codec FROM snapshot_blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._blob_path(digest, row["codec"]), "rb") as f:
+                return self._decompress(f.read(), row["codec"]).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def get(self, url: str, at: Optional[float] = None) -> Optional[str]:
+        """Latest snapshot of `url`, or the latest taken at or before timestamp `at`."""
+        row = self._conn().execute(
+            "SELECT hash FROM snapshot_index WHERE url = ? AND fetched_at <= ? ORDER BY fetched_at DESC LIMIT 1",
+            (url, at if at is not None else time.time()),
+        ).fetchone()
+        return self.get_blob(row["hash"]) if row else None
+
+    def history(self, url: str) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT fetched_at, hash, content_type FROM snapshot_index WHERE url = ? ORDER BY fetched_at",
+            (url,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def urls_with_prefix(self, prefix: str) -> List[str]:
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = self._conn().execute(
+            "SELECT DISTINCT url FROM snapshot_index WHERE url LIKE ? ESCAPE '\\'", (escaped + "%",)
+        ).fetchall()
+        return [r["url"] for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        blobs = conn.execute(
+            "SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS raw, COALESCE(SUM(stored_size), 0) AS stored "
+            "FROM snapshot_blobs"
+        ).fetchone()
+        index = conn.execute("SELECT COUNT(*) AS n, COUNT(DISTINCT url) AS urls FROM snapshot_index").fetchone()
+        return {
+            "mode": self.mode,
+            "codec": self.codec,
+            "snapshots": index["n"],
+            "urls": index["urls"],
+            "blobs": blobs["n"],
+            "raw_bytes": blobs["raw"],
+            "stored_bytes": blobs["stored"],
+            "compression_ratio": round(blobs["raw"] / blobs["stored"], 2) if blobs["stored"] else 0.0,
+            "max_age_days": round(self.max_age / 86400, 2),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Process-wide store, or None when SNAPSHOT_MODE is "off"."""
+    global _store
+    if SNAPSHOT_MODE == SNAPSHOT_OFF:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
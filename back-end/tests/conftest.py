@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+
+# Modules import each other flat (`from config import ...`), as when run from back-end/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep every SQLite store the tests touch out of back-end/data
+_tmp = tempfile.mkdtemp(prefix="leadagent-tests-")
+for name, filename in [("CACHE_DB_PATH", "cache.sqlite3"), ("QUOTA_DB_PATH", "quota.sqlite3"),
+                       ("JOB_DB_PATH", "jobs.sqlite3"), ("CHECKPOINT_DB_PATH", "checkpoints.sqlite3"),
+                       ("SNAPSHOT_DIR", "snapshots"), ("SNAPSHOT_DB_PATH", "snapshots.sqlite3"),
+                       ("LLM_LEDGER_DB_PATH", "llm_ledger.sqlite3")]:
+    os.environ[name] = os.path.join(_tmp, filename)
+os.environ.setdefault("LLM_PROVIDERS", "mock")
+os.environ.setdefault("SNAPSHOT_MODE", "off")
+# api.py builds a DatabaseService at import; tests swap in a fake client before any call
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-key")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def scripted_ai(tmp_path):
+    """AIService whose only provider answers each prompt with handler(prompt) (a JSON string or an exception)."""
+    from ai_service import AIService
+    from disk_cache import DiskCache
+    from llm_providers import LLMProvider, LLMRouter
+
+    class ScriptedProvider(LLMProvider):
+        name = "mock"
+
+        def __init__(self, handler):
+            super().__init__("scripted")
+            self.handler = handler
+            self.prompts = []
+
+        def _call(self, prompt):
+            self.prompts.append(prompt)
+            answer = self.handler(prompt)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer, 100, 50, None
+
+    def make(handler):
+        provider = ScriptedProvider(handler)
+        ai = AIService(providers=[provider])
+        ai.router = LLMRouter([provider], hedge=False)
+        ai.response_cache = DiskCache("llm_responses", ttl=3600, max_entries=100,
+                                      db_path=str(tmp_path / "llm_cache.sqlite3"))
+        return ai, provider
+    return make
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import HTTPException
+
+pytest.importorskip("playwright")  # api.py pulls in linkedin_service
+
+
+class FakeQuery:
+    def __init__(self, client):
+        self.client = client
+        self.row = None
+        self.filters = {}
+
+    def upsert(self, row, on_conflict=None, ignore_duplicates=False):
+        self.row = row
+        return self
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        stored = self.client.rows
+        if self.row is not None:
+            if self.row["domain_key"] in stored:
+                return type("Response", (), {"data": []})()
+            stored[self.row["domain_key"]] = {"id": f"id-{len(stored)}", **self.row}
+            return type("Response", (), {"data": [stored[self.row["domain_key"]]]})()
+        rows = [r for r in stored.values() if all(r.get(c) == v for c, v in self.filters.items())]
+        return type("Response", (), {"data": rows})()
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.rows = {}
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Importing api opens debug logs in the working directory
+    import api
+    monkeypatch.setattr(api.db, "supabase", FakeSupabase())
+    return api
+
+
+def test_create_lead_returns_saved_row(api):
+    response = api.create_lead(api.LeadCreate(name="Acme", website="https://www.acme.com"))
+    assert response["lead"]["domain_key"] == "acme.com" and response["lead"]["id"]
+
+
+def test_create_lead_for_known_domain_conflicts(api):
+    api.create_lead(api.LeadCreate(name="Acme", website="https://acme.com"))
+    with pytest.raises(HTTPException) as err:
+        api.create_lead(api.LeadCreate(name="Acme again", website="http://shop.acme.com/contact"))
+    assert err.value.status_code == 409
+    assert len(api.db.supabase.rows) == 1
+
+
+def test_create_lead_reports_failed_save(api, monkeypatch):
+    monkeypatch.setattr(api.db, "supabase", None)
+    with pytest.raises(HTTPException) as err:
+        api.create_lead(api.LeadCreate(name="Acme", website="https://acme.com"))
+    assert err.value.status_code == 500
@@ -0,0 +1,84 @@
+import json
+import re
+from content_distiller import estimate_tokens
+from models import SearchQuery
+
+QUERY = SearchQuery(industry="Robotics", location="Berlin", keywords=["automation"])
+DOC_ID_RE = re.compile(r'<document id="(doc-\d+)">')
+
+
+def page(name, extra=""):
+    return (f"URL: https://{name.lower()}.com\n\nMain Page Content:\n{name} builds robots for automation in Berlin. "
+            f"{extra}\n\nPossible Emails Found on Page:\nhello@{name.lower()}.com")
+
+
+def lead(name, **fields):
+    return {"company_name": name, "qualification_score": 7, "industry": "Robotics", **fields}
+
+
+def answer_batches(prompt, skip=()):
+    ids = DOC_ID_RE.findall(prompt)
+    if ids:
+        names = {doc_id: re.search(rf'<document id="{doc_id}">\nURL: https://(\w+)\.com', prompt).group(1)
+                 for doc_id in ids}
+        return json.dumps({"leads": [{"id": doc_id, **lead(names[doc_id].title())}
+                                     for doc_id in ids if doc_id not in skip]})
+    return json.dumps(lead("Single"))
+
+
+def test_documents_are_packed_into_one_request(scripted_ai):
+    ai, provider = scripted_ai(answer_batches)
+    leads = ai.analyze_leads_batch([page("Acme"), page("Globex"), page("Initech")], QUERY)
+
+    assert [l.name for l in leads] == ["Acme", "Globex", "Initech"]
+    assert len(provider.prompts) == 1
+    # Contact fields come from the page, not the model
+    assert [l.email for l in leads] == ["hello@acme.com", "hello@globex.com", "hello@initech.com"]
+    assert leads[0].website == "https://acme.com"
+
+
+def test_packs_respect_max_docs_and_token_budget(scripted_ai):
+    ai, provider = scripted_ai(answer_batches)
+    ai.analyze_leads_batch([page(f"Site{i}") for i in range(5)], QUERY, max_docs=2)
+    assert [len(DOC_ID_RE.findall(p)) for p in provider.prompts] == [2, 2, 0]  # Last one alone: single prompt
+
+    ai, provider = scripted_ai(answer_batches)
+    docs = [page("Alpha"), page("Beta"), page("Gamma")]
+    overhead = estimate_tokens(ai._batch_prompt({}, QUERY))
+    doc_tokens = max(estimate_tokens(ai.prepare_content(d, QUERY)) for d in docs) + 20
+    ai.analyze_leads_batch(docs, QUERY, token_budget=overhead + 2 * doc_tokens)
+    assert [len(DOC_ID_RE.findall(p)) for p in provider.prompts] == [2, 0]
+
+
+def test_missing_and_garbled_entries_are_retried_alone(scripted_ai):
+    def handler(prompt):
+        if DOC_ID_RE.findall(prompt):
+            return json.dumps({"leads": [
+                {"id": "doc-0", **lead("Acme")},
+                {"id": "doc-1", "company_name": "Globex", "qualification_score": "not a number"},
+                {"id": "doc-99", **lead("Stray")},
+                "garbage",
+            ]})
+        return json.dumps(lead("Retried"))
+
+    ai, provider = scripted_ai(handler)
+    leads = ai.analyze_leads_batch([page("Acme"), page("Globex"), page("Initech")], QUERY)
+    assert [l.name for l in leads] == ["Acme", "Retried", "Retried"]
+    assert len(provider.prompts) == 3
+
+
+def test_a_failed_batch_falls_back_to_single_requests(scripted_ai):
+    def handler(prompt):
+        return "not json" if DOC_ID_RE.findall(prompt) else json.dumps(lead("Single"))
+
+    ai, provider = scripted_ai(handler)
+    leads = ai.analyze_leads_batch([page("Acme"), page("Globex")], QUERY)
+    assert [l.name for l in leads] == ["Single", "Single"]
+    assert len(provider.prompts) == 3
+
+
+def test_async_batch_matches_sync(scripted_ai):
+    import asyncio
+    ai, provider = scripted_ai(lambda p: answer_batches(p, skip={"doc-1"}))
+    leads = asyncio.run(ai.analyze_leads_batch_async([page("Acme"), page("Globex"), page("Initech")], QUERY))
+    assert [l.name for l in leads] == ["Acme", "Single", "Initech"]
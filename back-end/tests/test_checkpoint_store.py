@@ -0,0 +1,60 @@
+import pytest
+from checkpoint_store import CheckpointStore, run_key, STAGE_EXTRACTED, STAGE_ANALYZED, STAGE_SAVED
+from models import Lead, SearchQuery
+
+QUERY = SearchQuery(industry="SaaS", location="Berlin", target_persona="CTO", keywords=["CRM", "AI"])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints.sqlite3"), ttl_hours=1)
+
+
+def test_run_key_ignores_case_whitespace_and_keyword_order():
+    same = SearchQuery(industry=" saas", location="BERLIN ", target_persona="cto", keywords=["ai ", "crm"])
+    other = SearchQuery(industry="SaaS", location="Munich", target_persona="CTO", keywords=["CRM", "AI"])
+    assert run_key(same) == run_key(QUERY)
+    assert run_key(other) != run_key(QUERY)
+
+
+def test_unfinished_run_is_resumed(store):
+    first = store.open_run(QUERY)
+    first.save_search_page(1, [{"link": "https://acme.com"}])
+    first.mark_extracted("https://acme.com", "Acme page")
+
+    again = store.open_run(QUERY)
+    assert again.resumed and again.run_id == first.run_id
+    assert again.search_page(1) == [{"link": "https://acme.com"}]
+    assert again.search_page(11) is None
+    assert again.item("https://acme.com") == {"stage": STAGE_EXTRACTED, "content": "Acme page", "lead": None}
+    assert again.item("https://other.com") is None
+
+
+def test_item_moves_through_stages(store):
+    run = store.open_run(QUERY)
+    run.mark_extracted("https://acme.com", "Acme page")
+    run.mark_analyzed("https://acme.com", Lead(name="Acme", source="test", website="https://acme.com"))
+    item = run.item("https://acme.com")
+    assert item["stage"] == STAGE_ANALYZED and item["lead"].name == "Acme"
+
+    run.mark_saved("https://acme.com")
+    assert run.item("https://acme.com")["stage"] == STAGE_SAVED
+
+
+def test_completed_run_starts_over_and_is_pruned(store):
+    first = store.open_run(QUERY)
+    first.mark_extracted("https://acme.com", "Acme page")
+    first.complete()
+
+    second = store.open_run(QUERY)
+    assert not second.resumed and second.run_id != first.run_id
+    assert first.item("https://acme.com") is None
+
+
+def test_expired_run_starts_over(store):
+    first = store.open_run(QUERY)
+    store._conn().execute("UPDATE runs SET created_at = created_at - 7200 WHERE run_id = ?", (first.run_id,))
+
+    second = store.open_run(QUERY)
+    assert not second.resumed
+    assert store._conn().execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 1
@@ -0,0 +1,98 @@
+import pytest
+import search_service
+from contact_extractor import extract_contacts, normalize_phone
+from disk_cache import DiskCache
+from search_service import SearchService
+
+
+@pytest.mark.parametrize("text", [
+    "+49 30 7654321",
+    "020 7946 0958",
+    "+33 1 23 45 67 89",
+    "+91 98765 43210",
+    "1-800-555-0199",
+    "+1 (555) 010-0001",
+    "(555) 123-4567",
+    "555-123-4567",
+    "+44 20 7946 0958",
+    "+49 (0)30 1234567",
+    "+4930765432100",
+])
+def test_phone_formats_are_found_whole(text):
+    assert extract_contacts(f"Call us: {text}.").phones == [text]
+
+
+@pytest.mark.parametrize("text", [
+    "10.000.000",
+    "1,000,000",
+    "192.168.100.200",
+    "2019 2020 2021",
+    "15.01.2024",
+    "2024-01-15",
+    "ISO 9001 2015",
+    "version 1.2.3.4",
+])
+def test_numbers_that_are_not_phones_are_rejected(text):
+    assert extract_contacts(f"We have {text} here.").phones == []
+
+
+def test_tel_links_skip_the_free_text_checks():
+    assert normalize_phone("10 20 30 40", strict=True) is None
+    assert extract_contacts(links=[("tel:10%2020%2030%2040", "Call")]).phones == ["10 20 30 40"]
+
+
+def test_emails_social_and_phones_are_normalized_and_deduped():
+    contacts = extract_contacts(
+        "Mail Sales@Acme.com. or sales@acme.com, logo@2x.png, +1 555-123-4567 and +1 555 123 4567",
+        links=[("mailto:info@acme.com?subject=Hi", "Mail"), ("https://www.linkedin.com/company/acme/", "in"),
+               ("https://twitter.com/share?url=x", "Share")],
+    )
+    assert contacts.emails == ["info@acme.com", "sales@acme.com"]
+    assert contacts.phones == ["+1 555-123-4567"]
+    assert contacts.social == {"linkedin": ["https://linkedin.com/company/acme"]}
+
+
+HOME = b"""<html><body><nav><a href="/contact">Contact us</a></nav>
+<p>Acme Robotics. Call +49 30 1234567. Over 10.000.000 parts shipped from 192.168.100.200 uptime.</p>
+</body></html>"""
+CONTACT = b"<html><body><h1>Contact</h1><p>London office: 020 7946 0958</p></body></html>"
+
+
+class FakeResponse:
+    status_code = 200
+    ok = True
+    encoding = "utf-8"
+
+    def __init__(self, body):
+        self.body = body
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def close(self):
+        pass
+
+
+def test_extract_page_content_lists_real_phones_from_all_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_service, "DISCOVERY_USE_SITEMAP", False)
+    service = SearchService(api_key="key", search_engine_id="cx")
+    service.snapshots = None
+    service.extract_cache = DiskCache("page_content", ttl=3600, max_entries=10, db_path=str(tmp_path / "c.sqlite3"))
+    pages = {"https://acme.com/": HOME, "https://acme.com/contact": CONTACT}
+    monkeypatch.setattr(service, "_request", lambda url, headers, required=False: FakeResponse(pages[url]))
+
+    content = service.extract_page_content("https://acme.com/")
+    phones = content.split("Possible Phones Found on Page:\n", 1)[1].split("\n", 1)[0]
+    assert phones == "+49 30 1234567, 020 7946 0958"
+
+
+def test_linked_contacts_are_listed_apart_from_text_matches():
+    contacts = extract_contacts(
+        "Call +49 30 1234567 or mail press@acme.com",
+        links=[("tel:+49 30 7654321", "Call"), ("mailto:info@acme.com", "Mail"), ("tel:+49-30-1234567", "")],
+    )
+    assert contacts.linked_emails == ["info@acme.com"]
+    assert contacts.linked_phones == ["+49 30 7654321", "+49-30-1234567"]
+    assert contacts.emails == ["info@acme.com", "press@acme.com"]
+    assert contacts.email == "info@acme.com" and contacts.phone == "+49 30 7654321"
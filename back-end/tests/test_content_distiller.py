@@ -0,0 +1,56 @@
+from content_distiller import distill, estimate_tokens, GAP
+
+FOOTER = "Acme Robotics GmbH is registered in Berlin under HRB 12345 with offices across Europe and Asia."
+FILLER = " ".join(f"Our story chapter {i} talks about the weather and the view from the roof." for i in range(60))
+CONTENT = f"""URL: https://acme.com/
+
+Main Page Content:
+Home Products Solutions Pricing Careers Blog
+We accept all cookies to improve your experience.
+Acme builds warehouse robots for logistics companies. {FILLER} Contact our sales team at sales@acme.com for a demo. {FOOTER}
+© 2024 Acme. All rights reserved.
+
+Contact Page Content (https://acme.com/contact):
+Call us on +49 30 1234567 between 9 and 5. {FOOTER}
+
+Possible Emails Found on Page:
+sales@acme.com
+
+Possible Phones Found on Page:
++49 30 1234567"""
+
+
+def test_verbatim_sections_are_kept_exactly():
+    text = distill(CONTENT, keywords=["robots"], token_budget=400).text
+    assert text.startswith("URL: https://acme.com/\n\n")
+    assert text.endswith("Possible Emails Found on Page:\nsales@acme.com\n\nPossible Phones Found on Page:\n+49 30 1234567")
+
+
+def test_boilerplate_menus_and_repeats_are_dropped():
+    text = distill(CONTENT, keywords=["robots"], token_budget=5000).text
+    assert "Home Products Solutions" not in text
+    assert "cookies" not in text and "All rights reserved" not in text
+    assert text.count("HRB 12345") == 1  # Footer repeated on the contact page is kept once
+    assert "Acme builds warehouse robots" in text and "Call us on +49 30 1234567" in text
+
+
+def test_budget_keeps_contact_and_keyword_sentences_first():
+    result = distill(CONTENT, keywords=["robots"], token_budget=250)
+    assert result.tokens_after <= 250 < result.tokens_before
+    assert result.saved_ratio > 0.5
+    assert "Contact our sales team at sales@acme.com" in result.text
+    assert "Acme builds warehouse robots" in result.text
+    assert "chapter 30 " not in result.text
+    assert GAP in result.text
+
+
+def test_content_without_page_text_is_unchanged():
+    snippet = "Title: Acme Robotics\nSnippet: Warehouse robots from Berlin."
+    result = distill(snippet, token_budget=5)
+    assert result.text == snippet and result.saved_ratio == 0.0
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("robots") == 1 and estimate_tokens("automation") == 2
+    assert estimate_tokens("1234567") == 3 and estimate_tokens("a, b!") == 4
@@ -0,0 +1,59 @@
+import search_service
+from ai_service import content_facts
+from disk_cache import DiskCache
+from search_service import SearchService
+from test_contact_extractor import FakeResponse
+
+
+def test_linked_contacts_win_over_text_matches():
+    facts = content_facts(
+        "URL: https://acme.com\nTitle: Acme\n\nContent:\nAbout us"
+        "\n\nContact Emails Found on Page:\ninfo@acme.com"
+        "\n\nPossible Emails Found on Page:\npress@acme.com"
+        "\n\nContact Phones Found on Page:\n+49 30 7654321"
+        "\n\nPossible Phones Found on Page:\n+49 30 1234567"
+    )
+    assert facts["website"] == "https://acme.com"
+    assert facts["email"] == "info@acme.com" and facts["phone"] == "+49 30 7654321"
+
+
+def test_text_matches_are_strictly_validated():
+    facts = content_facts(
+        "URL: https://acme.com\n\nContent:\nStats"
+        "\n\nPossible Emails Found on Page:\nsales..team@acme.com, sales@acme.com"
+        "\n\nPossible Phones Found on Page:\n10.000.000, 2019 2020, 020 7946 0958"
+    )
+    assert facts["email"] == "sales@acme.com" and facts["phone"] == "020 7946 0958"
+    assert content_facts("Possible Phones Found on Page:\n192.168.100.200")["phone"] is None
+
+
+def test_socials_and_company_metadata():
+    facts = content_facts(
+        "URL: https://acme.com\n\nContent:\nHi"
+        "\n\nSocial Profiles Found on Page:\nhttps://www.linkedin.com/company/acme/, https://x.com/acmebots"
+        "\n\nCompany Metadata Found on Page:\nName: Acme Robotics\nDescription: Robots for warehouses."
+    )
+    assert facts["linkedin_url"] == "https://linkedin.com/company/acme"
+    assert facts["twitter_url"] == "https://x.com/acmebots"
+    assert facts["company_name"] == "Acme Robotics" and facts["description"] == "Robots for warehouses."
+
+
+PAGE = b"""<html><head><script type="application/ld+json">
+{"@type": "Organization", "name": "Acme", "contactPoint": {"telephone": "+49 30 7654321"}}
+</script></head><body><p>Acme. Since 2019 2020 we shipped 10.000.000 parts. Call +49 30 1234567.</p>
+<a href="mailto:info@acme.com">Mail us</a> or press@acme.com</body></html>"""
+
+
+def test_extracted_page_content_feeds_the_lead_contacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_service, "DISCOVERY_USE_SITEMAP", False)
+    service = SearchService(api_key="key", search_engine_id="cx")
+    service.snapshots = None
+    service.extract_cache = DiskCache("page_content", ttl=3600, max_entries=10, db_path=str(tmp_path / "c.sqlite3"))
+    monkeypatch.setattr(service, "_request", lambda url, headers, required=False: FakeResponse(PAGE))
+
+    content = service.extract_page_content("https://acme.com/")
+    assert "Contact Phones Found on Page:\n+49 30 7654321" in content
+    assert "Possible Phones Found on Page:\n+49 30 1234567" in content
+    facts = content_facts(content)
+    assert facts["email"] == "info@acme.com" and facts["phone"] == "+49 30 7654321"
+    assert facts["company_name"] == "Acme"
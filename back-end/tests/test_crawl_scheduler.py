@@ -0,0 +1,111 @@
+import threading
+import time
+import pytest
+import crawl_scheduler
+from crawl_scheduler import CrawlScheduler, DisallowedByRobots
+
+ROBOTS = "User-agent: *\nDisallow: /private\nCrawl-delay: 1\nSitemap: https://acme.com/map.xml\n"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text=""):
+        self.status_code = status_code
+        self.text = text
+
+
+class FakeSession:
+    def __init__(self, robots):
+        self.robots = robots  # host -> (status, body)
+        self.headers = {"User-Agent": "LeadAgent"}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.requests.append((url, time.monotonic()))
+        if url.endswith("/robots.txt"):
+            host = url.split("/")[2]
+            return FakeResponse(*self.robots.get(host, (404, "")))
+        return FakeResponse(200, "page")
+
+    def fetched(self, suffix):
+        return [at for url, at in self.requests if url.endswith(suffix)]
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession({"acme.com": (200, ROBOTS), "down.com": (500, "")})
+    monkeypatch.setattr(crawl_scheduler, "get_session", lambda: session)
+    monkeypatch.setattr(crawl_scheduler, "acquire", lambda name: None)
+    return session
+
+
+def test_disallowed_path_is_not_requested(session):
+    scheduler = CrawlScheduler(respect_robots=True)
+    with pytest.raises(DisallowedByRobots):
+        scheduler.get("https://acme.com/private/team")
+    assert session.fetched("/private/team") == []
+    assert scheduler.get("https://acme.com/about").text == "page"
+
+
+def test_robots_is_fetched_once_per_host(session):
+    scheduler = CrawlScheduler(respect_robots=True)
+    for path in ("/a", "/b", "/c"):
+        assert scheduler.allowed(f"https://acme.com{path}", "LeadAgent")
+    assert len(session.fetched("/robots.txt")) == 1
+    assert scheduler.sitemaps("https://acme.com/", "LeadAgent") == ["https://acme.com/map.xml"]
+
+
+def test_unreadable_robots_allows_everything(session):
+    scheduler = CrawlScheduler(respect_robots=True)
+    assert scheduler.allowed("https://down.com/private", "LeadAgent")
+    assert scheduler.crawl_delay("https://down.com/", "LeadAgent") == 0.0
+    assert scheduler.sitemaps("https://down.com/x", "LeadAgent") == ["https://down.com/sitemap.xml"]
+
+
+def test_robots_ignored_when_disabled(session):
+    scheduler = CrawlScheduler(respect_robots=False)
+    scheduler.get("https://acme.com/private/team")
+    assert session.fetched("/robots.txt") == []
+
+
+def test_same_host_requests_are_spaced_by_crawl_delay(session):
+    scheduler = CrawlScheduler(respect_robots=True)
+    threads = [threading.Thread(target=scheduler.get, args=(f"https://acme.com/p{i}",)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    times = sorted(at for url, at in session.requests if "/p" in url)
+    assert len(times) == 2 and times[1] - times[0] >= 0.99
+
+
+def test_different_hosts_are_not_serialized(session):
+    scheduler = CrawlScheduler(respect_robots=True)
+    entered, release = threading.Barrier(2, timeout=2), threading.Event()
+
+    def hold(url):
+        with scheduler.slot(url, "LeadAgent"):
+            entered.wait()  # Both hosts inside their slot at once
+            release.wait(2)
+
+    threads = [threading.Thread(target=hold, args=(url,)) for url in ("https://one.com/", "https://two.com/")]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    release.set()
+    for t in threads:
+        t.join()
+    assert not entered.broken
+
+
+def test_host_state_is_bounded_but_busy_hosts_are_kept(session):
+    scheduler = CrawlScheduler(respect_robots=False, cache_size=2)
+    with scheduler.slot("https://busy.com/", "LeadAgent"):
+        for i in range(5):
+            with scheduler.slot(f"https://host{i}.com/", "LeadAgent"):
+                pass
+        assert len(scheduler._hosts) == 2
+        assert "busy.com" in scheduler._hosts
+    assert list(scheduler._hosts) == ["busy.com", "host4.com"]
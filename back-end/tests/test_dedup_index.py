@@ -0,0 +1,60 @@
+import pytest
+from database import DatabaseService, IN_FILTER_CHUNK_SIZE
+
+
+class FakeQuery:
+    def __init__(self, client):
+        self.client = client
+        self.values = None
+
+    def select(self, *args):
+        return self
+
+    def in_(self, column, values):
+        self.values = list(values)
+        return self
+
+    def execute(self):
+        self.client.lookups.append(self.values)
+        rows = [{"domain_key": v} for v in self.values if v in self.client.stored]
+        return type("Response", (), {"data": rows})()
+
+
+class FakeSupabase:
+    def __init__(self, stored):
+        self.stored = set(stored)
+        self.lookups = []
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+@pytest.fixture
+def db():
+    service = object.__new__(DatabaseService)
+    service.supabase = FakeSupabase({"acme.com", "globex.co.uk"})
+    return service
+
+
+def test_find_existing_websites_matches_by_domain(db):
+    existing = db.find_existing_websites([
+        "https://www.acme.com/about", "http://globex.co.uk", "https://initech.com", None,
+    ])
+    assert existing == {"https://www.acme.com/about", "http://globex.co.uk"}
+
+
+def test_all_candidates_resolved_in_one_lookup(db):
+    db.find_existing_websites(["https://acme.com", "https://initech.com", "https://www.acme.com/contact"])
+    assert [sorted(v) for v in db.supabase.lookups] == [["acme.com", "initech.com"]]
+
+
+def test_deleted_lead_is_no_longer_existing(db):
+    assert db.find_existing_websites(["https://acme.com"]) == {"https://acme.com"}
+    db.supabase.stored.discard("acme.com")  # Deleted by another process
+    assert db.find_existing_websites(["https://acme.com"]) == set()
+
+
+def test_lookups_are_chunked(db):
+    websites = [f"https://site{i}.com" for i in range(IN_FILTER_CHUNK_SIZE * 2 + 1)]
+    assert db.find_existing_websites(websites) == set()
+    assert [len(v) for v in db.supabase.lookups] == [IN_FILTER_CHUNK_SIZE, IN_FILTER_CHUNK_SIZE, 1]
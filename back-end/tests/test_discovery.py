@@ -0,0 +1,64 @@
+import time
+import pytest
+import search_service
+from html_text import parse_html
+from search_service import SearchService
+
+HOME = """<html><body><h1>Acme</h1>
+<a href="/contact">Contact us</a> <a href="/about">About</a> <a href="/team">Our team</a>
+</body></html>"""
+
+
+class FakeResponse:
+    headers = {"Content-Type": "text/html"}
+
+    def __init__(self, url):
+        self.url = url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(search_service, "DISCOVERY_USE_SITEMAP", False)
+    service = SearchService(api_key="key", search_engine_id="cx")
+    service.snapshots = None
+    service.responses = []
+    monkeypatch.setattr(service, "_read", lambda url, response, **kw: f"<p>{url} page</p>")
+    return service
+
+
+def _slow_requests(service, monkeypatch, delays):
+    def request(url, headers, required=False):
+        time.sleep(delays[url.rsplit("/", 1)[-1]])
+        response = FakeResponse(url)
+        service.responses.append(response)
+        return response
+    monkeypatch.setattr(service, "_request", request)
+
+
+def test_subpages_are_requested_concurrently(service, monkeypatch):
+    _slow_requests(service, monkeypatch, {"contact": 0.3, "about": 0.3, "team": 0.3})
+    started = time.monotonic()
+    subpages = service._discover_subpages("https://acme.com/", parse_html(HOME), {})
+
+    assert time.monotonic() - started < 0.6
+    assert sorted(c.url for c, _ in subpages) == [
+        "https://acme.com/about", "https://acme.com/contact", "https://acme.com/team",
+    ]
+    assert all("page" in p.text for _, p in subpages)
+
+
+def test_requests_missing_the_deadline_are_dropped(service, monkeypatch):
+    monkeypatch.setattr(search_service, "DISCOVERY_TIME_BUDGET", 0.3)
+    _slow_requests(service, monkeypatch, {"contact": 0.05, "about": 0.6, "team": 0.05})
+    started = time.monotonic()
+    subpages = service._discover_subpages("https://acme.com/", parse_html(HOME), {})
+
+    assert time.monotonic() - started < 0.5
+    assert sorted(c.url for c, _ in subpages) == ["https://acme.com/contact", "https://acme.com/team"]
+    time.sleep(0.4)
+    late = [r for r in service.responses if r.url.endswith("/about")]
+    assert late and late[0].closed  # Answered after the deadline: released, never read
@@ -0,0 +1,71 @@
+import pytest
+from disk_cache import DiskCache, cache_key, cache_stats
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def _age(cache, key, seconds):
+    cache._conn().execute(
+        "UPDATE cache_entries SET expires_at = expires_at - ?, last_access = last_access - ? "
+        "WHERE namespace = ? AND key = ?", (seconds, seconds, cache.namespace, key),
+    )
+
+
+def test_cache_key_is_stable_and_order_sensitive():
+    assert cache_key("cx", "saas", 10, 1) == cache_key("cx", "saas", 10, 1)
+    assert cache_key("cx", "saas", 10, 1) != cache_key("cx", "saas", 1, 10)
+
+
+def test_round_trip_and_namespaces(db_path):
+    a = DiskCache("a", ttl=60, max_entries=10, db_path=db_path)
+    b = DiskCache("b", ttl=60, max_entries=10, db_path=db_path)
+    a.set("k", {"items": [1, 2]})
+    assert a.get("k") == {"items": [1, 2]}
+    assert b.get("k", "missing") == "missing"
+
+
+def test_expired_entries_miss_unless_stale_allowed(db_path):
+    cache = DiskCache("ttl", ttl=60, max_entries=10, db_path=db_path)
+    cache.set("k", "v")
+    _age(cache, "k", 61)
+
+    assert cache.get("k") is None
+    assert not cache.contains("k")
+    entry = cache.get_entry("k", allow_stale=True)
+    assert entry["stale"] and entry["value"] == "v"
+
+    cache.touch("k")
+    assert cache.get("k") == "v"
+
+
+def test_per_entry_ttl(db_path):
+    cache = DiskCache("ttl", ttl=3600, max_entries=10, db_path=db_path)
+    cache.set("short", 1, ttl=1)
+    entry = cache.get_entry("short")
+    assert entry["expires_at"] - entry["created_at"] == pytest.approx(1)
+
+
+def test_least_recently_used_entries_are_evicted(db_path):
+    cache = DiskCache("lru", ttl=60, max_entries=3, db_path=db_path)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.set(key, i)
+        _age(cache, key, 10 - i)  # a oldest
+    cache.get("a")  # a becomes most recently used
+    cache.set("d", 3)
+
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in ("a", "c", "d")] == [0, 2, 3]
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 3
+
+
+def test_stats_count_hits_and_misses(db_path):
+    cache = DiskCache("stats", ttl=60, max_entries=10, db_path=db_path)
+    cache.set("k", "v")
+    cache.get("k")
+    cache.get("k")
+    cache.get("other")
+    stats = {s["namespace"]: s for s in cache_stats(db_path)}["stats"]
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (2, 1, 0.667)
@@ -0,0 +1,94 @@
+import pytest
+import requests
+import search_service
+from disk_cache import DiskCache
+from search_service import SearchService
+
+PAGE = b"<html><body><h1>Acme Robotics</h1><p>Industrial robots. Email sales@acme.com</p></body></html>"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=PAGE, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.body = body
+        self.headers = {"Content-Type": "text/html; charset=utf-8", **(headers or {})}
+        self.encoding = "utf-8"
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(str(self.status_code), response=self)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_service, "DISCOVERY_USE_SITEMAP", False)
+    service = SearchService(api_key="key", search_engine_id="cx")
+    service.snapshots = None
+    service.extract_cache = DiskCache("page_content", ttl=3600, max_entries=10, db_path=str(tmp_path / "c.sqlite3"))
+    service.sent = []
+    service.replies = []
+
+    def request(url, headers, required=False):
+        service.sent.append(headers)
+        response = service.replies.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        if not response.ok:
+            response.raise_for_status()
+        return response
+    monkeypatch.setattr(service, "_request", request)
+    return service
+
+
+def _expire(service):
+    service.extract_cache._conn().execute("UPDATE cache_entries SET expires_at = 0")
+
+
+def test_fresh_entries_skip_the_network(service):
+    service.replies = [FakeResponse(headers={"ETag": '"v1"'})]
+    content = service.extract_page_content("https://acme.com/")
+    assert "Acme Robotics" in content and "sales@acme.com" in content
+    assert service.extract_page_content("https://acme.com/") == content
+    assert len(service.sent) == 1
+
+
+def test_stale_entries_revalidate_and_304_keeps_them(service):
+    service.replies = [FakeResponse(headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+                       FakeResponse(status_code=304)]
+    content = service.extract_page_content("https://acme.com/")
+    _expire(service)
+
+    assert service.extract_page_content("https://acme.com/") == content
+    assert service.sent[1]["If-None-Match"] == '"v1"'
+    assert service.sent[1]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert not service.extract_cache.get_entry(_key())["stale"]
+
+
+def test_changed_pages_replace_the_entry(service):
+    service.replies = [FakeResponse(headers={"ETag": '"v1"'}),
+                       FakeResponse(body=PAGE.replace(b"Industrial", b"Medical"), headers={"ETag": '"v2"'})]
+    service.extract_page_content("https://acme.com/")
+    _expire(service)
+
+    assert "Medical robots" in service.extract_page_content("https://acme.com/")
+    assert service.extract_cache.get(_key())["etag"] == '"v2"'
+
+
+def test_stale_content_is_served_when_the_site_is_down(service):
+    service.replies = [FakeResponse(), requests.exceptions.ConnectionError("down")]
+    content = service.extract_page_content("https://acme.com/")
+    _expire(service)
+    assert service.extract_page_content("https://acme.com/") == content
+
+
+def _key():
+    from search_service import EXTRACTION_VERSION
+    from disk_cache import cache_key
+    return cache_key("page_content", EXTRACTION_VERSION, "https://acme.com/")
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import httpx
+import pytest
+from groq import Groq, AsyncGroq
+from llm_providers import GroqProvider, is_rate_limited
+from rate_limiter import AdaptiveLimiter
+
+RATE_HEADERS = {
+    "x-ratelimit-limit-requests": "30", "x-ratelimit-remaining-requests": "29",
+    "x-ratelimit-limit-tokens": "6000", "x-ratelimit-remaining-tokens": "5000",
+    "x-ratelimit-reset-requests": "2s", "x-ratelimit-reset-tokens": "1.5s",
+}
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "llama-3.1-8b-instant",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150},
+    }
+
+
+def handler(request):
+    body = json.loads(request.content)
+    assert body["response_format"] == {"type": "json_object"}
+    if "rate limit me" in body["messages"][0]["content"]:
+        return httpx.Response(429, headers={"retry-after": "7"}, json={"error": {"message": "slow down"}})
+    return httpx.Response(200, headers=RATE_HEADERS, json=completion('{"company_name": "Acme"}'))
+
+
+@pytest.fixture
+def provider():
+    provider = GroqProvider(api_key="test-key")
+    provider.limiter = AdaptiveLimiter()
+    provider.client = Groq(api_key="test-key", max_retries=0,
+                           http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    return provider
+
+
+def _use_async_transport(provider):
+    provider._async_clients[asyncio.get_running_loop()] = AsyncGroq(
+        api_key="test-key", max_retries=0, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+def test_sync_call_returns_text_usage_and_headers(provider):
+    text, prompt_tokens, completion_tokens, headers = provider._call("hello")
+    assert json.loads(text) == {"company_name": "Acme"}
+    assert (prompt_tokens, completion_tokens) == (120, 30)
+    assert headers["x-ratelimit-remaining-tokens"] == "5000"
+
+
+def test_async_call_returns_text_usage_and_headers(provider):
+    async def call():
+        _use_async_transport(provider)
+        return await provider._call_async("hello")
+
+    text, prompt_tokens, completion_tokens, headers = asyncio.run(call())
+    assert json.loads(text) == {"company_name": "Acme"}
+    assert (prompt_tokens, completion_tokens) == (120, 30)
+    assert headers["x-ratelimit-remaining-requests"] == "29"
+
+
+def test_async_complete_feeds_the_limiter(provider):
+    async def call():
+        _use_async_transport(provider)
+        return await provider.complete_async("hello", tokens=200)
+
+    result = asyncio.run(call())
+    assert result.data == {"company_name": "Acme"} and result.provider == "groq"
+    assert provider.limiter.stats()["remaining_tokens"] == 5000
+
+
+def test_async_rate_limit_pauses_the_provider(provider):
+    async def call():
+        _use_async_transport(provider)
+        return await provider.complete_async("rate limit me", tokens=200)
+
+    with pytest.raises(Exception) as error:
+        asyncio.run(call())
+    assert is_rate_limited(error.value)
+    assert not provider.healthy()
@@ -0,0 +1,48 @@
+import pytest
+from html_text import parse_html, available_backends, PAGE_DROP_TAGS, SUBPAGE_DROP_TAGS
+
+PAGE = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html><html><head><title>Acme Robotics</title>
+<style>body { color: red }</style><script>var x = "<p>not text</p>";</script></head>
+<body>
+<header><a href="/">Home</a> <nav><a href="/about">About us</a> <a href="/team">Team</a></nav></header>
+<!-- a comment -->
+<main><h1>Acme   Robotics</h1><p>We build <b>industrial</b> robots.<br>Call +49 30 1234567</p>
+<template><p>Template text <a href="/tpl">hidden</a></p></template>
+<noscript>Enable JS</noscript>
+<p>Email: <a href="mailto:sales@acme.com">sales@acme.com</a> &amp; more</p>
+<ul><li>One</li><li>Two</li></ul>
+<table><tr><td>Cell A</td><td>Cell B</td></tr></table>
+<a href="https://linkedin.com/company/acme">  LinkedIn
+ page </a>
+</main>
+<footer>&copy; 2024 Acme <a href="/impressum">Impressum</a></footer>
+</body></html>"""
+
+LINKS = [
+    ("/", "Home"), ("/about", "About us"), ("/team", "Team"), ("mailto:sales@acme.com", "sales@acme.com"),
+    ("https://linkedin.com/company/acme", "LinkedIn page"), ("/impressum", "Impressum"),
+]
+MAIN_TEXT = ("Acme   Robotics We build industrial robots. Call +49 30 1234567 Enable JS "
+             "Email: sales@acme.com & more One Two Cell A Cell B LinkedIn\n page")
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_page_text_and_links_match_across_backends(backend):
+    page = parse_html(PAGE, PAGE_DROP_TAGS, backend=backend)
+    assert page.text == f"Acme Robotics {MAIN_TEXT}"
+    assert page.links == LINKS
+    assert page.layout_text == "Home About us Team © 2024 Acme Impressum"
+    assert page == parse_html(PAGE, PAGE_DROP_TAGS, backend="bs4")
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_subpage_keeps_layout_text_inline(backend):
+    page = parse_html(PAGE, SUBPAGE_DROP_TAGS, backend=backend)
+    assert page.text == f"Acme Robotics Home About us Team {MAIN_TEXT} © 2024 Acme Impressum"
+    assert page.links == LINKS and page.layout_text == ""
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_empty_document(backend):
+    assert parse_html("", backend=backend).text == ""
@@ -0,0 +1,54 @@
+import pytest
+from html_text import parse_html
+from http_client import NotHTMLContent, read_html
+
+INLINE_SCRIPT = "<script>" + "if (a > b) { render('<div>' + a + '</div>'); }\n" * 3500 + "</script>"
+BODY_TEXT = "Acme Robotics builds industrial robots for warehouses. Contact sales@acme.com."
+BIG_HEAD_PAGE = (
+    f"<html><head><title>Acme</title>{INLINE_SCRIPT}<style>p > a {{ color: red; }}</style></head>"
+    f"<body><p>{BODY_TEXT}</p></body></html>"
+).encode()
+
+
+class FakeResponse:
+    def __init__(self, body, content_type="text/html; charset=utf-8"):
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        self.encoding = "utf-8"
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            self.read = i + chunk_size
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_inline_script_spanning_chunks_is_not_counted_as_text():
+    assert len(BIG_HEAD_PAGE) > 150_000
+    response = FakeResponse(BIG_HEAD_PAGE)
+    html = read_html(response, text_budget=100)
+    assert BODY_TEXT in parse_html(html).text
+    assert response.closed
+
+
+def test_stops_early_once_text_budget_is_met():
+    page = ("<html><body>" + "<p>Industrial robots for every warehouse.</p>" * 5000 + "</body></html>").encode()
+    response = FakeResponse(page)
+    html = read_html(response, text_budget=1000)
+    assert 3000 <= len(parse_html(html).text) < len(page) // 4
+    assert response.read < len(page)
+
+
+def test_max_bytes_caps_the_body():
+    assert len(read_html(FakeResponse(BIG_HEAD_PAGE), max_bytes=20_000)) <= 20_000
+
+
+def test_non_html_is_refused_without_reading():
+    response = FakeResponse(b"%PDF-1.7", content_type="application/pdf")
+    with pytest.raises(NotHTMLContent):
+        read_html(response)
+    assert response.read == 0 and response.closed
@@ -0,0 +1,89 @@
+import threading
+import pytest
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def _age_heartbeat(queue, job_id, seconds):
+    queue._conn().execute("UPDATE jobs SET heartbeat_at = heartbeat_at - ? WHERE id = ?", (seconds, job_id))
+
+
+def test_claim_takes_oldest_queued_job(queue):
+    first = queue.enqueue("agent", {"industry": "SaaS"})
+    second = queue.enqueue("agent", {"industry": "Fintech"})
+
+    job = queue.claim("w1")
+    assert job["id"] == first
+    assert job["status"] == "running" and job["worker_id"] == "w1" and job["attempts"] == 1
+    assert job["payload"] == {"industry": "SaaS"}
+    assert queue.claim("w2")["id"] == second
+    assert queue.claim("w3") is None
+
+
+def test_concurrent_claims_never_share_a_job(queue):
+    ids = {queue.enqueue("agent", {"n": i}) for i in range(40)}
+    claimed, lock = [], threading.Lock()
+
+    def worker(name):
+        while True:
+            job = queue.claim(name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_requeue_stale_returns_lost_jobs_to_the_queue(queue):
+    job_id = queue.enqueue("agent", {})
+    live_id = queue.enqueue("agent", {})
+    queue.claim("dead-worker")
+    queue.claim("live-worker")
+    _age_heartbeat(queue, job_id, 600)
+
+    assert queue.requeue_stale(stale_seconds=300, max_attempts=3) == 1
+    job = queue.get(job_id)
+    assert job["status"] == "queued" and job["worker_id"] is None
+    assert queue.get(live_id)["status"] == "running"
+    assert queue.claim("w2")["attempts"] == 2
+
+
+def test_requeue_stale_fails_jobs_out_of_attempts(queue):
+    job_id = queue.enqueue("agent", {})
+    for attempt in range(2):
+        queue.claim(f"w{attempt}")
+        _age_heartbeat(queue, job_id, 600)
+        queue.requeue_stale(stale_seconds=300, max_attempts=2)
+
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and job["attempts"] == 2
+    assert job["error"] == "Worker lost too many times"
+
+
+def test_progress_counts_as_heartbeat(queue):
+    job_id = queue.enqueue("agent", {})
+    queue.claim("w1")
+    _age_heartbeat(queue, job_id, 600)
+    queue.update_progress(job_id, {"saved": 3})
+
+    assert queue.requeue_stale(stale_seconds=300) == 0
+    assert queue.get(job_id)["progress"] == {"saved": 3}
+
+
+def test_complete_and_fail(queue):
+    done, failed = queue.enqueue("agent", {}), queue.enqueue("agent", {})
+    queue.complete(done, {"saved": 1})
+    queue.fail(failed, "boom")
+    assert queue.get(done)["status"] == "done" and queue.get(done)["result"] == {"saved": 1}
+    assert queue.get(failed)["status"] == "failed" and queue.get(failed)["error"] == "boom"
+    assert {j["id"] for j in queue.list_jobs()} == {done, failed}
@@ -0,0 +1,59 @@
+from config import TRIAGE_CONTENT_THRESHOLD, TRIAGE_RESULT_THRESHOLD
+from lead_triage import triage_content, triage_result
+from models import SearchQuery
+
+QUERY = SearchQuery(industry="Commercial Real Estate", location="Austin, TX", keywords=["property management", "leasing"])
+
+B2B_PAGE = """URL: https://lonestarproperties.com/
+
+Main Page Content:
+Lone Star Properties is a commercial real estate firm serving office and industrial owners across
+Central Texas. Our property management team handles leasing, maintenance and tenant relations for
+over 4 million square feet in Austin and San Antonio.
+
+Possible Emails Found on Page:
+info@lonestarproperties.com"""
+
+
+def test_relevant_b2b_page_is_kept():
+    triage = triage_content(B2B_PAGE, QUERY)
+    assert triage.passes(TRIAGE_CONTENT_THRESHOLD)
+    assert triage.reasons == ["industry", "keywords 100%", "contact info", "location"]
+    assert triage.score == 8
+
+
+def test_relevant_page_without_contact_details_is_kept():
+    page = "Main Page Content:\nWe are a commercial real estate brokerage in Austin focused on office leasing."
+    assert triage_content(page, QUERY).passes(TRIAGE_CONTENT_THRESHOLD)
+
+
+def test_boilerplate_page_is_dropped():
+    page = ("Main Page Content:\nPlease enable JavaScript to continue. We use cookies to improve your experience. "
+            "Accept all. Sign in. Privacy policy. Terms of use.")
+    triage = triage_content(page, QUERY)
+    assert not triage.passes(TRIAGE_CONTENT_THRESHOLD)
+    assert triage.explain() == "0.0 (no signals)"
+
+
+def test_multi_word_industry_gets_partial_credit():
+    triage = triage_content("Real estate brokerage for estate planning lawyers", QUERY)
+    assert triage.reasons == ["industry 67%"] and round(triage.score, 2) == 1.33
+
+
+def test_company_result_passes_result_triage():
+    result = {"link": "https://lonestarproperties.com/", "title": "Lone Star Properties | Commercial Real Estate",
+              "snippet": "Property management and leasing in Austin, TX."}
+    assert triage_result(result, QUERY).passes(TRIAGE_RESULT_THRESHOLD)
+
+
+def test_directories_listicles_and_job_pages_are_dropped():
+    directory = {"link": "https://www.crunchbase.com/organization/lone-star", "title": "Lone Star Properties"}
+    listicle = {"link": "https://blog.example.com/top-10-austin-commercial-real-estate-firms",
+                "title": "Top 10 Commercial Real Estate Firms in Austin"}
+    jobs = {"link": "https://jobs.example.com/austin/leasing", "title": "Leasing Agent Jobs in Austin, TX",
+            "snippet": "Apply now for 120 open positions."}
+
+    blocked = triage_result(directory, QUERY)
+    assert blocked.blocked and not blocked.passes(TRIAGE_RESULT_THRESHOLD)
+    assert not triage_result(listicle, QUERY).passes(TRIAGE_RESULT_THRESHOLD)
+    assert not triage_result(jobs, QUERY).passes(TRIAGE_RESULT_THRESHOLD)
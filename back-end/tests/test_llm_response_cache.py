@@ -0,0 +1,56 @@
+import json
+import ai_service
+from models import SearchQuery
+
+QUERY = SearchQuery(industry="Robotics", location="Berlin", keywords=["automation"])
+PAGE = "URL: https://acme.com\n\nMain Page Content:\nAcme builds robots for automation in Berlin."
+ANSWER = json.dumps({"company_name": "Acme", "qualification_score": 8})
+
+
+def test_identical_inputs_are_answered_from_cache(scripted_ai):
+    ai, provider = scripted_ai(lambda prompt: ANSWER)
+    first = ai.analyze_lead(PAGE, QUERY)
+    second = ai.analyze_lead(PAGE, QUERY)
+
+    assert first.name == second.name == "Acme"
+    assert len(provider.prompts) == 1
+    assert ai.run_stats["llm_cache_hits"] == 1 and ai.run_stats["llm_calls"] == 1
+
+
+def test_query_content_and_prompt_version_are_part_of_the_key(scripted_ai, monkeypatch):
+    ai, provider = scripted_ai(lambda prompt: ANSWER)
+    ai.analyze_lead(PAGE, QUERY)
+    ai.analyze_lead(PAGE, SearchQuery(industry="Robotics", location="Munich", keywords=["automation"]))
+    ai.analyze_lead(PAGE + " Now hiring.", QUERY)
+    monkeypatch.setattr(ai_service, "LEAD_PROMPT_VERSION", ai_service.LEAD_PROMPT_VERSION + 1)
+    ai.analyze_lead(PAGE, QUERY)
+    assert len(provider.prompts) == 4
+
+
+def test_failures_are_not_cached(scripted_ai):
+    answers = iter(["not json"] * 3 + [ANSWER])  # analyze_lead makes 3 attempts
+    ai, provider = scripted_ai(lambda prompt: next(answers))
+    assert ai.analyze_lead(PAGE, QUERY) is None
+    assert ai.analyze_lead(PAGE, QUERY).name == "Acme"
+    assert ai.run_stats["llm_cache_hits"] == 0
+
+
+def test_batch_answers_fill_the_per_document_cache(scripted_ai):
+    def handler(prompt):
+        if '<document id="doc-0">' in prompt:
+            return json.dumps({"leads": [{"id": "doc-0", "company_name": "Acme", "qualification_score": 8},
+                                         {"id": "doc-1", "company_name": "Globex", "qualification_score": 6}]})
+        return ANSWER
+
+    ai, provider = scripted_ai(handler)
+    globex = PAGE.replace("acme", "globex").replace("Acme", "Globex")
+    ai.analyze_leads_batch([PAGE, globex], QUERY)
+    assert ai.analyze_lead(globex, QUERY).name == "Globex"
+    assert ai.analyze_leads_batch([PAGE, globex], QUERY)[0].name == "Acme"
+    assert len(provider.prompts) == 1
+
+
+def test_brainstorm_is_cached_per_query(scripted_ai):
+    ai, provider = scripted_ai(lambda prompt: json.dumps({"leads": [{"title": "Acme", "link": "https://acme.com"}]}))
+    assert ai.brainstorm_leads(QUERY) == ai.brainstorm_leads(QUERY) == [{"title": "Acme", "link": "https://acme.com"}]
+    assert len(provider.prompts) == 1
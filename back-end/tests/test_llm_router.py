@@ -0,0 +1,195 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+import llm_providers
+from llm_providers import LLMProvider, LLMRouter, MockProvider, RequestAbandoned
+from llm_telemetry import OUTCOME_OK, OUTCOME_ERROR, OUTCOME_HEDGE_LOST, OUTCOME_CANCELLED
+from rate_limiter import AdaptiveLimiter
+
+
+class FakeProvider(LLMProvider):
+    """Answers {"from": model} after `latency` seconds, or raises when `fail` is set."""
+
+    name = "mock"
+
+    def __init__(self, model, latency=0.01, fail=False, max_in_flight=16):
+        super().__init__(model)
+        self.limiter = AdaptiveLimiter(max_in_flight=max_in_flight, initial_in_flight=max_in_flight)
+        self.latency = latency
+        self.fail = fail
+        self.sent = 0
+
+    def _result(self):
+        self.sent += 1
+        if self.fail:
+            raise RuntimeError(f"{self.model} is down")
+        return json.dumps({"from": self.model}), 10, 5, None
+
+    def _call(self, prompt):
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _call_async(self, prompt):
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+def warm_up(provider, latency, samples=10):
+    for _ in range(samples):
+        provider.health.add(latency, True)
+
+
+@pytest.fixture(autouse=True)
+def short_deadlines(monkeypatch):
+    monkeypatch.setattr(llm_providers, "LLM_HEDGE_MIN_DEADLINE", 0.05)
+    monkeypatch.setattr(llm_providers, "LLM_HEDGE_DEFAULT_DEADLINE", 0.1)
+
+
+def observed():
+    calls = []
+    return calls, lambda provider, latency, outcome, pt, ct: calls.append((provider.model, outcome))
+
+
+def test_no_providers_is_a_configuration_error():
+    with pytest.raises(ValueError):
+        LLMRouter([])
+
+
+def test_unmeasured_then_fastest_healthy_provider_first():
+    slow, fast, flaky, new = FakeProvider("slow"), FakeProvider("fast"), FakeProvider("flaky"), FakeProvider("new")
+    warm_up(slow, 2.0)
+    warm_up(fast, 0.5)
+    warm_up(flaky, 0.1)
+    for _ in range(15):
+        flaky.health.add(0.1, False)  # 60% errors
+    assert [p.model for p in LLMRouter([slow, fast, flaky, new]).ranked()] == ["new", "fast", "slow", "flaky"]
+
+
+def test_providers_told_to_back_off_go_last():
+    paused, other = FakeProvider("paused"), FakeProvider("other")
+    paused.limiter.paused_until = time.monotonic() + 60
+    assert [p.model for p in LLMRouter([paused, other]).ranked()] == ["other", "paused"]
+
+
+@pytest.mark.parametrize("hedge", [False, True])
+def test_failover_sync(hedge):
+    down, up = FakeProvider("down", fail=True), FakeProvider("up")
+    calls, observer = observed()
+    result = LLMRouter([down, up], hedge=hedge).complete("prompt", 10, observer)
+    assert result.data == {"from": "up"}
+    assert calls == [("down", OUTCOME_ERROR), ("up", OUTCOME_OK)]
+
+
+def test_failover_async():
+    down, up = FakeProvider("down", fail=True), FakeProvider("up")
+    calls, observer = observed()
+    result = asyncio.run(LLMRouter([down, up]).complete_async("prompt", 10, observer))
+    assert result.data == {"from": "up"}
+    assert calls == [("down", OUTCOME_ERROR), ("up", OUTCOME_OK)]
+
+
+def test_every_provider_failing_raises_the_last_error():
+    router = LLMRouter([FakeProvider("a", fail=True), FakeProvider("b", fail=True)])
+    with pytest.raises(RuntimeError, match="b is down"):
+        router.complete("prompt", 10)
+    with pytest.raises(RuntimeError, match="b is down"):
+        asyncio.run(router.complete_async("prompt", 10))
+
+
+def test_slow_request_is_hedged_sync():
+    slow, fast = FakeProvider("slow", latency=0.5), FakeProvider("fast", latency=0.01)
+    warm_up(slow, 0.05)
+    warm_up(fast, 0.06)
+    router = LLMRouter([slow, fast])
+    calls, observer = observed()
+
+    started = time.monotonic()
+    result = router.complete("prompt", 10, observer)
+    assert result.data == {"from": "fast"}
+    assert time.monotonic() - started < 0.3
+    assert router.hedges == 1
+    time.sleep(0.6)
+    assert calls == [("fast", OUTCOME_OK), ("slow", OUTCOME_HEDGE_LOST)]
+
+
+def test_slow_request_is_hedged_and_cancelled_async():
+    slow, fast = FakeProvider("slow", latency=0.5), FakeProvider("fast", latency=0.01)
+    warm_up(slow, 0.05)
+    warm_up(fast, 0.06)
+    router = LLMRouter([slow, fast])
+    calls, observer = observed()
+
+    async def run():
+        result = await router.complete_async("prompt", 10, observer)
+        await asyncio.sleep(0.05)  # Let the cancelled request report
+        return result
+
+    assert asyncio.run(run()).data == {"from": "fast"}
+    assert router.hedges == 1
+    assert calls == [("fast", OUTCOME_OK), ("slow", OUTCOME_CANCELLED)]
+    assert slow.limiter.in_flight == 0
+
+
+def test_fast_requests_are_not_hedged():
+    primary, backup = FakeProvider("primary", latency=0.01), FakeProvider("backup")
+    router = LLMRouter([primary, backup])
+    for _ in range(5):
+        router.complete("prompt", 10)
+    assert router.hedges == 0 and backup.sent == 0
+
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_time_queued_for_a_local_slot_does_not_trigger_hedges(sync):
+    # One request at a time, 0.03s each: 8 concurrent requests queue for up to ~0.25s,
+    # far past the 0.05s deadline, but none of them is slow once sent.
+    primary = FakeProvider("primary", latency=0.03, max_in_flight=1)
+    backup = FakeProvider("backup")
+    warm_up(primary, 0.03)
+    warm_up(backup, 0.04)
+    router = LLMRouter([primary, backup])
+
+    if sync:
+        threads = [threading.Thread(target=router.complete, args=("prompt", 10)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        async def run():
+            await asyncio.gather(*(router.complete_async("prompt", 10) for _ in range(8)))
+        asyncio.run(run())
+
+    assert router.hedges == 0 and backup.sent == 0 and primary.sent == 8
+
+
+def test_a_hedge_still_queued_when_the_race_ends_is_never_sent():
+    slow = FakeProvider("slow", latency=0.3)
+    backup = FakeProvider("backup", latency=0.01, max_in_flight=1)
+    warm_up(slow, 0.05)
+    warm_up(backup, 0.06)
+    backup.limiter.acquire()  # Backup busy: the hedge waits for a slot
+    threading.Timer(0.5, backup.limiter.release).start()
+    calls, observer = observed()
+
+    result = LLMRouter([slow, backup]).complete("prompt", 10, observer)
+    assert result.data == {"from": "slow"}
+    time.sleep(0.6)
+    assert backup.sent == 0 and backup.limiter.in_flight == 0
+    assert calls == [("slow", OUTCOME_OK)]
+
+
+def test_abandoned_requests_give_their_slot_back():
+    provider = FakeProvider("p")
+    with pytest.raises(RequestAbandoned):
+        provider.complete("prompt", 10, on_start=lambda p: False)
+    assert provider.limiter.in_flight == 0 and provider.sent == 0
+
+
+def test_mock_provider_answers_every_prompt_shape():
+    mock = MockProvider(latency=0.001, seed=1)
+    batch = mock.complete('<document id="doc-0">a</document><document id="doc-1">b</document>', 10).data
+    assert [lead["id"] for lead in batch["leads"]] == ["doc-0", "doc-1"]
+    assert "link" in mock.complete("Brainstorm a list of companies", 10).data["leads"][0]
+    assert mock.complete("Analyze this", 10).data["company_name"] == "Mock Company"
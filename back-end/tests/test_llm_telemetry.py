@@ -0,0 +1,52 @@
+import json
+import pytest
+from llm_telemetry import LLMLedger, call_cost, OUTCOME_OK, OUTCOME_BAD_JSON, OUTCOME_RATE_LIMITED, OUTCOME_ERROR
+from models import SearchQuery
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return LLMLedger(str(tmp_path / "ledger.sqlite3"))
+
+
+def test_call_cost():
+    assert call_cost("llama-3.1-8b-instant", 1_000_000, 1_000_000) == pytest.approx(0.13)
+    assert call_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_aggregate_by_run(ledger):
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        ledger.record("analyze", "llama-3.1-8b-instant", latency, OUTCOME_OK,
+                      prompt_tokens=1000, completion_tokens=100, run_id="run-a")
+    ledger.record("batch", "llama-3.1-8b-instant", 2.0, OUTCOME_OK, prompt_tokens=4000,
+                  completion_tokens=800, documents=4, run_id="run-a")
+    ledger.record("analyze", "llama-3.1-8b-instant", 0.5, OUTCOME_RATE_LIMITED, attempt=0, run_id="run-a")
+    ledger.record("analyze", "llama-3.1-8b-instant", 0.5, OUTCOME_BAD_JSON, attempt=1, run_id="run-a")
+    ledger.record("analyze", "llama-3.1-8b-instant", 0.5, OUTCOME_ERROR, run_id="run-b")
+
+    [run] = ledger.aggregate("run", run_id="run-a")
+    assert run["run"] == "run-a"
+    assert (run["calls"], run["documents"], run["ok"], run["rate_limited"], run["errors"], run["retries"]) == \
+        (7, 10, 5, 1, 1, 1)
+    assert (run["prompt_tokens"], run["completion_tokens"]) == (8000, 1200)
+    assert run["p50_latency_ms"] == 400.0 and run["p95_latency_ms"] == 2000.0
+    assert run["cost_usd"] == pytest.approx(call_cost("llama-3.1-8b-instant", 8000, 1200))
+
+    by_operation = {row["operation"]: row for row in ledger.aggregate("operation")}
+    assert by_operation["analyze"]["calls"] == 7 and by_operation["batch"]["documents"] == 4
+
+
+def test_unknown_group_by_is_rejected(ledger):
+    with pytest.raises(ValueError):
+        ledger.aggregate("hour")
+
+
+def test_ai_service_records_every_call(scripted_ai):
+    answers = iter(["not json", json.dumps({"company_name": "Acme"})])
+    ai, provider = scripted_ai(lambda prompt: next(answers))
+    ai.run_id = "run-telemetry"
+    ai.analyze_lead("URL: https://acme.com\n\nMain Page Content:\nAcme robots", SearchQuery(industry="Robotics"))
+
+    [run] = ai.ledger.aggregate("run", run_id="run-telemetry")
+    assert (run["calls"], run["ok"], run["errors"], run["retries"]) == (2, 1, 1, 1)
+    assert ai.run_stats["llm_calls"] == 2 and ai.run_stats["prompt_tokens"] == 200
@@ -0,0 +1,37 @@
+from page_metadata import extract_metadata
+
+JSON_LD = """<html><head><script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "WebSite", "name": "Acme Blog", "telephone": "+1 555 000 0000"},
+  {"@type": "Corporation", "legalName": "Acme Robotics GmbH", "name": "Acme",
+   "description": "Industrial &amp; service robots.", "url": "https://acme.com",
+   "email": "mailto:info@acme.com", "sameAs": ["https://www.linkedin.com/company/acme"],
+   "contactPoint": [{"@type": "ContactPoint", "telephone": "+49 30 1234567", "email": "sales@acme.com"}]}
+]}
+</script>
+<meta property="og:site_name" content="Acme OG"><meta name="twitter:site" content="@acmebots">
+</head><body></body></html>"""
+
+
+def test_json_ld_organization_and_contact_points():
+    meta = extract_metadata(JSON_LD)
+    assert meta.name == "Acme Robotics GmbH"
+    assert meta.description == "Industrial & service robots."
+    assert meta.url == "https://acme.com"
+    assert meta.emails == ["info@acme.com", "sales@acme.com"]
+    assert meta.phones == ["+49 30 1234567"]
+    assert meta.same_as == ["https://www.linkedin.com/company/acme", "https://twitter.com/acmebots"]
+    assert ("tel:+49 30 1234567", "") in meta.links() and ("mailto:sales@acme.com", "") in meta.links()
+
+
+def test_opengraph_fills_in_without_json_ld():
+    meta = extract_metadata("""<meta property="og:site_name" content="Acme">
+        <meta name="description" content="We build robots."><meta property="og:url" content="https://acme.com/">""")
+    assert (meta.name, meta.description, meta.url) == ("Acme", "We build robots.", "https://acme.com/")
+    assert meta.emails == [] and meta.phones == []
+
+
+def test_broken_or_unrelated_json_ld_is_ignored():
+    meta = extract_metadata("""<script type="application/ld+json">{not json</script>
+        <script type="application/ld+json">{"@type": "Product", "name": "Widget", "telephone": "123"}</script>""")
+    assert meta.name is None and meta.phones == []
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+import pytest
+import pipeline
+from checkpoint_store import CheckpointStore
+from models import Lead, SearchQuery
+from pipeline import LeadPipeline
+from test_batch_analysis import DOC_ID_RE, answer_batches, page
+
+QUERY = SearchQuery(industry="SaaS", location="Berlin", keywords=["CRM"])
+
+
+def _results(n):
+    return [{"link": f"https://site{i}.example.com", "title": f"Site {i}", "snippet": ""} for i in range(n)]
+
+
+class FakeSearch:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.fetched = []
+        self._lock = threading.Lock()
+
+    def extract_page_content(self, url):
+        with self._lock:
+            self.fetched.append(url)
+        if url in self.fail:
+            raise RuntimeError("connection reset")
+        return f"Page of {url}"
+
+
+class FakeAI:
+    """Sync-only analyzer (no analyze_leads_batch_async), answering None for contents in `reject`."""
+
+    def __init__(self, delay=0.0, reject=()):
+        self.delay = delay
+        self.reject = set(reject)
+        self.batches = []
+
+    def analyze_leads_batch(self, contents, query):
+        time.sleep(self.delay)
+        self.batches.append(list(contents))
+        return [None if c in self.reject else Lead(name=c, source="test") for c in contents]
+
+
+class FakeDB:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.saved = []
+
+    def save_lead(self, lead):
+        if self.gate:
+            self.gate.wait()
+        self.saved.append(lead.website)
+        return {"id": len(self.saved)}
+
+
+@pytest.fixture(autouse=True)
+def no_triage(monkeypatch):
+    monkeypatch.setattr(pipeline, "TRIAGE_ENABLED", False)
+
+
+def _run(pipe, results):
+    return asyncio.run(pipe.run(results, QUERY))
+
+
+def test_every_result_is_fetched_analyzed_and_saved():
+    results = _results(6)
+    search, ai, db = FakeSearch(), FakeAI(), FakeDB()
+    stats = _run(LeadPipeline(db, ai, search), results)
+
+    assert stats == {"total": 6, "fetched": 6, "skipped": 0, "analyzed": 6, "failed": 0, "saved": 6}
+    assert sorted(db.saved) == sorted(r["link"] for r in results)
+    assert sorted(c for batch in ai.batches for c in batch) == sorted(f"Page of {r['link']}" for r in results)
+
+
+def test_failures_are_isolated_per_result():
+    results = _results(5)
+    search = FakeSearch(fail={results[1]["link"]})
+    ai = FakeAI(reject={f"Page of {results[3]['link']}"})
+    db = FakeDB()
+    stats = _run(LeadPipeline(db, ai, search), results)
+
+    assert stats["failed"] == 2 and stats["saved"] == 3
+    assert sorted(db.saved) == sorted(r["link"] for i, r in enumerate(results) if i not in (1, 3))
+
+
+def test_analyzer_batches_the_backlog():
+    ai = FakeAI(delay=0.05)
+    stats = _run(LeadPipeline(FakeDB(), ai, FakeSearch(), analyze_concurrency=1), _results(12))
+
+    assert stats["saved"] == 12
+    assert max(len(b) for b in ai.batches) > 1
+    assert all(len(b) <= pipeline.AI_BATCH_MAX_DOCS for b in ai.batches)
+
+
+def test_blocked_persist_stage_stops_fetching_early():
+    gate = threading.Event()
+    search, db = FakeSearch(), FakeDB(gate=gate)
+    pipe = LeadPipeline(db, FakeAI(), search, fetch_concurrency=1, analyze_concurrency=1,
+                        persist_concurrency=1, queue_size=1)
+    outcome = {}
+    runner = threading.Thread(target=lambda: outcome.update(_run(pipe, _results(30))))
+    runner.start()
+    try:
+        time.sleep(0.5)
+        # Bounded queues: one lead being saved plus a few in each queue and stage, never the whole run
+        assert len(search.fetched) <= 1 + 1 + pipeline.AI_BATCH_MAX_DOCS + 1 + 1 + 1
+    finally:
+        gate.set()
+        runner.join(timeout=10)
+    assert outcome["saved"] == 30
+
+
+def test_resumed_run_skips_finished_work(tmp_path):
+    results = _results(3)
+    saved_url, analyzed_url, fresh_url = (r["link"] for r in results)
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    first = store.open_run(QUERY)
+    first.mark_extracted(saved_url, "saved page")
+    first.mark_analyzed(saved_url, Lead(name="Saved", source="test", website=saved_url))
+    first.mark_saved(saved_url)
+    first.mark_extracted(analyzed_url, "analyzed page")
+    first.mark_analyzed(analyzed_url, Lead(name="Analyzed", source="test", website=analyzed_url))
+
+    checkpoint = store.open_run(QUERY)
+    search, ai, db = FakeSearch(), FakeAI(), FakeDB()
+    stats = _run(LeadPipeline(db, ai, search, checkpoint=checkpoint), results)
+
+    assert checkpoint.resumed
+    assert search.fetched == [fresh_url]
+    assert ai.batches == [[f"Page of {fresh_url}"]]
+    assert sorted(db.saved) == sorted([analyzed_url, fresh_url])
+    assert stats["saved"] == 2
+    assert checkpoint.item(fresh_url)["stage"] == "saved"
+
+
+class PageSearch:
+    """Returns a realistic company page for https://site<n>.com, the n-th one after n * 10 ms."""
+
+    def extract_page_content(self, url):
+        name = url.split("//")[1].split(".")[0]
+        time.sleep(int(name[4:]) * 0.01)  # Pages trickle in, as real fetches do
+        return page(name.title())
+
+
+def test_async_analysis_sends_multi_document_batches(scripted_ai, monkeypatch):
+    monkeypatch.setattr(pipeline, "AI_ASYNC_ENABLED", True)
+    ai, provider = scripted_ai(answer_batches)
+    db = FakeDB()
+    pipe = LeadPipeline(db, ai, PageSearch())
+    results = [{"link": f"https://site{i}.com", "title": "", "snippet": ""} for i in range(30)]
+    stats = _run(pipe, results)
+
+    assert pipe.async_ai and pipe.analyze_concurrency > 1
+    sizes = [len(DOC_ID_RE.findall(p)) for p in provider.prompts]
+    assert stats["saved"] == 30 and sorted(db.saved) == sorted(r["link"] for r in results)
+    assert max(sizes) > 1 and all(size <= pipeline.AI_BATCH_MAX_DOCS for size in sizes)
+    assert len(provider.prompts) <= 30 // 2
@@ -0,0 +1,63 @@
+import threading
+import pytest
+from quota_manager import QuotaLedger, QuotaExhausted, PRIORITY_LOW
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return QuotaLedger("test_api", daily_limit=10, low_priority_reserve=3, db_path=str(tmp_path / "quota.sqlite3"))
+
+
+def test_unspent_units_are_released(ledger):
+    with ledger.reserve(4) as reservation:
+        assert reservation.granted == 4
+        assert ledger.status()["remaining"] == 6
+        reservation.spend()
+    status = ledger.status()
+    assert (status["used"], status["reserved"], status["remaining"]) == (1, 0, 9)
+
+
+def test_grants_are_capped_by_the_remaining_budget(ledger):
+    held = ledger.reserve(8)
+    assert ledger.reserve(5).granted == 2
+    held.close()
+
+
+def test_low_priority_leaves_the_reserve_alone(ledger):
+    with ledger.reserve(5):
+        assert ledger.reserve(5, PRIORITY_LOW).granted == 2  # 10 - 5 reserved - 3 kept back
+    with ledger.reserve(7) as normal:
+        assert ledger.reserve(1, PRIORITY_LOW).granted == 0
+        assert normal.granted == 7
+
+
+def test_spending_past_the_grant_raises(ledger):
+    with ledger.reserve(1) as reservation:
+        reservation.spend()
+        with pytest.raises(QuotaExhausted):
+            reservation.spend()
+    assert ledger.status()["used"] == 1
+
+
+def test_concurrent_reservations_never_overbook(ledger):
+    granted, lock = [], threading.Lock()
+
+    def reserve():
+        reservation = ledger.reserve(3)
+        with lock:
+            granted.append(reservation.granted)
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(granted) == 10
+
+
+def test_mark_exhausted_stops_new_reservations(ledger):
+    with ledger.reserve(2) as reservation:
+        ledger.mark_exhausted()
+        assert ledger.reserve(1).granted == 0
+        reservation.spend()  # Already reserved units can still be spent
+    assert ledger.status()["remaining"] == 0
@@ -0,0 +1,119 @@
+import asyncio
+import time
+import pytest
+from collections import OrderedDict
+import rate_limiter
+from rate_limiter import AdaptiveLimiter, TokenBucket, get_bucket, domain_bucket_name, parse_duration
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("7.66s", 7.66), ("1m30.5s", 90.5), ("250ms", 0.25), ("2h", 7200.0), ("12", 12.0), ("", None), ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=2)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert 0.08 <= time.monotonic() - started < 0.3  # 2 free, then 2 at 20/s
+
+
+def test_host_buckets_are_bounded_and_least_recently_used_go_first(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_host_buckets", OrderedDict())
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_HTTP_MAX_HOSTS", 3)
+    names = [domain_bucket_name(f"https://host{i}.com/") for i in range(4)]
+    first = get_bucket(names[0])
+    get_bucket(names[1])
+    get_bucket(names[2])
+    assert get_bucket(names[0]) is first  # Touched again, so host1 is now the oldest
+    get_bucket(names[3])
+
+    assert list(rate_limiter._host_buckets) == [names[2], names[0], names[3]]
+    assert get_bucket("google_cse") is get_bucket("google_cse")
+    assert "google_cse" not in rate_limiter._host_buckets
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.pause(0.2)
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.19
+
+
+def headers(remaining_requests=100, remaining_tokens=100000, reset="1s"):
+    return {"x-ratelimit-remaining-requests": str(remaining_requests),
+            "x-ratelimit-remaining-tokens": str(remaining_tokens),
+            "x-ratelimit-reset-requests": reset, "x-ratelimit-reset-tokens": reset}
+
+
+def test_in_flight_grows_with_headroom_and_halves_on_429():
+    limiter = AdaptiveLimiter(max_in_flight=8, initial_in_flight=2)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(headers=headers())
+    grown = limiter.limit
+    assert 5 < grown < 8  # About one more slot per round of limit-many successes
+
+    limiter.acquire()
+    limiter.release(rate_limited=True, retry_after=0.0)
+    assert limiter.limit == pytest.approx(grown / 2)
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_limit_never_exceeds_max_in_flight():
+    limiter = AdaptiveLimiter(max_in_flight=3, initial_in_flight=3)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(headers=headers())
+    assert limiter.stats()["limit"] == 3
+
+
+def test_concurrency_is_capped_at_the_limit():
+    limiter = AdaptiveLimiter(max_in_flight=4, initial_in_flight=3)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        await limiter.acquire_async()
+        peak = max(peak, limiter.in_flight)
+        await asyncio.sleep(0.02)
+        limiter.release()
+
+    async def run():
+        await asyncio.gather(*(request() for _ in range(12)))
+    asyncio.run(run())
+    assert peak == 3 and limiter.in_flight == 0
+
+
+def test_requests_wait_for_the_reported_reset():
+    limiter = AdaptiveLimiter(max_in_flight=4, initial_in_flight=4)
+    limiter.acquire()
+    limiter.release(headers=headers(remaining_requests=0, reset="200ms"))
+    started = time.monotonic()
+    limiter.acquire()
+    assert 0.15 <= time.monotonic() - started < 0.5
+    limiter.release()
+
+
+def test_token_budget_holds_back_all_but_one_request():
+    limiter = AdaptiveLimiter(max_in_flight=4, initial_in_flight=4)
+    limiter.acquire()
+    limiter.release(headers=headers(remaining_tokens=1000, reset="150ms"))
+    limiter.acquire(tokens=800)
+    assert limiter._try_start(tokens=800) > 0  # Would overspend the reported budget
+    limiter.release(tokens=800)
+    assert limiter._try_start(tokens=800) == 0  # Nothing in flight: an oversized request still goes
+    limiter.release(tokens=800)
+
+
+def test_retry_after_pauses_every_caller():
+    limiter = AdaptiveLimiter()
+    limiter.acquire()
+    limiter.release(headers={"retry-after": "0.2"}, rate_limited=True)
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.19
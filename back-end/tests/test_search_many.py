@@ -0,0 +1,110 @@
+import threading
+import time
+import pytest
+import search_service
+from disk_cache import DiskCache
+from quota_manager import QuotaLedger, PRIORITY_LOW
+from search_service import SearchService
+
+
+class FakeResponse:
+    def __init__(self, items, status_code=200):
+        self.status_code = status_code
+        self._items = items
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise search_service.requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+    def json(self):
+        return {"items": self._items}
+
+
+class FakeCSE:
+    """CSE endpoint serving `pages` (start index -> links), tracking concurrency."""
+
+    def __init__(self, pages, delay=0.05):
+        self.pages = pages
+        self.delay = delay
+        self.calls = []
+        self.in_flight = self.peak = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params, timeout):
+        with self._lock:
+            self.calls.append(params["start"])
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        links = self.pages.get(params["start"], [])
+        return FakeResponse([{"title": link, "link": link, "snippet": ""} for link in links])
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_service, "acquire", lambda name: None)
+
+    def make(pages, daily_limit=100, low_priority_reserve=0):
+        service = SearchService(api_key="key", search_engine_id="cx", http=FakeCSE(pages))
+        service.cse_cache = DiskCache("google_cse", ttl=3600, max_entries=100, db_path=str(tmp_path / "cache.sqlite3"))
+        service.quota = QuotaLedger("google_cse", daily_limit=daily_limit, low_priority_reserve=low_priority_reserve,
+                                    db_path=str(tmp_path / "quota.sqlite3"))
+        return service
+    return make
+
+
+PAGES = {
+    1: ["https://acme.com/", "https://www.acme.com/about", "https://globex.com/"],
+    11: ["https://initech.com/", "https://globex.com/pricing"],
+    21: ["https://umbrella.com/"],
+}
+
+
+def test_pages_are_fetched_concurrently_and_merged_in_order(make_service):
+    service = make_service(PAGES)
+    results = service.search_leads_many("saas berlin")
+
+    assert [r["link"] for r in results] == [
+        "https://acme.com/", "https://globex.com/", "https://initech.com/", "https://umbrella.com/",
+    ]
+    assert sorted(service.http.calls) == [1, 11, 21]
+    assert service.http.peak == 3
+    assert service.quota.status()["used"] == 3 and service.quota.status()["reserved"] == 0
+
+
+def test_cached_and_known_pages_cost_no_quota(make_service):
+    service = make_service(PAGES)
+    service.search_leads_many("saas berlin", start_indexes=(1,))
+    service.http.calls.clear()
+
+    fetched = []
+    service.search_leads_many("saas berlin", known_pages={11: [{"link": "https://initech.com/"}]},
+                              on_page=lambda start, page: fetched.append(start))
+    assert service.http.calls == [21]  # 1 from the response cache, 11 given by the caller
+    assert fetched == [1, 21]
+    assert service.quota.status()["used"] == 2
+
+
+def test_pages_after_an_empty_page_are_dropped(make_service):
+    service = make_service({1: ["https://acme.com/"], 21: ["https://umbrella.com/"]})
+    results = service.search_leads_many("saas berlin")
+    assert [r["link"] for r in results] == ["https://acme.com/"]
+
+
+def test_pages_beyond_the_granted_budget_are_dropped(make_service):
+    service = make_service(PAGES, daily_limit=3, low_priority_reserve=1)
+    results = service.search_leads_many("saas berlin", priority=PRIORITY_LOW)
+
+    # Low priority may only use 3 - 1 units; page 21 is refused instead of spending the reserve
+    assert sorted(service.http.calls) == [1, 11]
+    assert [r["link"] for r in results][-1] == "https://initech.com/"
+    assert service.quota.status()["used"] == 2 and service.quota.status()["reserved"] == 0
+
+
+def test_no_budget_falls_back_without_fetching(make_service):
+    service = make_service(PAGES, daily_limit=0)
+    results = service.search_leads_many("saas berlin")
+    assert service.http.calls == []
+    assert results and results[0]["link"] == "https://www.salesforce.com/"  # Static fallback
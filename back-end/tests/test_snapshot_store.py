@@ -0,0 +1,75 @@
+import os
+import pytest
+from snapshot_store import SnapshotStore, SNAPSHOT_RECORD
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    def make(**limits):
+        limits = {"max_age": 0, "max_bytes": 0, "prune_every": 0, **limits}
+        return SnapshotStore(mode=SNAPSHOT_RECORD, root=str(tmp_path / "blobs"),
+                             db_path=str(tmp_path / "snapshots.sqlite3"), codec="gzip", **limits)
+    return make
+
+
+def _age(store, url, seconds):
+    store._conn().execute("UPDATE snapshot_index SET fetched_at = fetched_at - ? WHERE url = ?", (seconds, url))
+
+
+def _blob_files(store):
+    return [f for _, _, files in os.walk(store.root) for f in files]
+
+
+def test_identical_pages_share_one_blob(make_store):
+    store = make_store()
+    a = store.put("https://acme.com/", "<p>hello</p>")
+    b = store.put("https://acme.com/index.html", "<p>hello</p>")
+    assert a == b
+    assert store.get("https://acme.com/index.html") == "<p>hello</p>"
+    stats = store.stats()
+    assert (stats["snapshots"], stats["urls"], stats["blobs"]) == (2, 2, 1)
+    assert len(_blob_files(store)) == 1
+
+
+def test_get_at_returns_the_snapshot_of_that_time(make_store):
+    store = make_store()
+    store.put("https://acme.com/", "old")
+    _age(store, "https://acme.com/", 100)
+    store.put("https://acme.com/", "new")
+    history = store.history("https://acme.com/")
+    assert store.get("https://acme.com/") == "new"
+    assert store.get("https://acme.com/", at=history[0]["fetched_at"] + 1) == "old"
+
+
+def test_prune_drops_old_snapshots_and_their_blobs(make_store):
+    store = make_store(max_age=3600)
+    store.put("https://old.com/", "old page")
+    store.put("https://both.com/", "shared page")
+    store.put("https://fresh.com/", "shared page")
+    _age(store, "https://old.com/", 7200)
+    _age(store, "https://both.com/", 7200)
+
+    assert store.prune() == 1
+    assert store.get("https://old.com/") is None
+    assert store.get("https://fresh.com/") == "shared page"  # Blob still referenced
+    assert len(_blob_files(store)) == 1
+
+
+def test_prune_keeps_the_most_recently_fetched_within_max_bytes(make_store):
+    store = make_store()
+    for i in range(5):
+        store.put(f"https://site{i}.com/", f"page {i} " + os.urandom(200).hex())
+        _age(store, f"https://site{i}.com/", 100 - i)
+    per_blob = store.stats()["stored_bytes"] / 5
+    store.max_bytes = int(per_blob * 2.5)
+
+    assert store.prune() == 3
+    assert [store.get(f"https://site{i}.com/") is not None for i in range(5)] == [False, False, False, True, True]
+    assert store.stats()["stored_bytes"] <= store.max_bytes
+
+
+def test_recording_prunes_periodically(make_store):
+    store = make_store(max_bytes=1, prune_every=3)
+    for i in range(3):
+        store.put(f"https://site{i}.com/", f"page {i}")
+    assert store.stats()["blobs"] == 0
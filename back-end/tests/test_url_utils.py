@@ -0,0 +1,23 @@
+import pytest
+from url_utils import domain_key
+
+
+@pytest.mark.parametrize("url, key", [
+    ("https://acme.com/", "acme.com"),
+    ("http://www.acme.com/about", "acme.com"),
+    ("acme.com?utm=x", "acme.com"),
+    ("  HTTPS://Shop.ACME.com.  ", "acme.com"),
+    ("https://acme.com:8443/x", "acme.com"),
+    ("https://www.globex.co.uk/contact", "globex.co.uk"),
+    ("https://foo.github.io/page", "foo.github.io"),
+    ("https://bar.github.io", "bar.github.io"),
+    ("http://192.168.0.1/admin", "192.168.0.1"),
+    ("localhost", "localhost"),
+])
+def test_domain_key(url, key):
+    assert domain_key(url) == key
+
+
+@pytest.mark.parametrize("url", [None, "", "http://", "http://[::1"])
+def test_domain_key_rejects_unusable_urls(url):
+    assert domain_key(url) is None
@@ -0,0 +1,60 @@
+import ipaddress
+from typing import Optional
+from urllib.parse import urlsplit
+
+# Public suffixes that span two labels, so "acme.co.uk" keys as "acme.co.uk"
+# rather than "co.uk". Not the full Public Suffix List, just the ones we see.
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "me.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.in", "net.in", "org.in", "firm.in", "gen.in", "ind.in",
+    "co.nz", "org.nz", "net.nz",
+    "co.jp", "or.jp", "ne.jp",
+    "co.za", "org.za",
+    "com.br", "net.br", "org.br",
+    "com.mx", "com.ar", "com.co", "com.tr", "com.sg", "com.my", "com.ph",
+    "com.cn", "com.hk", "com.tw", "co.kr", "co.id", "co.il", "co.th",
+    "com.ng", "com.pk", "com.eg", "com.sa",
+}
+
+# Hosting platforms where every tenant subdomain is a different company
+PRIVATE_SUFFIXES = {
+    "github.io", "herokuapp.com", "netlify.app", "vercel.app", "pages.dev",
+    "wixsite.com", "blogspot.com", "wordpress.com", "webflow.io", "myshopify.com",
+}
+
+
+def domain_key(url: Optional[str]) -> Optional[str]:
+    """
+    Returns the normalized registrable domain for a URL, used as the lead dedup key.
+    `https://acme.com/`, `http://www.acme.com/about` and `acme.com?utm=x` all map to `acme.com`.
+    """
+    if not url:
+        return None
+
+    url = url.strip().lower()
+    if "://" not in url:
+        url = "http://" + url
+
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    host = host.rstrip(".")
+
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+
+    labels = [label for label in host.split(".") if label]
+    if len(labels) < 2:
+        return host or None
+
+    last_two = ".".join(labels[-2:])
+    if last_two in PRIVATE_SUFFIXES or last_two in MULTI_LABEL_SUFFIXES:
+        return ".".join(labels[-3:]) if len(labels) >= 3 else last_two
+    return last_two
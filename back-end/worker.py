@@ -0,0 +1,125 @@
+"""
+Agent worker pool. Executes jobs queued by `POST /run-agent`.
+
+The API starts it as a child process (EMBEDDED_WORKERS threads), which is the
+default deployment: the queue lives in a SQLite file under DATA_DIR, so the
+workers must share the web process's disk. To run it separately on the same
+machine or volume, set EMBEDDED_WORKERS=0 and start:
+
+    python worker.py
+"""
+import os
+import signal
+import socket
+import threading
+import traceback
+from job_queue import JobQueue
+from models import SearchQuery
+from logger_util import log_event
+from config import WORKER_CONCURRENCY, JOB_POLL_INTERVAL, JOB_STALE_SECONDS
+
+HEARTBEAT_INTERVAL = max(5, JOB_STALE_SECONDS // 5)
+
+
+def run_agent_job(job: dict, queue: JobQueue) -> dict:
+    # Imported lazily so the worker only builds service clients when it has work
+    from main import LeadGenAgent
+
+    query = SearchQuery(**job["payload"])
+    agent = LeadGenAgent()
+    return agent.run(query, progress=lambda counters: queue.update_progress(job["id"], counters))
+
+
+JOB_HANDLERS = {
+    "run_agent": run_agent_job,
+}
+
+
+class WorkerPool:
+    """Fixed pool of threads that claim jobs from the queue and run them to completion."""
+
+    def __init__(self, concurrency: int = WORKER_CONCURRENCY, queue: JobQueue = None):
+        self.concurrency = max(1, concurrency)
+        self.queue = queue or JobQueue()
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        requeued = self.queue.requeue_stale()
+        if requeued:
+            log_event(f"♻️ Re-queued {requeued} interrupted job(s)")
+
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._loop, args=(f"{self.worker_prefix}:{i}",), daemon=True)
+            t.start()
+            self._threads.append(t)
+        log_event(f"👷 Worker pool started with {self.concurrency} worker(s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(JOB_STALE_SECONDS)
+                if not self._stop.is_set():
+                    self.queue.requeue_stale()
+        except KeyboardInterrupt:
+            self.stop()
+        # Let in-flight jobs finish; unfinished ones are re-queued on next start
+        for t in self._threads:
+            t.join()
+
+    def _loop(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(worker_id)
+            except Exception as e:
+                log_event(f"❌ Could not claim job: {e}", "ERROR")
+                job = None
+
+            if not job:
+                self._stop.wait(JOB_POLL_INTERVAL)
+                continue
+
+            self._execute(job)
+
+    def _execute(self, job: dict):
+        job_id = job["id"]
+        handler = JOB_HANDLERS.get(job["kind"])
+        if handler is None:
+            self.queue.fail(job_id, f"Unknown job kind: {job['kind']}")
+            return
+
+        log_event(f"▶️ Job {job_id} ({job['kind']}) started, attempt {job['attempts']}")
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job_id, done), daemon=True)
+        beat.start()
+        try:
+            result = handler(job, self.queue)
+            self.queue.complete(job_id, result)
+            log_event(f"✅ Job {job_id} finished: {result}")
+        except Exception as e:
+            log_event(f"❌ Job {job_id} failed: {e}\n{traceback.format_exc()}", "ERROR")
+            self.queue.fail(job_id, str(e))
+        finally:
+            done.set()
+
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        while not done.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.queue.heartbeat(job_id)
+            except Exception as e:
+                log_event(f"⚠️ Heartbeat failed for job {job_id}: {e}", "WARNING")
+
+
+def main(concurrency: int = WORKER_CONCURRENCY):
+    pool = WorkerPool(concurrency)
+    signal.signal(signal.SIGTERM, lambda *_: pool.stop())
+    pool.run_forever()
+
+
+if __name__ == "__main__":
+    main()